@@ -1,12 +1,19 @@
 from pathlib import Path
+import hashlib
+import json
+import os
 import re
 import pandas as pd
 
 RESULTS_DIR = Path("results/runs")
 SUMMARY_DIR = Path("results/summary")
+CACHE_DIR = SUMMARY_DIR / ".cache"
+
+MANIFEST_VERSION = 1
+TRACKED_KINDS = ("boiler_summary", "stages_summary")
 
 FILE_RE = re.compile(
-    r"^(?P<case>(?P<param>excess_air|fuel_flow|drum_pressure|fouling)_(?P<value>[^_]+)|default_case)_(?P<kind>boiler_summary|stages_summary|steps)\.csv$"
+    r"^(?P<case>(?P<param>excess_air|fuel_flow|drum_pressure|fouling)_(?P<value>[^_]+)|default_case|(?P<campaign>.+?)_(?P<index>\d{5,}))_(?P<kind>boiler_summary|stages_summary|steps)\.(?P<ext>csv|parquet|feather|npz)$"
 )
 
 def parse_param_value(raw):
@@ -26,14 +33,14 @@ def discover_runs(results_dir: Path):
 
     runs = {}
 
-    for path in results_dir.glob("*.csv"):
+    for path in sorted(results_dir.glob("*")):
         m = FILE_RE.match(path.name)
-        if not m:
+        if not m or (m.group("kind") != "steps" and m.group("ext") != "csv"):
             continue
 
         case = m.group("case")
-        param = m.group("param")
-        raw_value = m.group("value")
+        param = m.group("param") or m.group("campaign")
+        raw_value = m.group("value") or m.group("index")
         kind = m.group("kind")
 
         info = runs.setdefault(
@@ -67,22 +74,113 @@ def load_stage_as_tidy(path: Path, run_name: str, param_group: str, param_value)
     return df
 
 def load_steps(path: Path):
-    return pd.read_csv(path)
+    if path.suffix == ".csv":
+        return pd.read_csv(path)
+    from common.results import read_steps
+    return read_steps(path)
 
-def main():
-    RESULTS_DIR.mkdir(exist_ok=True)
-    SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
+def ingest_csv_runs(store, results_dir: Path = RESULTS_DIR, campaign: str = "csv"):
+    runs = discover_runs(results_dir)
+    n = 0
+    for case, info in runs.items():
+        files = info["files"]
+        if not {"steps", "stages_summary", "boiler_summary"} <= set(files):
+            print(f"[WARN] run {case}: incomplete CSV triple, not ingested.")
+            continue
+        value = info["value"]
+        store.write_run(
+            case,
+            load_steps(files["steps"]),
+            pd.read_csv(files["stages_summary"], index_col=0).T,
+            pd.read_csv(files["boiler_summary"]),
+            param_group=info["param"],
+            param_value=value if isinstance(value, float) else None,
+            campaign=campaign,
+        )
+        n += 1
+    print(f"[INFO] Ingested {n} run(s) from {results_dir} into {store.root}")
+
+def file_signature(path: Path, previous=None):
+    st = path.stat()
+    sig = {"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if previous and previous.get("size") == sig["size"] and previous.get("mtime_ns") == sig["mtime_ns"]:
+        sig["sha256"] = previous.get("sha256")
+    else:
+        sig["sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return sig
+
+def load_manifest(cache_dir: Path):
+    path = cache_dir / "manifest.json"
+    try:
+        doc = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if doc.get("version") != MANIFEST_VERSION:
+        return {}
+    return doc.get("runs", {})
+
+def _load_cached_frame(path: Path):
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        return None
+
+def _write_atomic(path: Path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
 
-    runs = discover_runs(RESULTS_DIR)
+def collect_from_csv(results_dir: Path, cache_dir: Path = CACHE_DIR, rebuild: bool = False):
+    runs = discover_runs(results_dir)
 
     if not runs:
         print("[INFO] No runs discovered in 'results/' matching expected patterns.")
-        return
+        return None, None
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    boiler_cache = cache_dir / "boiler_rows.pkl"
+    stages_cache = cache_dir / "stage_rows.pkl"
+
+    old_manifest = {} if rebuild else load_manifest(cache_dir)
+    cached_boiler = _load_cached_frame(boiler_cache) if old_manifest else None
+    cached_stages = _load_cached_frame(stages_cache) if old_manifest else None
+    if cached_boiler is None or cached_stages is None:
+        old_manifest = {}
+        cached_boiler = cached_stages = None
+
+    manifest = {}
+    changed = []
+
+    for case, info in runs.items():
+        files = info["files"]
+        run_name = info["case"]
+
+        if "steps" not in files:
+            print(f"[WARN] run {run_name}: steps file missing.")
+
+        prev = old_manifest.get(case, {}).get("files", {})
+        sigs = {kind: file_signature(files[kind], prev.get(kind)) for kind in TRACKED_KINDS if kind in files}
+        manifest[case] = {"param": info["param"], "value": info["value"], "files": sigs}
+
+        same = set(sigs) == set(prev) and all(
+            sigs[k]["sha256"] == prev[k].get("sha256") and sigs[k]["path"] == prev[k].get("path") for k in sigs
+        )
+        if not same:
+            changed.append(case)
+
+    removed = set(old_manifest) - set(manifest)
+    stale = set(changed) | removed
+
+    print(
+        f"[INFO] {len(runs)} run(s): {len(changed)} new/changed, {len(removed)} removed, "
+        f"{len(runs) - len(changed)} from cache"
+    )
 
     boiler_rows = []
     stage_rows = []
 
-    for case, info in runs.items():
+    for case in changed:
+        info = runs[case]
         files = info["files"]
         run_name = info["case"]
         param_group = info["param"]
@@ -100,12 +198,59 @@ def main():
         else:
             print(f"[WARN] run {run_name}: stages_summary file missing.")
 
-        if "steps" not in files:
-            print(f"[WARN] run {run_name}: steps file missing.")
+    boiler_parts = [pd.DataFrame(boiler_rows)] if boiler_rows else []
+    if cached_boiler is not None and not cached_boiler.empty:
+        boiler_parts.insert(0, cached_boiler[~cached_boiler["run"].isin(stale)])
+    boiler_df = pd.concat(boiler_parts, ignore_index=True) if boiler_parts else pd.DataFrame(columns=["run"])
+
+    stage_parts = [df for df in stage_rows if not df.empty]
+    if cached_stages is not None and not cached_stages.empty:
+        stage_parts.insert(0, cached_stages[~cached_stages["run"].isin(stale)])
+    stages_df = pd.concat(stage_parts, ignore_index=True) if stage_parts else pd.DataFrame(columns=["run"])
+
+    boiler_df = boiler_df.sort_values("run", kind="mergesort", ignore_index=True)
+    stages_df = stages_df.sort_values("run", kind="mergesort", ignore_index=True)
+
+    _write_atomic(boiler_cache, boiler_df.to_pickle)
+    _write_atomic(stages_cache, stages_df.to_pickle)
+    _write_atomic(
+        cache_dir / "manifest.json",
+        lambda p: p.write_text(json.dumps({"version": MANIFEST_VERSION, "runs": manifest}, indent=1), encoding="utf-8"),
+    )
+
+    if stages_df.empty and stage_rows:
+        print("[INFO] Stage summary dataframes are all empty; nothing to write.")
+
+    return (
+        boiler_df if not boiler_df.empty else None,
+        stages_df if not stages_df.empty else None,
+    )
+
+def collect_from_store(store_root, filter=None, **equals):
+    from common.run_store import RunStore
+
+    store = RunStore(store_root)
+
+    boiler_df = store.query("boiler", filter=filter, **equals).drop(columns=["campaign"])
+    stages_df = store.query("stages", filter=filter, **equals).drop(columns=["campaign"])
 
-    if boiler_rows:
-        boiler_df = pd.DataFrame(boiler_rows)
+    if boiler_df.empty:
+        print(f"[INFO] No runs in store '{store_root}' matching the query.")
+        boiler_df = None
+    if stages_df.empty:
+        stages_df = None
+    return boiler_df, stages_df
 
+def main(store_root=None, filter=None, rebuild=False, **equals):
+    RESULTS_DIR.mkdir(exist_ok=True)
+    SUMMARY_DIR.mkdir(parents=True, exist_ok=True)
+
+    if store_root is not None:
+        boiler_df, stages_df = collect_from_store(store_root, filter=filter, **equals)
+    else:
+        boiler_df, stages_df = collect_from_csv(RESULTS_DIR, rebuild=rebuild)
+
+    if boiler_df is not None:
         cols = list(boiler_df.columns)
         for key in ["run", "param_group", "param_value"]:
             if key in cols:
@@ -125,25 +270,21 @@ def main():
     else:
         print("[INFO] No boiler KPI data collected.")
 
-    if stage_rows:
-        non_empty_stage_rows = [df for df in stage_rows if not df.empty]
-
-        if non_empty_stage_rows:
-            stages_df = pd.concat(non_empty_stage_rows, ignore_index=True)
-
-            stages_df = stages_df.sort_values(
-                by=["param_group", "param_value"],
-                ascending=[True, True],
-                kind="mergesort",
-                na_position="last",
-            )
-            
-            stages_df.to_csv(SUMMARY_DIR / "stages_summary_all_runs.csv", index=False)
-            print(f"[INFO] Wrote stages summary table: {SUMMARY_DIR / 'stages_summary_all_runs.csv'}")
-        else:
-            print("[INFO] Stage summary dataframes are all empty; nothing to write.")
+    if stages_df is not None:
+        stages_df = stages_df.sort_values(
+            by=["param_group", "param_value"],
+            ascending=[True, True],
+            kind="mergesort",
+            na_position="last",
+        )
+
+        stages_df.to_csv(SUMMARY_DIR / "stages_summary_all_runs.csv", index=False)
+        print(f"[INFO] Wrote stages summary table: {SUMMARY_DIR / 'stages_summary_all_runs.csv'}")
     else:
         print("[INFO] No stage summary data collected.")
 
 if __name__ == "__main__":
-    main()
+    import sys
+
+    args = [a for a in sys.argv[1:] if a != "--rebuild"]
+    main(store_root=args[0] if args else None, rebuild="--rebuild" in sys.argv)
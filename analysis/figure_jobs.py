@@ -0,0 +1,238 @@
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+import pandas as pd
+
+MANIFEST_NAME = ".figure_manifest.json"
+
+@dataclass(frozen=True)
+class FigureJob:
+    name: str
+    func: Callable[..., Any]
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    data_hash: str = ""
+    outputs: Sequence[str] = ()
+
+@dataclass(frozen=True)
+class FigureResult:
+    name: str
+    status: str
+    seconds: float = 0.0
+    error: str | None = None
+
+def hash_frame(df: pd.DataFrame) -> str:
+    h = hashlib.sha256()
+    h.update("\x1f".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+def hash_file(path: str | Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def job_hash(job: FigureJob) -> str:
+    h = hashlib.sha256()
+    h.update(f"{job.func.__module__}.{job.func.__qualname__}".encode())
+    try:
+        h.update(Path(inspect.getsourcefile(job.func)).read_bytes())
+    except (TypeError, OSError):
+        pass
+    h.update(job.data_hash.encode())
+    for k in sorted(job.kwargs):
+        v = job.kwargs[k]
+        h.update(k.encode())
+        h.update(hash_frame(v).encode() if isinstance(v, pd.DataFrame) else repr(v).encode())
+    return h.hexdigest()
+
+def _init_worker() -> None:
+    import warnings
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)
+    warnings.filterwarnings("ignore", message=r"FigureCanvasAgg is non-interactive", category=UserWarning)
+
+def _render(job: FigureJob) -> FigureResult:
+    t0 = time.perf_counter()
+    try:
+        job.func(**job.kwargs)
+    except Exception:
+        return FigureResult(job.name, "failed", time.perf_counter() - t0, traceback.format_exc())
+    return FigureResult(job.name, "rendered", time.perf_counter() - t0)
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def render_figures(
+    jobs: Sequence[FigureJob],
+    manifest_path: str | Path,
+    *,
+    max_workers: int | None = None,
+    force: bool = False,
+) -> List[FigureResult]:
+    names = [j.name for j in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("render_figures: figure job names must be unique")
+
+    manifest_path = Path(manifest_path)
+    manifest = _load_manifest(manifest_path)
+
+    hashes = {j.name: job_hash(j) for j in jobs}
+    todo = []
+    results: Dict[str, FigureResult] = {}
+    for j in jobs:
+        prev = manifest.get(j.name, {})
+        fresh = prev.get("hash") == hashes[j.name] and all(Path(o).exists() for o in j.outputs)
+        if fresh and not force:
+            results[j.name] = FigureResult(j.name, "skipped")
+        else:
+            todo.append(j)
+
+    print(f"[INFO] {len(jobs)} figure(s): {len(todo)} to render, {len(jobs) - len(todo)} unchanged")
+
+    def _done(res: FigureResult) -> None:
+        results[res.name] = res
+        if res.status == "rendered":
+            manifest[res.name] = {"hash": hashes[res.name], "render_s": round(res.seconds, 3)}
+            print(f"[INFO] {res.name}: {res.seconds:.2f} s")
+        else:
+            manifest.pop(res.name, None)
+            print(f"[WARN] {res.name} failed: {res.error.strip().splitlines()[-1]}")
+
+    t0 = time.perf_counter()
+    workers = max_workers if max_workers is not None else min(len(todo), os.cpu_count() or 1)
+    if workers <= 1:
+        for j in todo:
+            _done(_render(j))
+    elif todo:
+        os.environ.setdefault("MPLBACKEND", "Agg")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, j) for j in todo]
+            for fut in as_completed(futures):
+                _done(fut.result())
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, manifest_path)
+
+    rendered = [results[n] for n in names if results[n].status == "rendered"]
+    if rendered:
+        total = sum(r.seconds for r in rendered)
+        print(
+            f"[INFO] Rendered {len(rendered)} figure(s) in {time.perf_counter() - t0:.1f} s wall, "
+            f"{total:.1f} s render time"
+        )
+    return [results[n] for n in names]
+
+def per_run_jobs(
+    boiler_csv: str = "results/summary/boiler_kpis_all_runs.csv",
+    stage_csv: str = "results/summary/stages_summary_all_runs.csv",
+    output_dir: str = "results/plots/per_run",
+) -> List[FigureJob]:
+    from analysis import per_run
+
+    out = Path(output_dir)
+    jobs: List[FigureJob] = []
+
+    df = per_run.load_data(boiler_csv)
+    for param_group, df_group in df.groupby("param_group"):
+        df_group_numeric = df_group.dropna(subset=["param_value"])
+        if df_group_numeric["param_value"].nunique(dropna=True) < 2:
+            continue
+        safe_group = str(param_group).replace(" ", "_")
+        jobs.append(FigureJob(
+            name=f"performance_{safe_group}",
+            func=per_run.generate_all_figures,
+            kwargs=dict(csv_path=boiler_csv, output_dir=output_dir, param_groups=(param_group,)),
+            data_hash=hash_frame(df_group),
+            outputs=(str(out / f"performance_{safe_group}.png"),),
+        ))
+
+    boiler_hash = hash_file(boiler_csv)
+    for filename, figsize in (
+        ("kpi_overview_all_param_groups.png", (9, 10)),
+        ("kpi_overview_all_param_groups_16x9.png", per_run.FIGSIZE_16x9),
+    ):
+        jobs.append(FigureJob(
+            name=Path(filename).stem,
+            func=per_run.generate_overall_kpi_figure,
+            kwargs=dict(csv_path=boiler_csv, output_dir=output_dir, figsize=figsize, filename=filename),
+            data_hash=boiler_hash,
+            outputs=(str(out / filename),),
+        ))
+
+    jobs.append(FigureJob(
+        name="scatter_efficiency_vs_stack_temperature_all_runs",
+        func=per_run.generate_eff_stack_scatter,
+        kwargs=dict(csv_path=boiler_csv, output_dir=output_dir),
+        data_hash=boiler_hash,
+        outputs=(str(out / "scatter_efficiency_vs_stack_temperature_all_runs.png"),),
+    ))
+
+    stage_hash = hash_file(stage_csv)
+    for filename, figsize in (
+        ("stages_control_combined_8plots.png", (10, 10)),
+        ("stages_control_combined_8plots_16x9.png", per_run.FIGSIZE_16x9),
+    ):
+        jobs.append(FigureJob(
+            name=Path(filename).stem,
+            func=per_run.generate_stage_combined_control_figure,
+            kwargs=dict(csv_path=stage_csv, output_dir=output_dir, figsize=figsize, filename=filename),
+            data_hash=stage_hash,
+            outputs=(str(out / filename),),
+        ))
+    return jobs
+
+def map_jobs(
+    hx_csv: str | Path | None = None,
+    outdir: str | Path | None = None,
+) -> List[FigureJob]:
+    from analysis import map as hx_map
+
+    hx_csv = Path(hx_csv) if hx_csv is not None else hx_map.HX_CSV
+    outdir = hx_map.ensure_outdir(Path(outdir) if outdir is not None else hx_map.OUTDIR)
+
+    df = hx_map.rename_hx_columns(pd.read_csv(hx_csv))
+    if df.empty or "run" not in df.columns or "stage_index" not in df.columns:
+        return []
+
+    jobs: List[FigureJob] = []
+    for col, (fname, title, cbar) in hx_map.HEATMAPS.items():
+        if col not in df.columns:
+            continue
+        jobs.append(FigureJob(
+            name=Path(fname).stem,
+            func=hx_map._plot_single_heatmap,
+            kwargs=dict(
+                df=df[["run", "stage_index", col]],
+                value_col=col,
+                outdir=outdir,
+                filename=fname,
+                title=title,
+                cbar_label=cbar,
+            ),
+            outputs=(str(outdir / fname),),
+        ))
+    return jobs
+
+def main(max_workers: int | None = None, force: bool = False) -> None:
+    per_run_out = "results/plots/per_run"
+    render_figures(per_run_jobs(output_dir=per_run_out), Path(per_run_out) / MANIFEST_NAME,
+                   max_workers=max_workers, force=force)
+
+    from analysis import map as hx_map
+    render_figures(map_jobs(), hx_map.OUTDIR / MANIFEST_NAME, max_workers=max_workers, force=force)
+
+if __name__ == "__main__":
+    main(force="--force" in sys.argv)
@@ -85,76 +85,77 @@ def _plot_single_heatmap(
     fig.savefig(outdir / filename, dpi=200)
     plt.close(fig)
 
+HEATMAPS = {
+    "Q_total": (
+        "heatmap_Q_total.png",
+        "Heat duty per stage and run [MW]",
+        "Q_total [MW]",
+    ),
+    "T_gas_out": (
+        "heatmap_T_gas_out.png",
+        "Gas outlet temperature per stage and run [°C]",
+        "T_gas_out [°C]",
+    ),
+    "T_gas_in": (
+        "heatmap_T_gas_in.png",
+        "Gas inlet temperature per stage and run [°C]",
+        "T_gas_in [°C]",
+    ),
+    "T_water_in": (
+        "heatmap_T_water_in.png",
+        "Water inlet temperature per stage and run [°C]",
+        "T_water_in [°C]",
+    ),
+    "T_water_out": (
+        "heatmap_T_water_out.png",
+        "Water outlet temperature per stage and run [°C]",
+        "T_water_out [°C]",
+    ),
+    "v_gas": (
+        "heatmap_v_gas.png",
+        "Gas velocity per stage and run [m/s]",
+        "v_gas [m/s]",
+    ),
+    "v_water": (
+        "heatmap_v_water.png",
+        "Water velocity per stage and run [m/s]",
+        "v_water [m/s]",
+    ),
+    "dp_total": (
+        "heatmap_dp_total.png",
+        "Total pressure drop per stage and run [Pa]",
+        "Δp_total [Pa]",
+    ),
+    "Q_conv": (
+        "heatmap_Q_conv.png",
+        "Convective heat duty per stage and run [MW]",
+        "Q_conv [MW]",
+    ),
+    "Q_rad": (
+        "heatmap_Q_rad.png",
+        "Radiative heat duty per stage and run [MW]",
+        "Q_rad [MW]",
+    ),
+    "UA": (
+        "heatmap_UA.png",
+        "UA per stage and run [MW/K]",
+        "UA [MW/K]",
+    ),
+    "steam_capacity": (
+        "heatmap_steam_capacity.png",
+        "Steam capacity per stage and run [t/h]",
+        "Steam capacity [t/h]",
+    ),
+}
+
 def plot_hx_heatmaps(hx: pd.DataFrame, outdir: Path) -> None:
     df = hx.copy()
     outdir = ensure_outdir(outdir)
     if df.empty:
         return
 
-    heatmaps = {
-        "Q_total": (
-            "heatmap_Q_total.png",
-            "Heat duty per stage and run [MW]",
-            "Q_total [MW]",
-        ),
-        "T_gas_out": (
-            "heatmap_T_gas_out.png",
-            "Gas outlet temperature per stage and run [°C]",
-            "T_gas_out [°C]",
-        ),
-        "T_gas_in": (
-            "heatmap_T_gas_in.png",
-            "Gas inlet temperature per stage and run [°C]",
-            "T_gas_in [°C]",
-        ),
-        "T_water_in": (
-            "heatmap_T_water_in.png",
-            "Water inlet temperature per stage and run [°C]",
-            "T_water_in [°C]",
-        ),
-        "T_water_out": (
-            "heatmap_T_water_out.png",
-            "Water outlet temperature per stage and run [°C]",
-            "T_water_out [°C]",
-        ),
-        "v_gas": (
-            "heatmap_v_gas.png",
-            "Gas velocity per stage and run [m/s]",
-            "v_gas [m/s]",
-        ),
-        "v_water": (
-            "heatmap_v_water.png",
-            "Water velocity per stage and run [m/s]",
-            "v_water [m/s]",
-        ),
-        "dp_total": (
-            "heatmap_dp_total.png",
-            "Total pressure drop per stage and run [Pa]",
-            "Δp_total [Pa]",
-        ),
-        "Q_conv": (
-            "heatmap_Q_conv.png",
-            "Convective heat duty per stage and run [MW]",
-            "Q_conv [MW]",
-        ),
-        "Q_rad": (
-            "heatmap_Q_rad.png",
-            "Radiative heat duty per stage and run [MW]",
-            "Q_rad [MW]",
-        ),
-        "UA": (
-            "heatmap_UA.png",
-            "UA per stage and run [MW/K]",
-            "UA [MW/K]",
-        ),
-        "steam_capacity": (
-            "heatmap_steam_capacity.png",
-            "Steam capacity per stage and run [t/h]",
-            "Steam capacity [t/h]",
-        ),
-    }
 
-    for col, (fname, title, cbar) in heatmaps.items():
+    for col, (fname, title, cbar) in HEATMAPS.items():
         _plot_single_heatmap(df, col, outdir, fname, title, cbar)
 
 def main():
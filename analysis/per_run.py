@@ -1,6 +1,6 @@
 from pathlib import Path
 import sys
-from typing import Dict
+from typing import Dict, Sequence
 import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.lines import Line2D
@@ -78,9 +78,13 @@ def load_data(csv_path: str) -> pd.DataFrame:
     df["param_value"] = pd.to_numeric(df["param_value"], errors="coerce")
     return df
 
-def load_steps_data(csv_path: str) -> pd.DataFrame:
-    csv_file = Path(csv_path)
-    df = pd.read_csv(csv_file)
+def load_steps_data(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    steps_file = Path(path)
+    if steps_file.suffix.lower() != ".csv":
+        from common.results import read_steps
+        return read_steps(steps_file, columns=columns)
+
+    df = pd.read_csv(steps_file, usecols=columns)
 
     num_cols = [
         "x[m]",
@@ -423,7 +427,7 @@ def generate_stage_combined_control_figure(
     if df.empty:
         raise ValueError("No rows found for param_group == 'control' in stages summary CSV.")
 
-    if df["stage"].dtype == object:
+    if not pd.api.types.is_numeric_dtype(df["stage"]):
         df["stage_index"] = (
             df["stage"].astype(str).str.extract(r"(\d+)", expand=False).astype(int)
         )
@@ -516,7 +520,11 @@ def generate_stage_combined_control_figure(
     fig.savefig(out_path, dpi=300)
     plt.close(fig)
 
-def generate_all_figures(csv_path: str, output_dir: str = "figures") -> None:
+def generate_all_figures(
+    csv_path: str,
+    output_dir: str = "figures",
+    param_groups: Sequence[str] | None = None,
+) -> None:
 
     df = load_data(csv_path)
     out_dir = Path(output_dir)
@@ -525,6 +533,8 @@ def generate_all_figures(csv_path: str, output_dir: str = "figures") -> None:
     grouped = df.groupby("param_group")
 
     for param_group, df_group in grouped:
+        if param_groups is not None and param_group not in param_groups:
+            continue
         df_group_numeric = df_group.dropna(subset=["param_value"])
         if df_group_numeric["param_value"].nunique(dropna=True) < 2:
             continue
@@ -0,0 +1,128 @@
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.cases import GROUPS, Benchmark, collect
+
+RESULTS_DIR = Path("results/benchmarks")
+BASELINE = RESULTS_DIR / "baseline.json"
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def _meta() -> Dict[str, Any]:
+    from common.run_cache import code_version
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "code_version": code_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def time_benchmark(b: Benchmark, repeat: int | None = None) -> Dict[str, Any]:
+    b.func()
+    samples: List[float] = []
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat or b.repeat):
+            t0 = time.perf_counter()
+            for _ in range(b.number):
+                b.func()
+            samples.append((time.perf_counter() - t0) / b.number)
+    finally:
+        if gc_was:
+            gc.enable()
+    return {
+        "number": b.number,
+        "repeat": len(samples),
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+    }
+
+def run_benchmarks(benchmarks: List[Benchmark], repeat: int | None = None) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for b in benchmarks:
+        r = time_benchmark(b, repeat)
+        results[b.name] = r
+        print(f"[INFO] {b.name:<45} {_fmt_s(r['median_s']):>10} median  ({_fmt_s(r['min_s'])} min, n={r['repeat']}x{r['number']})")
+    return {"meta": _meta(), "results": results}
+
+def _fmt_s(s: float) -> str:
+    if s < 1e-3:
+        return f"{s * 1e6:.1f} us"
+    if s < 1.0:
+        return f"{s * 1e3:.2f} ms"
+    return f"{s:.2f} s"
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    regressions = []
+    base = baseline.get("results", {})
+    print(f"[INFO] Baseline {baseline.get('meta', {}).get('git_commit')} vs current {current['meta'].get('git_commit')}")
+    for name, r in current["results"].items():
+        if name not in base:
+            print(f"[INFO] {name:<45} (new)")
+            continue
+        ratio = r["median_s"] / base[name]["median_s"]
+        tag = "WARN" if ratio > 1.0 + threshold else "INFO"
+        print(f"[{tag}] {name:<45} {_fmt_s(base[name]['median_s']):>10} -> {_fmt_s(r['median_s']):>10}  x{ratio:.2f}")
+        if ratio > 1.0 + threshold:
+            regressions.append(name)
+    return regressions
+
+def _write_json(path: Path, doc: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(doc, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks")
+    ap.add_argument("groups", nargs="*", help=f"benchmark groups to run (default: all but slow): {list(GROUPS)}")
+    ap.add_argument("--slow", action="store_true", help="also run solve_exchanger and run_boiler_case")
+    ap.add_argument("--repeat", type=int, default=None, help="override the per-benchmark repeat count")
+    ap.add_argument("--out", type=Path, default=None, help="JSON output path")
+    ap.add_argument("--compare", type=Path, nargs="?", const=BASELINE, default=None, help="compare against a stored run")
+    ap.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    ap.add_argument("--save-baseline", action="store_true", help=f"also store this run as {BASELINE}")
+    args = ap.parse_args(argv)
+
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    doc = run_benchmarks(collect(args.groups, include_slow=args.slow), args.repeat)
+
+    out = args.out or RESULTS_DIR / f"bench_{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    _write_json(out, doc)
+    print(f"[INFO] Wrote {out}")
+    if args.save_baseline:
+        _write_json(BASELINE, doc)
+        print(f"[INFO] Stored baseline {BASELINE}")
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(doc, baseline, args.threshold)
+        if regressions:
+            print(f"[WARN] {len(regressions)} regression(s) above {args.threshold:.0%}: {regressions}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List
+
+from common.units import Q_
+
+CONFIG = dict(
+    stages_path="config/stages.yaml",
+    air_path="config/air.yaml",
+    fuel_path="config/fuel.yaml",
+    water_path="config/water.yaml",
+    drum_path="config/drum.yaml",
+    operation_path="config/operation.yaml",
+)
+STAGE_STEPS = 10
+STAGE_KINDS = ("single_tube", "reversal_chamber", "tube_bank", "economiser")
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    func: Callable[[], Any]
+    number: int = 1
+    repeat: int = 5
+    slow: bool = False
+
+@dataclass(frozen=True)
+class Fixture:
+    stages: List[Any]
+    air: Any
+    fuel: Any
+    drum: Any
+    operation: Dict[str, Q_]
+    combustion: Any
+    water_in: Any
+    drum_pool: Any
+    stage_gas_in: List[Any]
+
+@lru_cache(maxsize=1)
+def fixture() -> Fixture:
+    from combustion.combustor import Combustor
+    from common.models import WaterStream
+    from common.new_loader import load_all
+    from common.props import WaterProps
+    from heat.geometry import GeometryBuilder
+    from heat.solver import solve_stage
+
+    stages, air, fuel, water, drum, operation = load_all(**CONFIG)
+    P = operation["drum_pressure"]
+    comb = Combustor(air, fuel, operation["excess_air_ratio"]).run()
+
+    hf = WaterProps.h_f(P).to("J/kg")
+    hg = WaterProps.h_g(P).to("J/kg")
+    m_fw = ((Q_(0.94, "") * comb.Q_in.to("W")) / ((hg - hf) + (hf - water.h))).to("kg/s")
+    water_in = WaterStream(mass_flow=m_fw, h=water.h, P=P)
+    drum_pool = WaterStream(mass_flow=m_fw, h=hf, P=P)
+
+    enriched = GeometryBuilder(drum).enrich(stages)
+    gas_in = []
+    g = comb.flue
+    for k, st in enumerate(enriched):
+        gas_in.append(g)
+        w = drum_pool if st.kind != "economiser" else water_in
+        g, _, _ = solve_stage(g, w, st, STAGE_STEPS, stage_index=k)
+
+    return Fixture(
+        stages=enriched, air=air, fuel=fuel, drum=drum, operation=operation,
+        combustion=comb, water_in=water_in, drum_pool=drum_pool, stage_gas_in=gas_in,
+    )
+
+def _stage_of_kind(kind: str) -> int:
+    fx = fixture()
+    for k, st in enumerate(fx.stages):
+        if st.kind == kind:
+            return k
+    raise KeyError(f"no stage of kind {kind!r} in {CONFIG['stages_path']}")
+
+def _water_for(k: int):
+    fx = fixture()
+    return fx.water_in if fx.stages[k].kind == "economiser" else fx.drum_pool
+
+def _gas_props_cases() -> List[Benchmark]:
+    from common.props import GasProps
+
+    import numpy as np
+
+    gp = GasProps()
+    g = fixture().combustion.flue
+    T_many = np.linspace(450.0, g.T.to("K").magnitude, 100)
+    P_many = g.P.to("Pa").magnitude
+    return [
+        Benchmark("GasProps.h", lambda: gp.h(g.T, g.P, g.comp), number=200),
+        Benchmark("GasProps.cp", lambda: gp.cp(g.T, g.P, g.comp), number=200),
+        Benchmark("GasProps.mu", lambda: gp.mu(g.T, g.P, g.comp), number=200),
+        Benchmark("GasProps.rho", lambda: gp.rho(g.T, g.P, g.comp), number=200),
+        Benchmark("GasProps.state", lambda: gp.state(g.T, g.P, g.comp), number=200),
+        Benchmark("GasProps.evaluate_many[n=100]", lambda: gp.evaluate_many(T_many, P_many, g.comp), number=20),
+    ]
+
+def _with_backend(name: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+    from common.props import WaterProps
+
+    def _run():
+        prev = WaterProps.backend
+        WaterProps.set_backend(name)
+        try:
+            return fn()
+        finally:
+            WaterProps.set_backend(prev)
+    return _run
+
+def _water_props_cases() -> List[Benchmark]:
+    from common.props import WaterProps
+
+    import numpy as np
+
+    fx = fixture()
+    w = fx.water_in
+    P = w.P
+    h_mix = (WaterProps.h_f(P) + WaterProps.h_g(P)) / 2
+    P_many = np.full(100, P.to("Pa").magnitude)
+    h_many = np.linspace(w.h.to("J/kg").magnitude, WaterProps.h_g(P).to("J/kg").magnitude * 1.05, 100)
+    out = []
+    for b in ("iapws", "if97"):
+        tag, sfx = ("", "") if b == "iapws" else (",if97", "[if97]")
+        out += [
+            Benchmark(f"WaterProps.T_from_Ph{sfx}", _with_backend(b, lambda: WaterProps.T_from_Ph(P, w.h)), number=50),
+            Benchmark(f"WaterProps.cp_from_Ph{sfx}", _with_backend(b, lambda: WaterProps.cp_from_Ph(P, w.h)), number=50),
+            Benchmark(f"WaterProps.Tsat{sfx}", _with_backend(b, lambda: WaterProps.Tsat(P)), number=50),
+            Benchmark(f"WaterProps.quality_from_Ph{sfx}", _with_backend(b, lambda: WaterProps.quality_from_Ph(P, h_mix)), number=50),
+            Benchmark(f"WaterProps.state_Ph[liquid{tag}]", _with_backend(b, lambda: WaterProps.state_Ph(P, w.h)), number=50),
+            Benchmark(f"WaterProps.state_Ph[two-phase{tag}]", _with_backend(b, lambda: WaterProps.state_Ph(P, h_mix)), number=50),
+            Benchmark(f"WaterProps.state_Ph_many[n=100{tag}]", _with_backend(b, lambda: WaterProps.state_Ph_many(P_many, h_many)), number=2 if b == "iapws" else 20),
+        ]
+    return out
+
+def _solver_cases() -> List[Benchmark]:
+    from heat.solver import initial_wall_guesses, solve_stage
+    from heat.step_solver import solve_step
+
+    fx = fixture()
+    out = []
+    for kind in STAGE_KINDS:
+        k = _stage_of_kind(kind)
+        st, g, w = fx.stages[k], fx.stage_gas_in[k], _water_for(k)
+        L = st.spec["hot_flow_length"] if kind == "economiser" else st.spec["inner_length"]
+        dx = (L / STAGE_STEPS).to("m")
+        guesses = initial_wall_guesses(g, w, st)
+
+        def _step(st=st, g=g, w=w, dx=dx, guesses=guesses):
+            return solve_step(g, w, st, *guesses, i=0, x=Q_(0.0, "m"), dx=dx)
+
+        def _stage(st=st, g=g, w=w, k=k):
+            return solve_stage(g, w, st, STAGE_STEPS, stage_index=k)
+
+        out.append(Benchmark(f"solve_step[{kind}]", _step, number=3))
+        out.append(Benchmark(f"solve_stage[{kind},n={STAGE_STEPS}]", _stage, repeat=3))
+    return out
+
+def _combustion_cases() -> List[Benchmark]:
+    from combustion.combustor import Combustor
+
+    fx = fixture()
+    return [
+        Benchmark("Combustor.run", lambda: Combustor(fx.air, fx.fuel, fx.operation["excess_air_ratio"]).run(), number=5),
+    ]
+
+def _friction_cases() -> List[Benchmark]:
+    import numpy as np
+    from heat.friction import friction_factor, friction_factor_array
+
+    Re = np.linspace(5e3, 5e4, 100)
+    return [
+        Benchmark("friction_factor[colebrook]", lambda: friction_factor(2.0e4, 1e-4, "colebrook"), number=2000),
+        Benchmark("friction_factor[serghides]", lambda: friction_factor(2.0e4, 1e-4), number=2000),
+        Benchmark("friction_factor_array[serghides,n=100]", lambda: friction_factor_array(Re, 1e-4), number=200),
+    ]
+
+def _slow_cases() -> List[Benchmark]:
+    from common.boiler_loop import run_boiler_case
+    from heat.solver import solve_exchanger
+
+    fx = fixture()
+
+    def _exchanger(econ_solver="shooting"):
+        return solve_exchanger(
+            fx.stages, fx.combustion.flue, fx.water_in,
+            drum_pool=fx.drum_pool, target_dx=Q_(0.1, "m"), log_level="WARNING", econ_solver=econ_solver,
+        )
+
+    def _case():
+        return run_boiler_case(**CONFIG, write_csv=False)
+
+    return [
+        Benchmark("solve_exchanger[dx=0.1m]", _exchanger, repeat=1, slow=True),
+        Benchmark("solve_exchanger[dx=0.1m,newton]", lambda: _exchanger("newton"), repeat=1, slow=True),
+        Benchmark("run_boiler_case[default]", _case, repeat=1, slow=True),
+    ]
+
+GROUPS: Dict[str, Callable[[], List[Benchmark]]] = {
+    "gas_props": _gas_props_cases,
+    "water_props": _water_props_cases,
+    "combustion": _combustion_cases,
+    "friction": _friction_cases,
+    "solver": _solver_cases,
+    "slow": _slow_cases,
+}
+
+def collect(groups: List[str] | None = None, *, include_slow: bool = False) -> List[Benchmark]:
+    names = groups if groups else [g for g in GROUPS if include_slow or g != "slow"]
+    unknown = [g for g in names if g not in GROUPS]
+    if unknown:
+        raise KeyError(f"unknown benchmark group(s) {unknown}; expected {list(GROUPS)}")
+    return [b for g in names for b in GROUPS[g]()]
@@ -1,6 +1,5 @@
 from common.units import ureg, Q_
 from common.models import GasStream
-from scipy.optimize import root_scalar
 from common.props import GasProps
 import cantera as ct
 from combustion.mass_mole import to_mole, molar_flow
@@ -76,26 +75,10 @@ def adiabatic_flame_T_no_dissociation(air: GasStream, fuel: GasStream) -> GasStr
     mass_comp_burnt, m_dot_flue = from_fuel_and_air(fuel, air)
     comp_prod = {sp: Q_(float(y), "") for sp, y in mass_comp_burnt.items() if float(y) > 1e-15}
 
-    def f(T_K: float) -> float:
-        hP = gasprops.h(Q_(T_K, "K"), air.P, comp_prod).to("J/kg").magnitude
-        return hP - h_target
-
-    T_lo, T_hi = 250.0, 3500.0
-    f_lo, f_hi = f(T_lo), f(T_hi)
-    if f_lo * f_hi > 0.0:
-        T_hi = 4500.0
-        f_hi = f(T_hi)
-        if f_lo * f_hi > 0.0:
-            raise RuntimeError(
-                "adiabatic_flame_T_no_dissociation: could not bracket root for Tad "
-                f"(f({T_lo})={f_lo:.3e}, f({T_hi})={f_hi:.3e})"
-            )
-
-    sol = root_scalar(f, bracket=(T_lo, T_hi), method="brentq", xtol=1e-6, rtol=1e-8)
-    if not sol.converged:
-        raise RuntimeError("adiabatic_flame_T_no_dissociation: root solve did not converge")
-
-    Tad = float(sol.root)
+    try:
+        Tad = gasprops.T_from_h(Q_(h_target, "J/kg"), air.P, comp_prod).to("K").magnitude
+    except ct.CanteraError as e:
+        raise RuntimeError(f"adiabatic_flame_T_no_dissociation: enthalpy inversion failed for h={h_target:.6g} J/kg") from e
 
     return GasStream(
         mass_flow=m_dot_flue.to("kg/s"),
@@ -1,13 +1,24 @@
 from __future__ import annotations
+import contextlib
+import functools
 import logging
+import time
+from pathlib import Path
 from typing import Dict, Any, Tuple
 from common.new_loader import load_all
 from combustion.combustor import Combustor
 from heat.runner import run_hx
+from heat.postproc import DUTIES_ONLY, trace_arrays
 from common.units import Q_
 from common.props import WaterProps
 from common.models import WaterStream
-from common.results import CombustionResult, write_results_csvs
+from common.results import CombustionResult, WarmStart, results_frames, write_results_csvs
+from common.run_cache import RunCache, case_key
+from common.run_store import RunStore
+from common.step_sink import StageTraceSink, read_stage_trace
+from common.stage_cache import StageCache
+from common.stage_specs import validate_raw_spec
+from common import convergence, profiling
 
 log = logging.getLogger(__name__)
 
@@ -30,6 +41,73 @@ def _drum_steam_rate(
     m_s = (Q_evap.to("W") + m_fw * (h_fw_out - hf)) / denom
     return m_s.to("kg/s")
 
+def _write_outputs(
+    out: Dict[str, Any],
+    *,
+    write_csv: bool,
+    run_id: str | None,
+    store: RunStore | None = None,
+    param_group: str = "control",
+    param_value: float | None = None,
+    steps_format: str = "csv",
+) -> Tuple[str, str, str] | None:
+    if not write_csv and store is None:
+        return None
+    result = out["result"]
+    run_id = run_id if run_id is not None else result["run_id"]
+    arrays = None
+    if result.get("trace_dir") is not None:
+        arrays = trace_arrays(read_stage_trace(result["trace_dir"]), result["stage_results"])
+    frames = results_frames(
+        result["global_profile"],
+        result["combustion"],
+        drum_pressure=out["drum_pressure"],
+        feed_pressure=out["feed_pressure"],
+        arrays=arrays,
+    )
+
+    if store is not None:
+        store.write_run(run_id, *frames, param_group=param_group, param_value=param_value)
+
+    if not write_csv:
+        return None
+    return write_results_csvs(
+        global_profile=result["global_profile"],
+        combustion=result["combustion"],
+        outdir=result["outdir"],
+        run_id=run_id,
+        frames=frames,
+        steps_format=steps_format,
+    )
+
+def _instrumented(fn):
+    @functools.wraps(fn)
+    def _run(*args, profile: bool = False, write_convergence: bool = False, **kwargs) -> Dict[str, Any]:
+        with contextlib.ExitStack() as stack:
+            if profile:
+                stack.enter_context(profiling.session())
+            conv = stack.enter_context(convergence.recording())
+            out = fn(*args, **kwargs)
+            timing = profiling.snapshot() if profile else None
+
+        result = out["result"]
+        outdir = Path(result["outdir"])
+        name = kwargs.get("run_id") or result["run_id"]
+
+        out["convergence"] = conv.to_dict()
+        if out.get("stage_cache") is not None:
+            out["convergence"]["stage_cache"] = out["stage_cache"]
+        if write_convergence:
+            out["convergence_path"] = convergence.write_json(outdir / f"{name}_convergence.json", out["convergence"])
+            log.info(f"Convergence report: {out['convergence_path']}")
+        if profile:
+            out["timing"] = timing
+            out["timing_path"] = profiling.write_report(outdir / f"{name}_timing.json", timing)
+            log.info(f"Timing report: {out['timing_path']}")
+        return out
+    return _run
+
+@_instrumented
 def run_boiler_case(
     stages_path: str = "config/stages.yaml",
     air_path: str = "config/air.yaml",
@@ -40,11 +118,23 @@ def run_boiler_case(
     *,
     tol_m: Q_ = Q_(1e-3, "kg/s"),
     max_iter: int = 20,
+    econ_solver: str = "shooting",
     write_csv: bool = True,
     operation_overrides: Dict[str, Q_] | None = None,
     fuel_overrides: Dict[str, Q_] | None = None,
     fouling_factor: float = 1.0,
+    stage_overrides: Dict[str, Dict[str, Q_]] | None = None,
     run_id: str | None = None,
+    outdir: str = "results/runs",
+    warm_start: WarmStart | None = None,
+    cache: RunCache | None = None,
+    store: RunStore | None = None,
+    param_group: str = "control",
+    param_value: float | None = None,
+    steps_format: str = "csv",
+    sink: StageTraceSink | None = None,
+    trace_dir: str | Path | None = None,
+    stage_cache: StageCache | None = None,
 ) -> Dict[str, Any]:
     log.info(f"Load config")
     stages, air, fuel, water, drum, operation = load_all(
@@ -68,6 +158,15 @@ def run_boiler_case(
             if "foul_t_out" in spec:
                 spec["foul_t_out"] = (spec["foul_t_out"] * Q_(f, "")).to(spec["foul_t_out"].units)
 
+    if stage_overrides:
+        by_name = {st.name: st for st in stages}
+        for stage_name, overrides in stage_overrides.items():
+            if stage_name not in by_name:
+                raise KeyError(f"stage_overrides: unknown stage '{stage_name}'")
+            st = by_name[stage_name]
+            st.spec.update(overrides)
+            validate_raw_spec(st.name, st.kind, st.spec)
+
     if operation_overrides:
         operation.update(operation_overrides)
 
@@ -78,11 +177,52 @@ def run_boiler_case(
             else:
                 log.warning(f"GasStream (fuel) has no attribute '{attr}', ignoring override.")
 
+    if sink is None and trace_dir is not None:
+        sink = StageTraceSink(trace_dir)
+
+    key = None
+    if cache is not None:
+        key = case_key({
+            "stages": stages, "air": air, "fuel": fuel, "water": water, "drum": drum,
+            "operation": operation,
+            "operation_overrides": operation_overrides,
+            "fuel_overrides": fuel_overrides,
+            "stage_overrides": stage_overrides,
+            "fouling_factor": f,
+            "tol_m": tol_m, "max_iter": max_iter,
+            "econ_solver": econ_solver,
+        })
+        cached = cache.get(key)
+        if cached is not None:
+            log.info(f"Run cache hit {key[:12]}")
+            if sink is not None:
+                for i, sr in enumerate(cached["result"]["stage_results"]):
+                    sink.write_stage(sr, i)
+            out = dict(cached, cached=True)
+            out["result"] = {
+                **cached["result"],
+                "outdir": str(outdir),
+                "run_id": run_id if run_id is not None else cached["result"]["run_id"],
+            }
+            out["csv_paths"] = _write_outputs(
+                out,
+                write_csv=write_csv,
+                run_id=run_id,
+                store=store,
+                param_group=param_group,
+                param_value=param_value,
+                steps_format=steps_format,
+            )
+            return out
+        log.info(f"Run cache miss {key[:12]}")
+
     P_drum: Q_ | None = operation.get("drum_pressure", None)
     blowdown_fraction = operation.get("blowdown_fraction", Q_(0.0, ""))
     steam_quality_out = float(operation.get("steam_quality_out", Q_(1.0, "")).to("").magnitude)
 
     water_template: WaterStream = water
+    if stage_cache is None:
+        stage_cache = StageCache()
 
     if P_drum is not None:
         water_template.P = P_drum
@@ -99,7 +239,12 @@ def run_boiler_case(
     hg = WaterProps.h_g(P_drum).to("J/kg")
     h_feed = water_template.h.to("J/kg")
     latent = (hg - hf).to("J/kg")
-    m_fw = ((Q_(0.94, "") * combustion_results.Q_in.to("W")) / (latent + (hf - h_feed))).to("kg/s")
+    if warm_start is not None:
+        m_fw = warm_start.m_fw.to("kg/s")
+        seed_results = list(warm_start.stage_results) if warm_start.stage_results else None
+    else:
+        m_fw = ((Q_(0.94, "") * combustion_results.Q_in.to("W")) / (latent + (hf - h_feed))).to("kg/s")
+        seed_results = None
 
     prev_m = None
     final_result = None
@@ -107,8 +252,14 @@ def run_boiler_case(
     final_m_s = None
 
     tol_m_fw = tol_m.to("kg/s").magnitude
+    n_mass_iter = 0
+    n_p_iter = 0
+    mass_resid: list[float] = []
+    mass_reason = "max_iter"
+    t_loop = time.perf_counter()
 
     for it in range(max_iter):
+        n_mass_iter = it + 1
         m_bd = (blowdown_fraction.to("").magnitude * m_fw).to("kg/s")
 
         water_in = WaterStream(mass_flow=m_fw, h=water_template.h, P=water_template.P)
@@ -120,17 +271,22 @@ def run_boiler_case(
             drum=drum,
             drum_pressure=P_drum,
             target_dx="0.1 m",
+            econ_solver=econ_solver,
             combustion=combustion_results,
             write_csv=False,
+            seed_results=seed_results,
+            outputs=DUTIES_ONLY,
+            sink=sink,
+            stage_cache=stage_cache,
         )
 
         h_fw_out = final_result["water_out"].h.to("J/kg")
 
         evap_names = {f"HX_{i}" for i in range(1, 6)}
         Q_evap_W = 0.0
-        for r in final_result["summary_rows"]:
-            if r.get("stage_name") in evap_names and isinstance(r.get("Q_stage[MW]"), (int, float)):
-                Q_evap_W += Q_(r["Q_stage[MW]"], "MW").to("W").magnitude
+        for name, Q_stage in final_result["stage_duties"].items():
+            if name in evap_names:
+                Q_evap_W += Q_stage.to("W").magnitude
         Q_evap = Q_(Q_evap_W, "W")
 
         m_s = _drum_steam_rate(
@@ -142,6 +298,7 @@ def run_boiler_case(
         )
 
         resid = (m_s + m_bd - m_fw).to("kg/s").magnitude
+        mass_resid.append(abs(resid))
 
         final_m_fw = m_fw
         final_m_s = m_s
@@ -149,7 +306,11 @@ def run_boiler_case(
         if prev_m is not None:
             dm = (m_fw - prev_m).to("kg/s").magnitude
             if abs(dm) < tol_m_fw and abs(resid) < tol_m_fw:
+                mass_reason = "converged"
                 break
+        elif warm_start is not None and abs(resid) < tol_m_fw:
+            mass_reason = "converged"
+            break
 
         m_fw_new = (m_s + m_bd).to("kg/s")
         m_fw = (Q_(0.5, "") * m_fw_new + Q_(0.5, "") * m_fw).to("kg/s")
@@ -158,21 +319,28 @@ def run_boiler_case(
 
     else:
         log.warning("Did not reach drum mass-balance convergence within max_iter.")
+    convergence.record("mass_balance", n_mass_iter, mass_reason, residuals=mass_resid, wall_s=time.perf_counter() - t_loop)
 
     feed_P: Q_ | None = None
 
     if P_drum is not None and final_m_fw is not None:
         P_drum_Pa = P_drum.to("Pa")
 
-        P_in = (P_drum_Pa * Q_(1.01, "")).to("Pa")
+        if warm_start is not None and warm_start.feed_dP is not None:
+            P_in = max((P_drum_Pa + warm_start.feed_dP).to("Pa"), P_drum_Pa)
+        else:
+            P_in = (P_drum_Pa * Q_(1.01, "")).to("Pa")
 
         max_p_iter = 30
         tol_P = Q_(1.0, "Pa")
 
         feed_P = None
         last_result: Dict[str, Any] | None = None
+        p_resid: list[float] = []
+        t_loop = time.perf_counter()
 
         for _ in range(max_p_iter):
+            n_p_iter += 1
             water_trial = WaterStream(
                 mass_flow=final_m_fw,
                 h=water_template.h,
@@ -186,13 +354,19 @@ def run_boiler_case(
                 drum=drum,
                 drum_pressure=P_drum,
                 target_dx="0.1 m",
+                econ_solver=econ_solver,
                 combustion=combustion_results,
                 write_csv=False,
+                seed_results=seed_results,
+                outputs=DUTIES_ONLY,
+                sink=sink,
+                stage_cache=stage_cache,
             )
 
             P_out = last_result["water_out"].P.to("Pa")
 
             err = (P_drum_Pa - P_out).to("Pa")
+            p_resid.append(abs(err.magnitude))
 
             if abs(err).to("Pa").magnitude < tol_P.to("Pa").magnitude:
                 feed_P = P_in
@@ -203,6 +377,10 @@ def run_boiler_case(
             if P_in < P_drum_Pa:
                 P_in = P_drum_Pa
 
+        convergence.record(
+            "feed_pressure", n_p_iter, "converged" if feed_P is not None else "max_iter",
+            residuals=p_resid, wall_s=time.perf_counter() - t_loop,
+        )
         if feed_P is None:
             feed_P = P_in
 
@@ -226,37 +404,52 @@ def run_boiler_case(
         drum=drum,
         drum_pressure=P_drum,
         target_dx="0.1 m",
+        econ_solver=econ_solver,
         combustion=combustion_results,
         write_csv=write_csv,
+        outdir=outdir,
+        seed_results=seed_results,
+        sink=sink,
+        stage_cache=stage_cache,
     )
 
-    csv_paths: Tuple[str, str, str] | None = None
-    if write_csv:
-        effective_run_id = run_id if run_id is not None else final_result["run_id"]
-
-        steps_csv, stages_summary_csv, boiler_summary_csv = write_results_csvs(
-            global_profile=final_result["global_profile"],
-            combustion=final_result["combustion"],
-            outdir=final_result["outdir"],
-            run_id=effective_run_id,
-            drum_pressure=P_drum,
-            feed_pressure=feed_P,
-        )
-        csv_paths = (steps_csv, stages_summary_csv, boiler_summary_csv)
-
     m_bd_final = None
     if final_m_fw is not None:
         m_bd_final = (blowdown_fraction.to("").magnitude * final_m_fw).to("kg/s")
     else:
         m_bd_final = Q_(0.0, "kg/s")
 
-    return {
+    out = {
         "result": final_result,
         "m_fw": final_m_fw,
         "m_s": final_m_s,
         "m_bd": m_bd_final,
         "drum_pressure": P_drum,
         "combustion": combustion_results,
-        "csv_paths": csv_paths,
+        "csv_paths": None,
+        "cached": False,
+        "feed_pressure": feed_P,
+        "iterations": {"mass_balance": n_mass_iter, "feed_pressure": n_p_iter},
+        "stage_cache": stage_cache.stats(),
+        "warm_start": WarmStart(
+            m_fw=final_m_fw,
+            feed_dP=(feed_P - P_drum).to("Pa"),
+            stage_results=final_result["stage_results"],
+        ),
     }
-
+    log.info(
+        f"Stage cache: {stage_cache.hits} hit(s), {stage_cache.misses} miss(es) "
+        f"({stage_cache.stats()['hit_rate']:.0%} hit rate)"
+    )
+    if cache is not None and sink is None:
+        cache.put(key, out)
+    out["csv_paths"] = _write_outputs(
+        out,
+        write_csv=write_csv,
+        run_id=run_id,
+        store=store,
+        param_group=param_group,
+        param_value=param_value,
+        steps_format=steps_format,
+    )
+    return out
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import logging
+import time
+import traceback
+from collections import deque
+from typing import Callable, List, Sequence, Tuple
+
+from common.boiler_loop import run_boiler_case
+from common.results import WarmStart
+from common.sweep import SweepCase, SweepOutcome
+
+log = logging.getLogger(__name__)
+
+def predict_warm_start(
+    history: Sequence[Tuple[float, WarmStart]],
+    value: float,
+    *,
+    extrapolate: bool = True,
+) -> WarmStart | None:
+    if not history:
+        return None
+
+    v1, ws1 = history[-1]
+    if not extrapolate or len(history) < 2:
+        return ws1
+
+    v0, ws0 = history[-2]
+    if v1 == v0:
+        return ws1
+    s = (value - v1) / (v1 - v0)
+
+    m_fw = (ws1.m_fw + (ws1.m_fw - ws0.m_fw) * s).to("kg/s")
+    if m_fw.magnitude <= 0:
+        m_fw = ws1.m_fw
+
+    feed_dP = ws1.feed_dP
+    if ws1.feed_dP is not None and ws0.feed_dP is not None:
+        feed_dP = (ws1.feed_dP + (ws1.feed_dP - ws0.feed_dP) * s).to("Pa")
+        if feed_dP.magnitude < 0:
+            feed_dP = ws1.feed_dP
+
+    return WarmStart(m_fw=m_fw, feed_dP=feed_dP, stage_results=ws1.stage_results)
+
+def run_continuation(
+    axis_values: Sequence[float],
+    make_case: Callable[[float], SweepCase],
+    *,
+    descending: bool = False,
+    extrapolate: bool = True,
+) -> List[SweepOutcome]:
+    values = sorted(axis_values, reverse=descending)
+    total = len(values)
+    history: deque[Tuple[float, WarmStart]] = deque(maxlen=2)
+    outcomes: List[SweepOutcome] = []
+    t_start = time.perf_counter()
+
+    for n, v in enumerate(values, start=1):
+        case = make_case(v)
+        ws = predict_warm_start(history, v, extrapolate=extrapolate)
+
+        t0 = time.perf_counter()
+        try:
+            out = run_boiler_case(run_id=case.run_id, warm_start=ws, **case.kwargs)
+        except Exception as e:
+            res = SweepOutcome(
+                run_id=case.run_id,
+                ok=False,
+                elapsed_s=time.perf_counter() - t0,
+                error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}",
+            )
+            history.clear()
+            log.error(f"[{n}/{total}] {case.run_id} FAILED, restarting continuation cold: {e}")
+        else:
+            res = SweepOutcome(
+                run_id=case.run_id,
+                ok=True,
+                elapsed_s=time.perf_counter() - t0,
+                csv_paths=out.get("csv_paths"),
+                m_fw_kg_s=out["m_fw"].to("kg/s").magnitude,
+                m_s_kg_s=out["m_s"].to("kg/s").magnitude,
+                iterations=out.get("iterations"),
+            )
+            history.append((v, out["warm_start"]))
+            log.info(
+                f"[{n}/{total}] {case.run_id} ok in {res.elapsed_s:.1f} s "
+                f"({'warm' if ws is not None else 'cold'} start, iterations {res.iterations})"
+            )
+        outcomes.append(res)
+
+    log.info(f"Continuation done: {sum(r.ok for r in outcomes)}/{total} ok, {time.perf_counter() - t_start:.0f} s wall")
+    return outcomes
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import json
+import math
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+LEVELS = (
+    "feed_pressure",
+    "mass_balance",
+    "solve_exchanger",
+    "solve_stage",
+    "solve_step",
+)
+
+@dataclass
+class LevelStats:
+    calls: int = 0
+    iterations: int = 0
+    max_iterations: int = 0
+    wall_s: float = 0.0
+    reasons: Dict[str, int] = field(default_factory=dict)
+    final_residual_max: float = 0.0
+    runs: List[Dict[str, Any]] = field(default_factory=list)
+
+class ConvergenceLog:
+    def __init__(self, max_runs: int = 200):
+        self.max_runs = int(max_runs)
+        self.levels: Dict[str, LevelStats] = {}
+
+    def add(
+        self,
+        level: str,
+        iterations: int,
+        reason: str,
+        *,
+        residuals: Sequence[float] | None = None,
+        residual: float | None = None,
+        wall_s: float = 0.0,
+    ) -> None:
+        st = self.levels.get(level)
+        if st is None:
+            st = self.levels[level] = LevelStats()
+        st.calls += 1
+        st.iterations += iterations
+        st.max_iterations = max(st.max_iterations, iterations)
+        st.wall_s += wall_s
+        st.reasons[reason] = st.reasons.get(reason, 0) + 1
+        final = residual if residual is not None else (residuals[-1] if residuals else None)
+        if final is not None and math.isfinite(final):
+            st.final_residual_max = max(st.final_residual_max, abs(final))
+        if residuals is not None and len(st.runs) < self.max_runs:
+            st.runs.append({
+                "iterations": iterations,
+                "reason": reason,
+                "wall_s": wall_s,
+                "residuals": [float(r) for r in residuals],
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        order = [k for k in LEVELS if k in self.levels] + [k for k in self.levels if k not in LEVELS]
+        out = {}
+        for k in order:
+            st = self.levels[k]
+            d = {
+                "calls": st.calls,
+                "iterations": st.iterations,
+                "mean_iterations": st.iterations / st.calls if st.calls else 0.0,
+                "max_iterations": st.max_iterations,
+                "wall_s": st.wall_s,
+                "reasons": dict(st.reasons),
+                "final_residual_max": st.final_residual_max,
+            }
+            if st.runs:
+                d["runs"] = st.runs
+            out[k] = d
+        return {"levels": out}
+
+_active: ConvergenceLog | None = None
+
+def active() -> ConvergenceLog | None:
+    return _active
+
+def record(
+    level: str,
+    iterations: int,
+    reason: str,
+    *,
+    residuals: Sequence[float] | None = None,
+    residual: float | None = None,
+    wall_s: float = 0.0,
+) -> None:
+    if _active is not None:
+        _active.add(level, iterations, reason, residuals=residuals, residual=residual, wall_s=wall_s)
+
+@contextmanager
+def recording(log: ConvergenceLog | None = None) -> Iterator[ConvergenceLog]:
+    global _active
+    prev = _active
+    _active = log if log is not None else ConvergenceLog()
+    try:
+        yield _active
+    finally:
+        _active = prev
+
+def write_json(path: str | Path, doc: Dict[str, Any]) -> str:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(doc, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    return str(path)
@@ -0,0 +1,253 @@
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from common.units import Q_
+from common.sweep import SweepCase, SweepOutcome, run_sweep
+from common.run_cache import RunCache
+from common.run_store import RunStore
+
+log = logging.getLogger(__name__)
+
+DESIGNS = ("full_factorial", "latin_hypercube", "sobol")
+
+@dataclass(frozen=True)
+class Factor:
+    target: str
+    unit: str = "dimensionless"
+    low: float | None = None
+    high: float | None = None
+    levels: List[float] | None = None
+    integer: bool = False
+
+@dataclass(frozen=True)
+class DOESpec:
+    name: str
+    design: str
+    factors: List[Factor]
+    samples: int | None = None
+    seed: int | None = None
+    run_kwargs: Dict[str, Any] = field(default_factory=dict)
+    spec_hash: str = ""
+
+def _check_target(target: str) -> None:
+    parts = target.split(".")
+    ok = (
+        (parts[0] in ("operation", "fuel") and len(parts) == 2)
+        or (parts[0] == "stages" and len(parts) == 3)
+        or (target == "fouling_factor")
+    )
+    if not ok:
+        raise ValueError(
+            f"DOE factor '{target}': expected 'operation.<key>', 'fuel.<attr>', "
+            f"'stages.<stage>.<key>' or 'fouling_factor'"
+        )
+
+def _parse_factor(target: str, node: Dict[str, Any], design: str) -> Factor:
+    _check_target(target)
+    unit = str(node.get("unit", "dimensionless"))
+    low = node.get("low")
+    high = node.get("high")
+    levels = node.get("levels")
+    integer = bool(node.get("integer", False))
+
+    if isinstance(levels, list):
+        levels = [float(v) for v in levels]
+        if not levels:
+            raise ValueError(f"DOE factor '{target}': empty levels")
+        if low is None:
+            low = min(levels)
+        if high is None:
+            high = max(levels)
+    elif isinstance(levels, int):
+        if low is None or high is None:
+            raise ValueError(f"DOE factor '{target}': integer levels require low and high")
+        levels = [float(v) for v in np.linspace(float(low), float(high), levels)]
+    elif levels is not None:
+        raise ValueError(f"DOE factor '{target}': levels must be a list or an integer count")
+
+    if design == "full_factorial" and levels is None:
+        raise ValueError(f"DOE factor '{target}': full_factorial requires levels")
+    if design != "full_factorial" and (low is None or high is None):
+        raise ValueError(f"DOE factor '{target}': {design} requires low and high")
+    if low is not None and high is not None and float(high) < float(low):
+        raise ValueError(f"DOE factor '{target}': high < low")
+
+    return Factor(
+        target=target,
+        unit=unit,
+        low=float(low) if low is not None else None,
+        high=float(high) if high is not None else None,
+        levels=levels,
+        integer=integer,
+    )
+
+def load_doe(path: str) -> DOESpec:
+    raw = open(path, "rb").read()
+    doc = yaml.safe_load(raw)
+
+    design = str(doc.get("design", "full_factorial")).lower()
+    if design not in DESIGNS:
+        raise ValueError(f"DOE design must be one of {DESIGNS}. Got {design!r}")
+
+    factors_node = doc.get("factors") or {}
+    if not factors_node:
+        raise ValueError("DOE spec defines no factors")
+    factors = [_parse_factor(t, n or {}, design) for t, n in factors_node.items()]
+
+    samples = doc.get("samples")
+    if design != "full_factorial" and not samples:
+        raise ValueError(f"DOE design {design} requires 'samples'")
+    seed = doc.get("seed")
+    if design != "full_factorial" and seed is None:
+        raise ValueError(f"DOE design {design} requires 'seed' so the design points are reproducible")
+
+    return DOESpec(
+        name=str(doc.get("name") or Path(path).stem),
+        design=design,
+        factors=factors,
+        samples=int(samples) if samples else None,
+        seed=int(seed) if seed is not None else None,
+        run_kwargs=dict(doc.get("run_kwargs") or {}),
+        spec_hash=hashlib.sha256(raw).hexdigest()[:16],
+    )
+
+def _scale(unit_points: np.ndarray, factors: Sequence[Factor]) -> np.ndarray:
+    lo = np.array([f.low for f in factors])
+    hi = np.array([f.high for f in factors])
+    return lo + unit_points * (hi - lo)
+
+def design_points(spec: DOESpec) -> np.ndarray:
+    if spec.design == "full_factorial":
+        pts = np.array(list(itertools.product(*[f.levels for f in spec.factors])), dtype=float)
+    else:
+        from scipy.stats import qmc
+
+        d = len(spec.factors)
+        if spec.design == "latin_hypercube":
+            sampler = qmc.LatinHypercube(d=d, seed=spec.seed)
+        else:
+            n = spec.samples
+            if n & (n - 1):
+                log.warning(f"Sobol design with {n} samples: balance properties need a power of 2")
+            sampler = qmc.Sobol(d=d, scramble=True, seed=spec.seed)
+        pts = _scale(sampler.random(spec.samples), spec.factors)
+
+    for j, f in enumerate(spec.factors):
+        if f.integer:
+            pts[:, j] = np.round(pts[:, j])
+    return pts
+
+def case_kwargs(spec: DOESpec, point: Sequence[float]) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = dict(spec.run_kwargs)
+    if "tol_m" in kwargs and not isinstance(kwargs["tol_m"], Q_):
+        kwargs["tol_m"] = Q_(float(kwargs["tol_m"]), "kg/s")
+    cache = kwargs.pop("cache", None)
+    if cache:
+        kwargs["cache"] = RunCache(cache) if isinstance(cache, str) else RunCache()
+    store = kwargs.pop("store", None)
+    if store:
+        root = store if isinstance(store, str) else "results/store"
+        kwargs["store"] = RunStore(root, campaign=spec.name)
+        kwargs["param_group"] = spec.design
+
+    for f, v in zip(spec.factors, point):
+        v = float(v)
+        parts = f.target.split(".")
+        if f.target == "fouling_factor":
+            kwargs["fouling_factor"] = v
+        elif parts[0] == "operation":
+            kwargs.setdefault("operation_overrides", {})[parts[1]] = Q_(v, f.unit)
+        elif parts[0] == "fuel":
+            kwargs.setdefault("fuel_overrides", {})[parts[1]] = Q_(v, f.unit)
+        else:
+            kwargs.setdefault("stage_overrides", {}).setdefault(parts[1], {})[parts[2]] = Q_(v, f.unit)
+    return kwargs
+
+def build_cases(spec: DOESpec, pts: np.ndarray, outdir: str | Path) -> List[SweepCase]:
+    width = max(5, len(str(len(pts))))
+    cases = []
+    for i, pt in enumerate(pts):
+        kwargs = case_kwargs(spec, pt)
+        kwargs["outdir"] = str(outdir)
+        if "store" in kwargs:
+            kwargs["param_value"] = float(i)
+        cases.append(SweepCase(run_id=f"{spec.name}_{i:0{width}d}", kwargs=kwargs))
+    return cases
+
+def load_manifest(path: Path, spec_hash: str) -> Dict[str, Dict[str, Any]]:
+    done: Dict[str, Dict[str, Any]] = {}
+    if not path.exists():
+        return done
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if rec.get("spec_hash") != spec_hash:
+                raise ValueError(
+                    f"{path}: manifest was written for a different DOE spec "
+                    f"({rec.get('spec_hash')} != {spec_hash}); use a new campaign name"
+                )
+            done[rec["run_id"]] = rec
+    return done
+
+def run_campaign(
+    spec_path: str,
+    *,
+    root: str | Path = "results/campaigns",
+    max_workers: int | None = None,
+    retry_failed: bool = True,
+) -> List[SweepOutcome]:
+    spec = load_doe(spec_path)
+    camp_dir = Path(root) / spec.name
+    runs_dir = camp_dir / "runs"
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = camp_dir / "manifest.jsonl"
+
+    pts = design_points(spec)
+    cases = build_cases(spec, pts, runs_dir)
+    points = {c.run_id: pt for c, pt in zip(cases, pts)}
+
+    design_rows = [
+        {"run_id": rid, **{f.target: float(v) for f, v in zip(spec.factors, pt)}}
+        for rid, pt in points.items()
+    ]
+    pd.DataFrame(design_rows).to_csv(camp_dir / "design.csv", index=False)
+
+    done = load_manifest(manifest_path, spec.spec_hash)
+    skip = {rid for rid, rec in done.items() if rec.get("ok") or not retry_failed}
+    todo = [c for c in cases if c.run_id not in skip]
+
+    log.info(
+        f"Campaign {spec.name} ({spec.design}): {len(cases)} case(s), "
+        f"{len(skip)} already in manifest, {len(todo)} to run"
+    )
+
+    with open(manifest_path, "a", encoding="utf-8") as fh:
+        def _record(res: SweepOutcome) -> None:
+            rec = {
+                "run_id": res.run_id,
+                "spec_hash": spec.spec_hash,
+                "ok": res.ok,
+                "elapsed_s": res.elapsed_s,
+                "factors": {f.target: float(v) for f, v in zip(spec.factors, points[res.run_id])},
+                "csv_paths": list(res.csv_paths) if res.csv_paths else None,
+                "error": res.error.splitlines()[0] if res.error else None,
+            }
+            fh.write(json.dumps(rec) + "\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        return run_sweep(todo, max_workers=max_workers, on_done=_record)
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import Dict, Any
 from common.units import Q_
+from common.stage_specs import StageSpec
 
 @dataclass
 class GasStream:
@@ -20,6 +21,7 @@ class HXStage:
     name: str
     kind: str
     spec: Dict[str, Any]
+    si: StageSpec | None = None
 
 @dataclass
 class Drum:
@@ -3,6 +3,7 @@ from typing import Tuple, List, Dict, Any
 import yaml
 from common.units import Q_
 from common.models import HXStage, GasStream, WaterStream, Drum
+from common.stage_specs import validate_raw_spec
 
 def _q(node: Any) -> Q_:
     if isinstance(node, dict) and "value" in node and "unit" in node:
@@ -103,7 +104,9 @@ def load_stages(path: str) -> List[HXStage]:
         _wall_to_spec(_get(node, "wall"), spec)
         _map_K(node, spec)
 
-        stages.append(HXStage(name=name, kind=str(node["kind"]), spec=spec))
+        kind = str(node["kind"])
+        validate_raw_spec(name, kind, spec)
+        stages.append(HXStage(name=name, kind=kind, spec=spec))
 
     return stages
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+_enabled = False
+_timers: Dict[str, List[float]] = {}
+_counters: Dict[str, int] = {}
+
+def enabled() -> bool:
+    return _enabled
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+def reset() -> None:
+    _timers.clear()
+    _counters.clear()
+
+def timed(name: str | None = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def _wrap(fn):
+        key = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def _inner(*a, **k):
+            if not _enabled:
+                return fn(*a, **k)
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **k)
+            finally:
+                rec = _timers.get(key)
+                if rec is None:
+                    rec = _timers[key] = [0, 0.0]
+                rec[0] += 1
+                rec[1] += time.perf_counter() - t0
+        return _inner
+    return _wrap
+
+def count(name: str, n: int = 1) -> None:
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+def snapshot() -> Dict[str, Any]:
+    timers = {
+        k: {"calls": int(c), "total_s": t, "mean_us": (t / c * 1e6) if c else 0.0}
+        for k, (c, t) in sorted(_timers.items(), key=lambda kv: -kv[1][1])
+    }
+    return {"timers": timers, "counters": dict(sorted(_counters.items()))}
+
+@contextmanager
+def session(clear: bool = True) -> Iterator[None]:
+    was = _enabled
+    if clear:
+        reset()
+    enable()
+    try:
+        yield
+    finally:
+        if not was:
+            disable()
+
+def format_report(snap: Dict[str, Any] | None = None) -> str:
+    snap = snap if snap is not None else snapshot()
+    width = max([len(k) for k in (*snap["timers"], *snap["counters"])] + [8])
+    lines = [f"{'timer':<{width}} {'calls':>10} {'total [s]':>11} {'mean [us]':>11}"]
+    for k, r in snap["timers"].items():
+        lines.append(f"{k:<{width}} {r['calls']:>10d} {r['total_s']:>11.3f} {r['mean_us']:>11.1f}")
+    if snap["counters"]:
+        lines.append("")
+        lines.append(f"{'counter':<{width}} {'value':>10}")
+        for k, v in snap["counters"].items():
+            lines.append(f"{k:<{width}} {v:>10d}")
+    return "\n".join(lines)
+
+def write_report(path: str | Path, snap: Dict[str, Any] | None = None) -> str:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(snap if snap is not None else snapshot(), indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+    return str(path)
@@ -1,13 +1,19 @@
 from __future__ import annotations
+import math
+from dataclasses import dataclass
 from typing import Dict, Optional
+import numpy as np
 from common.units import Q_
 import cantera as ct
 from iapws import IAPWS97
+from common.profiling import timed
+from common import if97
 
 class GasProps:
     def __init__(self, mech_path: str = "config/flue_cantera.yaml", phase: str = "gas_mix"):
         self._sol = ct.Solution(mech_path, phase)
 
+    @timed()
     def _set(self, T: Q_, P: Q_, Y: Dict[str, Q_], film_T: Optional[Q_] = None):
         T_K = (film_T or T).to("K").magnitude
         P_Pa = P.to("Pa").magnitude
@@ -30,19 +36,97 @@ class GasProps:
     def h(self, T: Q_, P: Q_, X: Dict[str, Q_], film_T: Optional[Q_] = None) -> Q_:
         return Q_(self._set(T,P,X,film_T).enthalpy_mass, "J/kg")
 
+    def state(self, T: Q_, P: Q_, X: Dict[str, Q_]) -> Dict[str, float]:
+        sol = self._set(T, P, X)
+        return {"h": sol.enthalpy_mass, "rho": sol.density, "mu": sol.viscosity, "cp": sol.cp_mass, "k": sol.thermal_conductivity}
+
+    @timed()
+    def evaluate_many(self, T, P, Y: Dict[str, Q_]) -> Dict[str, np.ndarray]:
+        T_K = np.atleast_1d(np.asarray(T.to("K").magnitude if isinstance(T, Q_) else T, dtype=float))
+        P_Pa = np.asarray(P.to("Pa").magnitude if isinstance(P, Q_) else P, dtype=float)
+        T_K, P_Pa = np.broadcast_arrays(T_K, P_Pa)
+        self._set(Q_(300.0, "K"), Q_(101325.0, "Pa"), Y)
+        arr = ct.SolutionArray(self._sol, shape=T_K.shape)
+        arr.TPY = T_K, P_Pa, np.broadcast_to(self._sol.Y, T_K.shape + (self._sol.n_species,))
+        return {
+            "cp": np.asarray(arr.cp_mass),
+            "k": np.asarray(arr.thermal_conductivity),
+            "mu": np.asarray(arr.viscosity),
+            "rho": np.asarray(arr.density),
+            "h": np.asarray(arr.enthalpy_mass),
+        }
+
+    @timed()
+    def T_from_h(self, h: Q_, P: Q_, Y: Dict[str, Q_], T_guess: Optional[Q_] = None) -> Q_:
+        sol = self._set(T_guess if T_guess is not None else Q_(1000.0, "K"), P, Y)
+        sol.HP = h.to("J/kg").magnitude, P.to("Pa").magnitude
+        return Q_(sol.T, "K")
+
     def h_sensible(self, T: Q_, P: Q_, X: dict, Tref: Q_ = Q_(298.15, "K"), film_T: Q_ | None = None) -> Q_:
         hT   = self.h(T,   P, X, film_T)
         href = self.h(Tref, P, X, film_T)
         return (hT - href).to("J/kg")
 
+WATER_BACKENDS = ("iapws", "if97")
+
+@dataclass(frozen=True, slots=True)
+class IF97State:
+    T: float
+    x: float
+    rho: float
+    h: float
+    cp: float
+    mu: float
+    k: float
+
+def _if97_state(d: Dict[str, np.ndarray]) -> IF97State | None:
+    T = float(d["T"])
+    if math.isnan(T):
+        return None
+    return IF97State(
+        T=T, x=float(d["x"]), rho=float(d["rho"]), h=float(d["h"]),
+        cp=float(d["cp"]), mu=float(d["mu"]), k=float(d["k"]),
+    )
+
 class WaterProps:
+    backend = "iapws"
+
     @staticmethod
-    def _Ph(P: Q_, h: Q_) -> IAPWS97:
-        return IAPWS97(P=P.to("megapascal").magnitude, h=h.to("kJ/kg").magnitude)
+    def set_backend(name: str) -> None:
+        if name not in WATER_BACKENDS:
+            raise ValueError(f"unknown water property backend {name!r}; expected one of {list(WATER_BACKENDS)}")
+        WaterProps.backend = name
 
     @staticmethod
-    def _PT(P: Q_, T: Q_) -> IAPWS97:
-        return IAPWS97(P=P.to("megapascal").magnitude, T=T.to("K").magnitude)
+    @timed()
+    def _Ph(P: Q_, h: Q_) -> IAPWS97 | IF97State:
+        P_MPa = P.to("megapascal").magnitude
+        h_kJ = h.to("kJ/kg").magnitude
+        if WaterProps.backend == "if97":
+            st = _if97_state(if97.props_Ph(P_MPa, h_kJ))
+            if st is not None:
+                return st
+        return IAPWS97(P=P_MPa, h=h_kJ)
+
+    @staticmethod
+    @timed()
+    def _PT(P: Q_, T: Q_) -> IAPWS97 | IF97State:
+        P_MPa = P.to("megapascal").magnitude
+        T_K = T.to("K").magnitude
+        if WaterProps.backend == "if97":
+            st = _if97_state(if97.props_PT(P_MPa, T_K))
+            if st is not None:
+                return st
+        return IAPWS97(P=P_MPa, T=T_K)
+
+    @staticmethod
+    @timed()
+    def _Px(P_MPa: float, x: float) -> IAPWS97 | IF97State:
+        if WaterProps.backend == "if97":
+            st = _if97_state(if97.props_Px(P_MPa, x))
+            if st is not None:
+                return st
+        return IAPWS97(P=P_MPa, x=x)
 
     @staticmethod
     def T_from_Ph(P: Q_, h: Q_) -> Q_: return Q_(WaterProps._Ph(P,h).T, "K")
@@ -75,11 +159,53 @@ class WaterProps:
         return Q_(xm, "")
 
     @staticmethod
-    def Tsat(P: Q_) -> Q_: return Q_(IAPWS97(P=P.to("megapascal").magnitude, x=0.0).T, "K")
-    @staticmethod
-    def h_f(P: Q_) -> Q_:  return Q_(IAPWS97(P=P.to("megapascal").magnitude, x=0.0).h, "kJ/kg").to("J/kg")
-    @staticmethod
-    def h_g(P: Q_) -> Q_:  return Q_(IAPWS97(P=P.to("megapascal").magnitude, x=1.0).h, "kJ/kg").to("J/kg")
+    def state_Ph(P: Q_, h: Q_) -> Dict[str, float]:
+        xq = WaterProps.quality_from_Ph(P, h)
+        if xq is not None:
+            return {
+                "T": WaterProps.Tsat(P).to("K").magnitude,
+                "x": xq.magnitude,
+                "rho": WaterProps.rho_from_Px(P, xq).to("kg/m^3").magnitude,
+                "mu": math.nan, "cp": math.nan, "k": math.nan,
+            }
+        st = WaterProps._Ph(P, h)
+        return {"T": st.T, "x": math.nan, "rho": st.rho, "mu": st.mu, "cp": st.cp * 1e3, "k": st.k}
+
+    @staticmethod
+    def state_Ph_many(P_Pa, h_Jkg) -> Dict[str, np.ndarray]:
+        P_Pa, h_Jkg = np.broadcast_arrays(np.asarray(P_Pa, dtype=float), np.asarray(h_Jkg, dtype=float))
+        if WaterProps.backend != "if97":
+            rows = [WaterProps.state_Ph(Q_(p, "Pa"), Q_(h, "J/kg")) for p, h in zip(P_Pa.ravel(), h_Jkg.ravel())]
+            return {k: np.array([r[k] for r in rows]).reshape(P_Pa.shape) for k in ("T", "x", "rho", "mu", "cp", "k")}
+
+        P_MPa = P_Pa * 1e-6
+        h_kJ = h_Jkg * 1e-3
+        liq = if97.props_Px(P_MPa, 0.0)
+        vap = if97.props_Px(P_MPa, 1.0)
+        x = (h_kJ - liq["h"]) / (vap["h"] - liq["h"])
+        two = (x >= -1e-6) & (x <= 1 + 1e-6)
+        xc = np.clip(x, 0.0, 1.0)
+        st = if97.props_Ph(P_MPa, h_kJ)
+        out = {
+            "T": np.where(two, liq["T"], st["T"]),
+            "x": np.where(two, xc, np.nan),
+            "rho": np.where(two, 1 / ((1 - xc) / liq["rho"] + xc / vap["rho"]), st["rho"]),
+            "mu": np.where(two, np.nan, st["mu"]),
+            "cp": np.where(two, np.nan, st["cp"] * 1e3),
+            "k": np.where(two, np.nan, st["k"]),
+        }
+        for i in zip(*np.nonzero(~two & np.isnan(st["T"]))):
+            r = WaterProps.state_Ph(Q_(P_Pa[i], "Pa"), Q_(h_Jkg[i], "J/kg"))
+            for k in out:
+                out[k][i] = r[k]
+        return out
+
+    @staticmethod
+    def Tsat(P: Q_) -> Q_: return Q_(WaterProps._Px(P.to("megapascal").magnitude, 0.0).T, "K")
+    @staticmethod
+    def h_f(P: Q_) -> Q_:  return Q_(WaterProps._Px(P.to("megapascal").magnitude, 0.0).h, "kJ/kg").to("J/kg")
+    @staticmethod
+    def h_g(P: Q_) -> Q_:  return Q_(WaterProps._Px(P.to("megapascal").magnitude, 1.0).h, "kJ/kg").to("J/kg")
 
     @staticmethod
     def cp_from_PT(P: Q_, T: Q_) -> Q_:
@@ -98,12 +224,12 @@ class WaterProps:
     def rho_from_Px(P: Q_, x: Q_) -> Q_:
         P_MPa = P.to("megapascal").magnitude
         if x.magnitude <= 0:
-            return Q_(IAPWS97(P=P_MPa, x=0.0).rho, "kg/m^3")
+            return Q_(WaterProps._Px(P_MPa, 0.0).rho, "kg/m^3")
         if x.magnitude >= 1:
-            return Q_(IAPWS97(P=P_MPa, x=1.0).rho, "kg/m^3")
+            return Q_(WaterProps._Px(P_MPa, 1.0).rho, "kg/m^3")
 
-        rho_f = IAPWS97(P=P_MPa, x=0.0).rho
-        rho_g = IAPWS97(P=P_MPa, x=1.0).rho
+        rho_f = WaterProps._Px(P_MPa, 0.0).rho
+        rho_g = WaterProps._Px(P_MPa, 1.0).rho
 
         v_mix = (1 - x.magnitude) / rho_f + x.magnitude / rho_g
         return Q_(1 / v_mix, "kg/m^3")
@@ -1,11 +1,21 @@
 from __future__ import annotations
+import json
+import math
+import re
 from dataclasses import dataclass, field
-from typing import List, Sequence, Tuple
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
 from common.units import Q_
 from common.models import GasStream
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    from heat.postproc import ProfileArrays
+
+STEPS_FORMATS = ("csv", "parquet", "feather", "npz")
+_UNIT_RE = re.compile(r"^(?P<name>.+)\[(?P<unit>[^\]]*)\]$")
+
 @dataclass(frozen=True)
 class CombustionResult:
     LHV: Q_
@@ -19,6 +29,18 @@ class CombustionResult:
     air_mass_flow: Q_ | None = None
     excess_air_ratio: Q_ | None = None
 
+@dataclass(frozen=True)
+class StepState:
+    gas_h: float = math.nan
+    gas_rho: float = math.nan
+    gas_mu: float = math.nan
+    water_T: float = math.nan
+    water_x: float = math.nan
+    water_rho: float = math.nan
+    water_mu: float = math.nan
+    water_cp: float = math.nan
+    water_k: float = math.nan
+
 @dataclass(frozen=True)
 class StepResult:
     i: int
@@ -43,6 +65,7 @@ class StepResult:
     w_dP_tot: Q_ = field(default_factory=lambda: Q_(0.0, "kPa"))
     qprime_conv: Q_ = field(default_factory=lambda: Q_(0.0, "W/m"))
     qprime_rad: Q_ = field(default_factory=lambda: Q_(0.0, "W/m"))
+    state: StepState | None = None
 
 @dataclass(frozen=True)
 class StageResult:
@@ -61,6 +84,13 @@ class StageResult:
     cold_flow_A: Q_ = field(default_factory=lambda: Q_(0.0, "m^2"))
     hot_Dh: Q_ = field(default_factory=lambda: Q_(0.0, "m"))
     cold_Dh: Q_ = field(default_factory=lambda: Q_(0.0, "m"))
+    water_counterflow: bool = False
+
+@dataclass(frozen=True)
+class WarmStart:
+    m_fw: Q_
+    feed_dP: Q_ | None = None
+    stage_results: Sequence[StageResult] | None = None
 
 @dataclass(frozen=True)
 class GlobalProfile:
@@ -81,6 +111,7 @@ class GlobalProfile:
     w_dP_minor: List[Q_]
     w_dP_tot: List[Q_]
     stage_results: List[StageResult]
+    state: List[StepState | None] = field(default_factory=list)
 
 def build_global_profile(stage_results: Sequence[StageResult]) -> GlobalProfile:
     xs: List[Q_] = []
@@ -99,6 +130,7 @@ def build_global_profile(stage_results: Sequence[StageResult]) -> GlobalProfile:
     w_dP_fric: List[Q_] = []
     w_dP_minor: List[Q_] = []
     w_dP_tot: List[Q_] = []
+    state: List[StepState | None] = []
 
     for k, sr in enumerate(stage_results):
         for st in sr.steps:
@@ -118,6 +150,7 @@ def build_global_profile(stage_results: Sequence[StageResult]) -> GlobalProfile:
             w_dP_fric.append(st.w_dP_fric)
             w_dP_minor.append(st.w_dP_minor)
             w_dP_tot.append(st.w_dP_tot)
+            state.append(st.state)
 
     return GlobalProfile(
         x=xs, dx=dxs, gas=gas, water=water,
@@ -126,37 +159,88 @@ def build_global_profile(stage_results: Sequence[StageResult]) -> GlobalProfile:
         dP_fric=dP_fric, dP_minor=dP_minor, dP_total=dP_total,
         w_dP_fric=w_dP_fric, w_dP_minor=w_dP_minor, w_dP_tot=w_dP_tot,  
         stage_results=list(stage_results),
+        state=state,
     )
 
-def write_results_csvs(
-    global_profile: GlobalProfile,
+STAGE_TABLE_MAPPING = [
+    ("kind", "stage_kind"),
+    ("gas in pressure[kpa]", "gas_in_P[kPa]"),
+    ("gas in temp[°C]", "gas_in_T[°C]"),
+    ("gas in enthalpy[kJ/kg]", "gas_in_h[kJ/kg]"),
+    ("gas out pressure[kpa]", "gas_out_P[kPa]"),
+    ("gas out temp[°C]", "gas_out_T[°C]"),
+    ("gas out enthalpy[kJ/kg]", "gas_out_h[kJ/kg]"),
+    ("water in temp[°C]", "water_in_T[°C]"),
+    ("water in enthalpy[kJ/kg]", "water_in_h[kJ/kg]"),
+    ("water in pressure[kpa]", "water_in_P[kPa]"),
+    ("water out temp[°C]", "water_out_T[°C]"),
+    ("water out enthalpy[kJ/kg]", "water_out_h[kJ/kg]"),
+    ("water out pressure[kpa]", "water_out_P[kPa]"),
+    ("gas avg velocity[m/s]", "gas_V_avg[m/s]"),
+    ("water avg velocity[m/s]", "water_V_avg[m/s]"),
+    ("pressure drop fric[kpa]", "ΔP_stage_fric[kPa]"),
+    ("pressure drop minor[kpa]", "ΔP_stage_minor[kPa]"),
+    ("pressure drop total[kpa]", "ΔP_stage_total[kPa]"),
+    ("water pressure drop fric[kpa]", "ΔP_water_stage_fric[kPa]"),
+    ("water pressure drop minor[kpa]", "ΔP_water_stage_minor[kPa]"),
+    ("water pressure drop total[kpa]", "ΔP_water_stage_total[kPa]"),
+    ("Q conv[MW]", "Q_conv_stage[MW]"),
+    ("Q rad[MW]", "Q_rad_stage[MW]"),
+    ("Q total[MW]", "Q_stage[MW]"),
+    ("UA[MW/K]", "UA_stage[MW/K]"),
+    ("steam capacity[t/h]", "steam_capacity[t/h]"),
+]
+
+BOILER_SUMMARY_MAPPING = [
+    ("fuel mass flow[kg/s]",            "fuel_mass_flow[kg/s]"),
+    ("air flow[kg/s]",                  "air_mass_flow[kg/s]"),
+    ("excess air ratio[-]",             "excess_air_ratio[-]"),
+    ("feedwater flow[kg/s]",            "feedwater_mass_flow[kg/s]"),
+    ("steam capacity[t/h]",             "steam_capacity[t/h]"),
+    ("eta direct[-]",                   "η_direct[-]"),
+    ("eta indirect[-]",                 "η_indirect[-]"),
+    ("Stack loss fraction[-]",         "Stack_loss_fraction[-]"),
+    ("Q_flue_out[MW]",                  "Q_flue_out[MW]"),
+    ("UA[MW/K]",                        "UA_stage[MW/K]"),
+    ("Q_in total[MW]",                  "Q_in_total[MW]"),
+    ("Q_useful[MW]",                     "Q_total_useful[MW]"),
+    ("Q_balance_error[MW]",                  "Q_balance_error[MW]"),
+    ("pressure drop fric total[kPa]",     "ΔP_stage_fric[kPa]"),
+    ("pressure drop minor total[kPa]",   "ΔP_stage_minor[kPa]"),
+    ("pressure drop total[kPa]",         "ΔP_stage_total[kPa]"),
+    ("water pressure drop fric total[kPa]",  "ΔP_water_stage_fric[kPa]"),
+    ("water pressure drop minor total[kPa]", "ΔP_water_stage_minor[kPa]"),
+    ("water pressure drop total[kPa]",       "ΔP_water_stage_total[kPa]"),
+    ("LHV[kJ/kg]",                      "LHV_mass[kJ/kg]"),
+    ("P-LHV[MW]",                       "P_LHV[MW]"),
+    ("Tad[°C]",                         "T_ad[°C]"),
+    ("stack temperature[°C]",           "stack_temperature[°C]"),
+    ("feedwater pressure[kPa]",              "feedwater_P[kPa]"),
+    ("drum pressure[kPa]",                   "drum_P[kPa]"),
+]
+
+def results_frames(
+    global_profile: GlobalProfile | None,
     combustion: CombustionResult | None,
-    outdir: str | Path,
-    run_id: str,
     drum_pressure: Q_ | None = None,
     feed_pressure: Q_ | None = None,
+    *,
+    arrays: ProfileArrays | None = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
 
-) -> Tuple[str, str, str]:
-
-    from heat.postproc import profile_to_dataframe, summary_from_profile
-
-    outdir = Path(outdir)
-    outdir.mkdir(parents=True, exist_ok=True)
-
-    steps_path = outdir / f"{run_id}_steps.csv"
-    stages_summary_path = outdir / f"{run_id}_stages_summary.csv"
-    boiler_summary_path = outdir / f"{run_id}_boiler_summary.csv"
+    from heat.postproc import profile_arrays, profile_to_dataframe, summary_from_profile
 
+    if arrays is None:
+        arrays = profile_arrays(global_profile)
     df_steps = profile_to_dataframe(
-        global_profile,
         remap_water=False,
+        arrays=arrays,
     )
-    df_steps.set_index("stage_name").to_csv(steps_path)
 
     rows, _, _ = summary_from_profile(
-        global_profile,
         combustion=combustion,
-        drum_pressure=drum_pressure
+        drum_pressure=drum_pressure,
+        arrays=arrays,
     )
 
 
@@ -195,45 +279,17 @@ def write_results_csvs(
     df_stages = df_stages.set_index("stage_name")
 
     table = pd.DataFrame(
-        {
-            "name": df_stages.index,
-            "kind": df_stages["stage_kind"],
-            "gas in pressure[kpa]": df_stages["gas_in_P[kPa]"],
-            "gas in temp[°C]": df_stages["gas_in_T[°C]"],
-            "gas in enthalpy[kJ/kg]": df_stages["gas_in_h[kJ/kg]"],
-            "gas out pressure[kpa]": df_stages["gas_out_P[kPa]"],
-            "gas out temp[°C]": df_stages["gas_out_T[°C]"],
-            "gas out enthalpy[kJ/kg]": df_stages["gas_out_h[kJ/kg]"],
-            "water in temp[°C]": df_stages["water_in_T[°C]"],
-            "water in enthalpy[kJ/kg]": df_stages["water_in_h[kJ/kg]"],
-            "water in pressure[kpa]": df_stages["water_in_P[kPa]"],
-            "water out temp[°C]": df_stages["water_out_T[°C]"],
-            "water out enthalpy[kJ/kg]": df_stages["water_out_h[kJ/kg]"],
-            "water out pressure[kpa]": df_stages["water_out_P[kPa]"],
-            "gas avg velocity[m/s]": df_stages["gas_V_avg[m/s]"],
-            "water avg velocity[m/s]": df_stages["water_V_avg[m/s]"],
-            "pressure drop fric[kpa]": df_stages["ΔP_stage_fric[kPa]"],
-            "pressure drop minor[kpa]": df_stages["ΔP_stage_minor[kPa]"],
-            "pressure drop total[kpa]": df_stages["ΔP_stage_total[kPa]"],
-            "water pressure drop fric[kpa]": df_stages["ΔP_water_stage_fric[kPa]"],
-            "water pressure drop minor[kpa]": df_stages["ΔP_water_stage_minor[kPa]"],
-            "water pressure drop total[kpa]": df_stages["ΔP_water_stage_total[kPa]"],
-            "Q conv[MW]": df_stages["Q_conv_stage[MW]"],
-            "Q rad[MW]": df_stages["Q_rad_stage[MW]"],
-            "Q total[MW]": df_stages["Q_stage[MW]"],
-            "UA[MW/K]": df_stages["UA_stage[MW/K]"],
-            "steam capacity[t/h]": df_stages["steam_capacity[t/h]"],
-        }
-    ).set_index("name")
+        {new_name: df_stages[src_col] for new_name, src_col in STAGE_TABLE_MAPPING},
+        index=df_stages.index.rename("name"),
+    )
 
     table = table.drop(columns=["name"], errors="ignore")
-    table.T.to_csv(stages_summary_path, index_label="name")
 
     if not df_boiler.empty:
         boiler_row = df_boiler.iloc[0].copy()
 
         try:
-            m_fw = global_profile.stage_results[5].steps[0].water.mass_flow.to("kg/s").magnitude
+            m_fw = arrays.stage_results[5].steps[0].water.mass_flow.to("kg/s").magnitude
         except Exception:
             m_fw = float("nan")
 
@@ -296,45 +352,16 @@ def write_results_csvs(
 
         boiler_df = pd.DataFrame([boiler_row])
 
-        summary_mapping = [
-            ("fuel mass flow[kg/s]",            "fuel_mass_flow[kg/s]"),
-            ("air flow[kg/s]",                  "air_mass_flow[kg/s]"),
-            ("excess air ratio[-]",             "excess_air_ratio[-]"),
-            ("feedwater flow[kg/s]",            "feedwater_mass_flow[kg/s]"),
-            ("steam capacity[t/h]",             "steam_capacity[t/h]"),
-            ("eta direct[-]",                   "η_direct[-]"),
-            ("eta indirect[-]",                 "η_indirect[-]"),
-            ("Stack loss fraction[-]",         "Stack_loss_fraction[-]"),
-            ("Q_flue_out[MW]",                  "Q_flue_out[MW]"),
-            ("UA[MW/K]",                        "UA_stage[MW/K]"),
-            ("Q_in total[MW]",                  "Q_in_total[MW]"),
-            ("Q_useful[MW]",                     "Q_total_useful[MW]"),
-            ("Q_balance_error[MW]",                  "Q_balance_error[MW]"),
-            ("pressure drop fric total[kPa]",     "ΔP_stage_fric[kPa]"),
-            ("pressure drop minor total[kPa]",   "ΔP_stage_minor[kPa]"),
-            ("pressure drop total[kPa]",         "ΔP_stage_total[kPa]"),
-            ("water pressure drop fric total[kPa]",  "ΔP_water_stage_fric[kPa]"),
-            ("water pressure drop minor total[kPa]", "ΔP_water_stage_minor[kPa]"),
-            ("water pressure drop total[kPa]",       "ΔP_water_stage_total[kPa]"), 
-            ("LHV[kJ/kg]",                      "LHV_mass[kJ/kg]"),
-            ("P-LHV[MW]",                       "P_LHV[MW]"),
-            ("Tad[°C]",                         "T_ad[°C]"),
-            ("stack temperature[°C]",           "stack_temperature[°C]"),
-            ("feedwater pressure[kPa]",              "feedwater_P[kPa]"),
-            ("drum pressure[kPa]",                   "drum_P[kPa]"),
-        ]
 
         out_row = {}
         row0 = boiler_df.iloc[0]
-        for new_name, src_col in summary_mapping:
+        for new_name, src_col in BOILER_SUMMARY_MAPPING:
             out_row[new_name] = row0.get(src_col, "")
 
         boiler_out_df = pd.DataFrame([out_row]).T
         boiler_out_df = boiler_out_df.reset_index()
         boiler_out_df.columns = ["parameter", "value"]
 
-        boiler_out_df.to_csv(boiler_summary_path, index=False)
-
     else:
         empty_cols = list(df_summary.columns) + [
             "water_mass_flow[kg/s]",
@@ -345,7 +372,119 @@ def write_results_csvs(
             "air_mass_flow[kg/s]",
             "excess_air_ratio[-]", 
         ]
-        pd.DataFrame(columns=empty_cols).to_csv(boiler_summary_path, index=False)
+        boiler_out_df = pd.DataFrame(columns=empty_cols)
+
+    return df_steps, table, boiler_out_df
+
+def column_units(columns: Sequence[str]) -> Dict[str, str]:
+    units = {}
+    for c in columns:
+        m = _UNIT_RE.match(str(c))
+        if m:
+            units[str(c)] = m.group("unit")
+    return units
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("parquet/feather steps output requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def write_steps(df_steps: pd.DataFrame, path: str | Path, fmt: str = "csv") -> Path:
+    if fmt not in STEPS_FORMATS:
+        raise ValueError(f"steps format must be one of {STEPS_FORMATS}. Got {fmt!r}")
+    path = Path(path).with_suffix(f".{fmt}")
+    if fmt == "csv":
+        df_steps.set_index("stage_name").to_csv(path)
+        return path
+
+    units = column_units(df_steps.columns)
+    if fmt == "npz":
+        arrays = {}
+        for c in df_steps.columns:
+            col = df_steps[c]
+            arrays[c] = col.to_numpy(dtype=str) if not pd.api.types.is_numeric_dtype(col) else col.to_numpy()
+        np.savez_compressed(
+            path,
+            __columns__=np.array(list(df_steps.columns)),
+            __units__=np.array(json.dumps(units)),
+            **arrays,
+        )
+        return path
+
+    pa = _arrow()
+    tbl = pa.Table.from_pandas(df_steps, preserve_index=False)
+    meta = dict(tbl.schema.metadata or {})
+    meta[b"units"] = json.dumps(units).encode("utf-8")
+    tbl = tbl.replace_schema_metadata(meta)
+    if fmt == "parquet":
+        pa.parquet.write_table(tbl, path, compression="zstd")
+    else:
+        pa.feather.write_feather(tbl, path, compression="zstd")
+    return path
+
+def read_steps(path: str | Path, *, columns: Sequence[str] | None = None) -> pd.DataFrame:
+    path = Path(path)
+    fmt = path.suffix.lstrip(".").lower()
+    cols = list(columns) if columns is not None else None
+
+    if fmt == "csv":
+        df = pd.read_csv(path, usecols=cols)
+        df.attrs["units"] = column_units(df.columns)
+        return df
+    if fmt == "npz":
+        with np.load(path, allow_pickle=False) as z:
+            names = [str(c) for c in z["__columns__"]]
+            units = json.loads(str(z["__units__"]))
+            df = pd.DataFrame({c: z[c] for c in (cols or names)})
+    elif fmt in ("parquet", "feather"):
+        pa = _arrow()
+        if fmt == "parquet":
+            tbl = pa.parquet.read_table(path, columns=cols, memory_map=True)
+        else:
+            tbl = pa.feather.read_table(path, columns=cols, memory_map=True)
+        raw = (tbl.schema.metadata or {}).get(b"units")
+        units = json.loads(raw) if raw else column_units(tbl.column_names)
+        df = tbl.to_pandas()
+    else:
+        raise ValueError(f"Unknown steps file format {path.suffix!r}; expected one of {STEPS_FORMATS}")
+    df.attrs["units"] = {c: u for c, u in units.items() if c in df.columns}
+    return df
 
-    return str(steps_path), str(stages_summary_path), str(boiler_summary_path)  
+def write_results_csvs(
+    global_profile: GlobalProfile | None,
+    combustion: CombustionResult | None,
+    outdir: str | Path,
+    run_id: str,
+    drum_pressure: Q_ | None = None,
+    feed_pressure: Q_ | None = None,
+    frames: Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None = None,
+    steps_format: str = "csv",
+    arrays: ProfileArrays | None = None,
+) -> Tuple[str, str, str]:
+
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    steps_path = outdir / f"{run_id}_steps.{steps_format}"
+    stages_summary_path = outdir / f"{run_id}_stages_summary.csv"
+    boiler_summary_path = outdir / f"{run_id}_boiler_summary.csv"
+
+    if frames is None:
+        frames = results_frames(
+            global_profile,
+            combustion,
+            drum_pressure=drum_pressure,
+            feed_pressure=feed_pressure,
+            arrays=arrays,
+        )
+    df_steps, table, boiler_df = frames
+
+    write_steps(df_steps, steps_path, steps_format)
+    table.T.to_csv(stages_summary_path, index_label="name")
+    boiler_df.to_csv(boiler_summary_path, index=False)
 
+    return str(steps_path), str(stages_summary_path), str(boiler_summary_path)
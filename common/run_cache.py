@@ -0,0 +1,142 @@
+from __future__ import annotations
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from common.units import Q_
+
+log = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+CODE_DIRS = ("common", "heat", "combustion")
+CODE_FILES = ("config/flue_cantera.yaml",)
+EVICT_LOW_WATER = 0.9
+
+def _canon(obj: Any) -> Any:
+    if isinstance(obj, Q_):
+        mag = obj.magnitude
+        return {"q": _canon(mag), "u": f"{obj.units:~}"}
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {
+            "type": type(obj).__name__,
+            **{f.name: _canon(getattr(obj, f.name)) for f in dataclasses.fields(obj)},
+        }
+    if isinstance(obj, dict):
+        return {str(k): _canon(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(obj, (list, tuple)):
+        return [_canon(v) for v in obj]
+    if isinstance(obj, float):
+        return repr(obj)
+    if isinstance(obj, (str, int, bool)) or obj is None:
+        return obj
+    if hasattr(obj, "tolist"):
+        return _canon(obj.tolist())
+    raise TypeError(f"run cache: cannot hash input of type {type(obj).__name__}")
+
+@lru_cache(maxsize=1)
+def code_version(root: str | Path | None = None) -> str:
+    base = Path(root) if root is not None else Path(__file__).resolve().parent.parent
+    h = hashlib.sha256()
+    files = [p for d in CODE_DIRS for p in sorted((base / d).rglob("*.py"))]
+    files += [base / f for f in CODE_FILES if (base / f).exists()]
+    for p in files:
+        h.update(str(p.relative_to(base)).encode())
+        h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+def case_key(inputs: Dict[str, Any]) -> str:
+    doc = {"format": CACHE_FORMAT, "code": code_version(), "inputs": _canon(inputs)}
+    raw = json.dumps(doc, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class RunCache:
+    def __init__(self, root: str | Path = "results/cache", max_bytes: int = 2 * 1024**3):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def _entries(self) -> Iterable[Path]:
+        return self.root.glob("??/*.pkl")
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                value = pickle.load(fh)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            log.warning(f"Dropping unreadable cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            self._size = None
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._size is None:
+            self._size = self.size_bytes()
+        try:
+            self._size -= path.stat().st_size
+        except FileNotFoundError:
+            pass
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            self._size = None
+            raise
+        self._size += path.stat().st_size
+        if self._size > self.max_bytes:
+            self.evict(int(self.max_bytes * EVICT_LOW_WATER))
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self._entries())
+
+    def evict(self, target_bytes: int | None = None) -> int:
+        target = self.max_bytes if target_bytes is None else int(target_bytes)
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            log.info(f"Run cache: evicted {removed} entr{'y' if removed == 1 else 'ies'}, {total / 1e6:.1f} MB kept")
+        return removed
+
+    def clear(self) -> None:
+        for p in self._entries():
+            p.unlink(missing_ok=True)
+        self._size = 0
@@ -0,0 +1,177 @@
+from __future__ import annotations
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Sequence
+from urllib.parse import quote
+
+import pandas as pd
+
+from common.results import BOILER_SUMMARY_MAPPING, STAGE_TABLE_MAPPING
+
+log = logging.getLogger(__name__)
+
+TABLES = ("boiler", "stages", "steps")
+PARTITION_KEYS = ("campaign", "param_group")
+
+STEPS_COLUMNS = [
+    "x[m]", "dx[m]", "qprime[MW/m]", "UA_prime[MW/K/m]",
+    "gas_P[kPa]", "gas_T[°C]", "gas_h[kJ/kg]",
+    "water_P[kPa]", "water_T[°C]", "water_h[kJ/kg]",
+    "gas_eps[-]", "water_x[-]",
+    "gas_V[m/s]", "Re_gas[-]", "h_gas[W/m^2/K]",
+    "water_V[m/s]", "Re_water[-]", "h_water[W/m^2/K]",
+    "dP_fric[kPa]", "dP_minor[kPa]", "dP_total[kPa]",
+    "water_dP_fric[kPa]", "water_dP_minor[kPa]", "water_dP_total[kPa]",
+    "water_cp[kJ/kg/K]", "water_mu[Pa*s]", "water_k[W/m/K]", "water_rho[kg/m^3]",
+]
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("RunStore requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _schema(table: str):
+    pa = _pa()
+    keys = [
+        ("run", pa.string()),
+        ("campaign", pa.string()),
+        ("param_group", pa.string()),
+        ("param_value", pa.float64()),
+    ]
+    if table == "boiler":
+        cols = [(name, pa.float64()) for name, _ in BOILER_SUMMARY_MAPPING]
+    elif table == "stages":
+        cols = [("stage", pa.string()), ("kind", pa.string())]
+        cols += [(name, pa.float64()) for name, _ in STAGE_TABLE_MAPPING if name != "kind"]
+    elif table == "steps":
+        cols = [("stage_name", pa.string()), ("i", pa.int64()), ("boiling", pa.bool_())]
+        cols += [(name, pa.float64()) for name in STEPS_COLUMNS]
+    else:
+        raise ValueError(f"Unknown run store table {table!r}; expected one of {TABLES}")
+    return pa.schema(keys + cols)
+
+def col(name: str):
+    return _pa().dataset.field(name)
+
+def _conform(df: pd.DataFrame, table: str):
+    pa = _pa()
+    schema = _schema(table)
+    extra = [c for c in df.columns if c not in schema.names]
+    if extra:
+        log.warning(f"Run store table '{table}': dropping columns not in schema: {extra}")
+
+    arrays = []
+    for f in schema:
+        if f.name not in df.columns:
+            arrays.append(pa.nulls(len(df), type=f.type))
+            continue
+        s = df[f.name]
+        if pa.types.is_floating(f.type):
+            s = pd.to_numeric(s, errors="coerce").astype("float64")
+        elif pa.types.is_integer(f.type):
+            s = pd.to_numeric(s, errors="coerce").astype("Int64")
+        elif pa.types.is_boolean(f.type):
+            s = s.map(lambda v: str(v).strip().lower() == "true" if isinstance(v, str) else v).astype("boolean")
+        else:
+            s = s.astype("string")
+        arrays.append(pa.array(s, type=f.type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+class RunStore:
+    def __init__(self, root: str | Path = "results/store", campaign: str = "default"):
+        self.root = Path(root)
+        self.campaign = campaign
+
+    def _file(self, table: str, campaign: str, param_group: str, run_id: str) -> Path:
+        return (
+            self.root / table
+            / f"campaign={quote(campaign, safe='')}"
+            / f"param_group={quote(param_group, safe='')}"
+            / f"{quote(run_id, safe='')}.parquet"
+        )
+
+    def write_run(
+        self,
+        run_id: str,
+        steps: pd.DataFrame,
+        stages: pd.DataFrame,
+        boiler: pd.DataFrame,
+        *,
+        param_group: str = "control",
+        param_value: float | None = None,
+        campaign: str | None = None,
+    ) -> Dict[str, str]:
+        pq = _pa().parquet
+        campaign = campaign if campaign is not None else self.campaign
+        pv = float(param_value) if param_value is not None else math.nan
+
+        stages_df = stages.reset_index().rename(columns={"name": "stage", "index": "stage"})
+        if {"parameter", "value"} <= set(boiler.columns):
+            boiler_df = pd.DataFrame([dict(zip(boiler["parameter"], boiler["value"]))])
+        else:
+            boiler_df = pd.DataFrame([{}])
+
+        paths = {}
+        for table, df in (("boiler", boiler_df), ("stages", stages_df), ("steps", steps)):
+            df = df.copy()
+            df["run"] = run_id
+            df["campaign"] = campaign
+            df["param_group"] = param_group
+            df["param_value"] = pv
+
+            path = self._file(table, campaign, param_group, run_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+            os.close(fd)
+            try:
+                pq.write_table(_conform(df, table), tmp, compression="zstd")
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            paths[table] = str(path)
+        return paths
+
+    def dataset(self, table: str):
+        pa = _pa()
+        schema = _schema(table)
+        part = pa.dataset.partitioning(
+            pa.schema([schema.field(k) for k in PARTITION_KEYS]),
+            flavor="hive",
+        )
+        base = self.root / table
+        base.mkdir(parents=True, exist_ok=True)
+        return pa.dataset.dataset(str(base), schema=schema, format="parquet", partitioning=part)
+
+    def query(
+        self,
+        table: str,
+        *,
+        columns: Sequence[str] | None = None,
+        filter: Any = None,
+        **equals: Any,
+    ) -> pd.DataFrame:
+        ds = _pa().dataset
+        expr = filter
+        for name, value in equals.items():
+            if isinstance(value, (list, tuple, set)):
+                term = ds.field(name).isin(list(value))
+            else:
+                term = ds.field(name) == value
+            expr = term if expr is None else expr & term
+
+        tbl = self.dataset(table).to_table(
+            columns=list(columns) if columns is not None else None,
+            filter=expr,
+        )
+        return tbl.to_pandas()
+
+    def runs(self, **equals: Any) -> pd.DataFrame:
+        return self.query("boiler", columns=["run", "campaign", "param_group", "param_value"], **equals)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import dataclasses
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from common.models import GasStream, HXStage, WaterStream
+from common.results import StageResult
+from common.run_cache import _canon
+from common import profiling
+
+StageValue = Tuple[GasStream, WaterStream, StageResult]
+
+def _quant(v: float, digits: int) -> str:
+    return f"{v:.{digits}g}"
+
+def geometry_hash(stage: HXStage) -> str:
+    spec = {k: v for k, v in stage.spec.items() if not str(k).startswith("_")}
+    raw = json.dumps({"name": stage.name, "kind": stage.kind, "spec": _canon(spec)}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+class StageCache:
+    def __init__(self, max_entries: int = 256, digits: int = 10):
+        self.max_entries = int(max_entries)
+        self.digits = int(digits)
+        self.hits = 0
+        self.misses = 0
+        self._store: OrderedDict[Tuple, StageValue] = OrderedDict()
+
+    def key(
+        self,
+        stage: HXStage,
+        n_steps: int,
+        g_in: GasStream,
+        w_in: WaterStream,
+        *,
+        stage_index: int,
+        water_counterflow: bool = False,
+    ) -> Tuple:
+        d = self.digits
+        gas = (
+            _quant(g_in.mass_flow.to("kg/s").magnitude, d),
+            _quant(g_in.T.to("K").magnitude, d),
+            _quant(g_in.P.to("Pa").magnitude, d),
+            tuple((str(k), _quant(float(getattr(v, "magnitude", v)), d)) for k, v in sorted(g_in.comp.items())),
+        )
+        pool = stage.si.pool_boiling
+        water = (
+            None if pool else _quant(w_in.mass_flow.to("kg/s").magnitude, d),
+            _quant(w_in.h.to("J/kg").magnitude, d),
+            _quant(w_in.P.to("Pa").magnitude, d),
+        )
+        return (geometry_hash(stage), stage_index, int(n_steps), bool(water_counterflow), gas, water)
+
+    def get(self, key: Tuple, w_in: WaterStream) -> StageValue | None:
+        hit = self._store.get(key)
+        if hit is None:
+            self.misses += 1
+            profiling.count("stage_cache.misses")
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        profiling.count("stage_cache.hits")
+
+        g_out, w_out, sr = hit
+        if w_out.mass_flow != w_in.mass_flow:
+            m = w_in.mass_flow
+            steps = [dataclasses.replace(s, water=dataclasses.replace(s.water, mass_flow=m)) for s in sr.steps]
+            sr = dataclasses.replace(sr, steps=steps)
+            w_out = dataclasses.replace(w_out, mass_flow=m)
+        return g_out, w_out, sr
+
+    def put(self, key: Tuple, value: StageValue) -> None:
+        self._store[key] = value
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._store),
+            "hit_rate": self.hits / calls if calls else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._store.clear()
+        self.hits = 0
+        self.misses = 0
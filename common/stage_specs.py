@@ -0,0 +1,141 @@
+from __future__ import annotations
+from dataclasses import MISSING, dataclass, fields
+from typing import Any, Dict, Mapping, Tuple, Type
+
+from common.units import Q_
+
+_UNITS: Dict[str, str] = {
+    "hot_flow_A": "m^2",
+    "cold_flow_A": "m^2",
+    "wall_k": "W/m/K",
+    "foul_k_in": "W/m/K",
+    "foul_k_out": "W/m/K",
+}
+_DIMENSIONLESS = {
+    "eps_in", "eps_out", "umax_factor", "rad_F", "rad_Texp", "water_dx_factor",
+    "K_hot_inlet", "K_hot_outlet", "K_hot_bend", "K_cold_inlet", "K_cold_outlet", "K_cold_bend",
+    "tubes_number", "N_rows", "n_tubes", "n_circuits", "baffle_cut",
+}
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class StageSpec:
+    inner_diameter: float
+    outer_diameter: float
+    wall_t: float
+    wall_k: float
+    foul_t_in: float
+    foul_k_in: float
+    foul_t_out: float
+    foul_k_out: float
+    hot_wet_P: float
+    hot_flow_A: float
+    hot_Dh: float
+    cold_wet_P: float
+    cold_flow_A: float
+    cold_Dh: float
+    roughness_in: float = 0.0
+    roughness_out: float = 0.0
+    roughness_cold_surface: float = 0.0
+    eps_in: float | None = None
+    eps_out: float | None = None
+    pool_boiling: bool = False
+    K_hot_inlet: float = 0.0
+    K_hot_outlet: float = 0.0
+    K_hot_bend: float | None = None
+    K_cold_inlet: float = 0.0
+    K_cold_outlet: float = 0.0
+    K_cold_bend: float = 0.0
+    umax_factor: float | None = None
+    rad_Lb: float | None = None
+    rad_F: float = 1.0
+    rad_Texp: float = 0.65
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class SingleTubeSpec(StageSpec):
+    inner_length: float
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ReversalChamberSpec(StageSpec):
+    inner_length: float
+    curvature_radius: float
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class TubeBankSpec(StageSpec):
+    inner_length: float
+    tubes_number: float
+    ST: float
+    SL: float
+    N_rows: float
+    baffle_spacing: float
+    arrangement: str = "inline"
+    baffle_cut: float | None = None
+    bundle_clearance: float | None = None
+
+@dataclass(frozen=True, slots=True, kw_only=True)
+class EconomiserSpec(StageSpec):
+    n_tubes: float
+    tube_length: float
+    hot_flow_length: float
+    water_dx_factor: float
+    shell_inner_diameter: float
+    baffle_spacing: float
+    ST: float
+    SL: float
+    N_rows: float = 1.0
+    arrangement: str = "inline"
+    n_circuits: float | None = None
+    inner_length: float | None = None
+    baffle_cut: float | None = None
+    bundle_clearance: float | None = None
+
+SPEC_TYPES: Dict[str, Type[StageSpec]] = {
+    "single_tube": SingleTubeSpec,
+    "reversal_chamber": ReversalChamberSpec,
+    "tube_bank": TubeBankSpec,
+    "economiser": EconomiserSpec,
+}
+
+_RAW_COMMON = ("inner_diameter", "wall_t", "wall_k", "foul_t_in", "foul_k_in", "foul_t_out", "foul_k_out")
+RAW_REQUIRED: Dict[str, Tuple[str, ...]] = {
+    "single_tube": _RAW_COMMON + ("inner_length", "roughness_out"),
+    "reversal_chamber": _RAW_COMMON + ("inner_length", "curvature_radius", "roughness_out"),
+    "tube_bank": _RAW_COMMON + ("inner_length", "tubes_number", "ST", "SL", "N_rows", "baffle_spacing", "roughness_out"),
+    "economiser": _RAW_COMMON + ("n_tubes", "tube_length", "shell_inner_diameter", "baffle_spacing", "ST", "SL", "roughness_in"),
+}
+
+def _unit(name: str) -> str:
+    if name in _UNITS:
+        return _UNITS[name]
+    return "" if name in _DIMENSIONLESS else "m"
+
+def _si(name: str, v: Any) -> Any:
+    if isinstance(v, Q_):
+        return float(v.to(_unit(name)).magnitude)
+    if isinstance(v, (bool, str)) or v is None:
+        return v
+    return float(v)
+
+def validate_raw_spec(name: str, kind: str, spec: Mapping[str, Any]) -> None:
+    if kind not in RAW_REQUIRED:
+        raise ValueError(f"{name}: unknown stage kind {kind!r}; expected one of {list(RAW_REQUIRED)}")
+    missing = [k for k in RAW_REQUIRED[kind] if k not in spec]
+    if missing:
+        raise KeyError(f"{name} ({kind}): missing required spec keys {missing}")
+    for k, v in spec.items():
+        if isinstance(v, Q_):
+            try:
+                v.to(_unit(k))
+            except Exception as e:
+                raise ValueError(f"{name} ({kind}): {k}={v:~P} is not convertible to {_unit(k) or 'dimensionless'}") from e
+
+def typed_spec(name: str, kind: str, spec: Mapping[str, Any]) -> StageSpec:
+    cls = SPEC_TYPES.get(kind)
+    if cls is None:
+        raise ValueError(f"{name}: unknown stage kind {kind!r}; expected one of {list(SPEC_TYPES)}")
+    flds = fields(cls)
+    names = {f.name for f in flds}
+    kw = {k: _si(k, v) for k, v in spec.items() if k in names}
+    missing = [f.name for f in flds if f.name not in kw and f.default is MISSING]
+    if missing:
+        raise KeyError(f"{name} ({kind}): missing required spec keys {missing}")
+    return cls(**kw)
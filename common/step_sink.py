@@ -0,0 +1,119 @@
+from __future__ import annotations
+import dataclasses
+import logging
+import math
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from common.results import StageResult, StepState
+
+log = logging.getLogger(__name__)
+
+STATE_FIELDS = tuple(StepState.__dataclass_fields__)
+
+def _pa():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("StageTraceSink requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def _mag(q, unit: str) -> float:
+    return q.to(unit).magnitude if q is not None else math.nan
+
+def boundary_steps(sr: StageResult) -> StageResult:
+    if len(sr.steps) <= 2:
+        return sr
+    return dataclasses.replace(sr, steps=[sr.steps[0], sr.steps[-1]])
+
+def stage_columns(sr: StageResult, stage_index: int) -> Dict[str, List[Any]]:
+    cols: Dict[str, List[Any]] = {
+        "stage_index": [], "stage_name": [], "i": [], "boiling": [],
+        "x[m]": [], "dx[m]": [],
+        "qprime[W/m]": [], "qprime_conv[W/m]": [], "qprime_rad[W/m]": [], "UA_prime[W/K/m]": [],
+        "Tgw[K]": [], "Tww[K]": [], "h_g[W/m^2/K]": [], "h_c[W/m^2/K]": [],
+        "gas_T[K]": [], "gas_P[Pa]": [], "gas_mdot[kg/s]": [],
+        "water_h[J/kg]": [], "water_P[Pa]": [], "water_mdot[kg/s]": [],
+        "dP_fric[Pa]": [], "dP_minor[Pa]": [], "dP_total[Pa]": [],
+        "w_dP_fric[Pa]": [], "w_dP_minor[Pa]": [], "w_dP_tot[Pa]": [],
+    }
+    cols.update({f: [] for f in STATE_FIELDS})
+
+    for st in sr.steps:
+        cols["stage_index"].append(stage_index)
+        cols["stage_name"].append(sr.stage_name)
+        cols["i"].append(st.i)
+        cols["boiling"].append(bool(st.boiling))
+        cols["x[m]"].append(_mag(st.x, "m"))
+        cols["dx[m]"].append(_mag(st.dx, "m"))
+        cols["qprime[W/m]"].append(_mag(st.qprime, "W/m"))
+        cols["qprime_conv[W/m]"].append(_mag(st.qprime_conv, "W/m"))
+        cols["qprime_rad[W/m]"].append(_mag(st.qprime_rad, "W/m"))
+        cols["UA_prime[W/K/m]"].append(_mag(st.UA_prime, "W/K/m"))
+        cols["Tgw[K]"].append(_mag(st.Tgw, "K"))
+        cols["Tww[K]"].append(_mag(st.Tww, "K"))
+        cols["h_g[W/m^2/K]"].append(_mag(st.h_g, "W/m^2/K"))
+        cols["h_c[W/m^2/K]"].append(_mag(st.h_c, "W/m^2/K"))
+        cols["gas_T[K]"].append(_mag(st.gas.T, "K"))
+        cols["gas_P[Pa]"].append(_mag(st.gas.P, "Pa"))
+        cols["gas_mdot[kg/s]"].append(_mag(st.gas.mass_flow, "kg/s"))
+        cols["water_h[J/kg]"].append(_mag(st.water.h, "J/kg"))
+        cols["water_P[Pa]"].append(_mag(st.water.P, "Pa"))
+        cols["water_mdot[kg/s]"].append(_mag(st.water.mass_flow, "kg/s"))
+        cols["dP_fric[Pa]"].append(_mag(st.dP_fric, "Pa"))
+        cols["dP_minor[Pa]"].append(_mag(st.dP_minor, "Pa"))
+        cols["dP_total[Pa]"].append(_mag(st.dP_total, "Pa"))
+        cols["w_dP_fric[Pa]"].append(_mag(st.w_dP_fric, "Pa"))
+        cols["w_dP_minor[Pa]"].append(_mag(st.w_dP_minor, "Pa"))
+        cols["w_dP_tot[Pa]"].append(_mag(st.w_dP_tot, "Pa"))
+        state = st.state if st.state is not None else StepState()
+        for f in STATE_FIELDS:
+            cols[f].append(getattr(state, f))
+    return cols
+
+class StageTraceSink:
+    def __init__(self, root: str | Path, *, clear: bool = True):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if clear:
+            for p in self.root.glob("stage_*.parquet"):
+                p.unlink()
+        self.written: List[str] = []
+
+    def _file(self, stage_index: int, stage_name: str) -> Path:
+        return self.root / f"stage_{stage_index:02d}_{stage_name}.parquet"
+
+    def write_stage(self, sr: StageResult, stage_index: int) -> Path:
+        pa = _pa()
+        tbl = pa.table(stage_columns(sr, stage_index))
+        path = self._file(stage_index, sr.stage_name)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            pa.parquet.write_table(tbl, tmp, compression="zstd")
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.written.append(str(path))
+        log.debug(f"Stage trace {sr.stage_name}: {tbl.num_rows} step(s) -> {path.name}")
+        return path
+
+    def flush(self, sr: StageResult, stage_index: int) -> StageResult:
+        self.write_stage(sr, stage_index)
+        return boundary_steps(sr)
+
+    def read(self) -> pd.DataFrame:
+        return read_stage_trace(self.root)
+
+def read_stage_trace(root: str | Path) -> pd.DataFrame:
+    pa = _pa()
+    files = sorted(Path(root).glob("stage_*.parquet"))
+    if not files:
+        return pd.DataFrame()
+    return pa.concat_tables([pa.parquet.read_table(p, memory_map=True) for p in files]).to_pandas()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import logging
+import os
+import sys
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class SweepCase:
+    run_id: str
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass(frozen=True)
+class SweepOutcome:
+    run_id: str
+    ok: bool
+    elapsed_s: float
+    csv_paths: Tuple[str, str, str] | None = None
+    m_fw_kg_s: float | None = None
+    m_s_kg_s: float | None = None
+    iterations: Dict[str, int] | None = None
+    error: str | None = None
+
+def sweep_run_id(param: str, value: Any, suffix: str = "") -> str:
+    return f"{param}_{value}{suffix}"
+
+def _init_worker(log_level: str) -> None:
+    import warnings
+    warnings.filterwarnings("ignore", message=r"NasaPoly2::validate", category=UserWarning)
+
+    from common.logging_utils import setup_logging
+    from common.props import WaterProps
+    from common.units import Q_
+    import heat.solver  # noqa: F401  (module-level Cantera solutions)
+    import heat.postproc  # noqa: F401
+
+    setup_logging(log_level)
+    WaterProps.h_f(Q_(1.0, "MPa"))
+
+def _run_case(case: SweepCase) -> SweepOutcome:
+    from common.boiler_loop import run_boiler_case
+
+    t0 = time.perf_counter()
+    try:
+        out = run_boiler_case(run_id=case.run_id, **case.kwargs)
+    except Exception as e:
+        return SweepOutcome(
+            run_id=case.run_id,
+            ok=False,
+            elapsed_s=time.perf_counter() - t0,
+            error=f"{type(e).__name__}: {e}\n{traceback.format_exc()}",
+        )
+
+    m_fw = out.get("m_fw")
+    m_s = out.get("m_s")
+    return SweepOutcome(
+        run_id=case.run_id,
+        ok=True,
+        elapsed_s=time.perf_counter() - t0,
+        csv_paths=out.get("csv_paths"),
+        m_fw_kg_s=m_fw.to("kg/s").magnitude if m_fw is not None else None,
+        m_s_kg_s=m_s.to("kg/s").magnitude if m_s is not None else None,
+        iterations=out.get("iterations"),
+    )
+
+def _check_case(case: SweepCase) -> SweepOutcome:
+    return SweepOutcome(run_id=case.run_id, ok=True, elapsed_s=0.0, m_fw_kg_s=float(case.kwargs["m_fw"]))
+
+def _report(done: int, total: int, t_start: float, res: SweepOutcome) -> None:
+    elapsed = time.perf_counter() - t_start
+    eta = elapsed / done * (total - done)
+    status = "ok" if res.ok else "FAILED"
+    log.info(
+        f"[{done}/{total}] {res.run_id} {status} in {res.elapsed_s:.1f} s "
+        f"(elapsed {elapsed:.0f} s, eta {eta:.0f} s)"
+    )
+    if not res.ok:
+        log.error(f"{res.run_id}: {res.error}")
+
+def run_sweep(
+    cases: Sequence[SweepCase],
+    *,
+    max_workers: int | None = None,
+    log_level: str = "WARNING",
+    on_done: Callable[[SweepOutcome], None] | None = None,
+    runner: Callable[[SweepCase], SweepOutcome] = _run_case,
+) -> List[SweepOutcome]:
+    ids = [c.run_id for c in cases]
+    dupes = sorted(r for r, n in Counter(ids).items() if n > 1)
+    if dupes:
+        raise ValueError(f"run_sweep: duplicate run_id(s) {dupes}")
+
+    total = len(cases)
+    if total == 0:
+        return []
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, total))
+
+    log.info(f"Sweep: {total} case(s) on {max_workers} worker(s)")
+    t_start = time.perf_counter()
+    results: Dict[str, SweepOutcome] = {}
+
+    if max_workers == 1:
+        for case in cases:
+            res = runner(case)
+            results[res.run_id] = res
+            _report(len(results), total, t_start, res)
+            if on_done is not None:
+                on_done(res)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(log_level,),
+        ) as pool:
+            futures = {pool.submit(runner, case): case for case in cases}
+            for fut in as_completed(futures):
+                case = futures[fut]
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    res = SweepOutcome(
+                        run_id=case.run_id,
+                        ok=False,
+                        elapsed_s=float("nan"),
+                        error=f"worker failure: {type(e).__name__}: {e}",
+                    )
+                results[res.run_id] = res
+                _report(len(results), total, t_start, res)
+                if on_done is not None:
+                    on_done(res)
+
+    n_fail = sum(1 for r in results.values() if not r.ok)
+    log.info(
+        f"Sweep done: {total - n_fail}/{total} ok, {n_fail} failed, "
+        f"{time.perf_counter() - t_start:.0f} s wall"
+    )
+    return [results[r] for r in ids]
+
+def main() -> int:
+    cases = [SweepCase(run_id=f"check_{i}", kwargs={"m_fw": float(i)}) for i in range(2)]
+    out = run_sweep(cases, max_workers=2, runner=_check_case)
+    ok = [r.run_id for r in out] == [c.run_id for c in cases] and all(r.ok for r in out)
+    ok = ok and [r.m_fw_kg_s for r in out] == [0.0, 1.0]
+    print(f"[INFO] run_sweep process pool: {len(out)} case(s) on 2 worker(s), {'ok' if ok else 'FAILED'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,3 +3,4 @@ import pint
 
 ureg = pint.UnitRegistry()
 Q_ = ureg.Quantity
+pint.set_application_registry(ureg)
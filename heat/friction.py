@@ -0,0 +1,110 @@
+from __future__ import annotations
+import sys
+from math import log10
+from typing import Dict, List
+
+import numpy as np
+
+RE_LAM = 2300.0
+RE_TURB = 4000.0
+METHODS = ("serghides", "haaland", "colebrook")
+
+def colebrook(Re: float, eps_over_D: float, tol: float = 1e-12, max_iter: int = 50) -> float:
+    a = eps_over_D / 3.7
+    x = -1.8 * log10(a ** 1.11 + 6.9 / Re)
+    for _ in range(max_iter):
+        x_new = -2.0 * log10(a + 2.51 * x / Re)
+        if abs(x_new - x) < tol:
+            x = x_new
+            break
+        x = x_new
+    return 1.0 / (x * x)
+
+def serghides(Re: float, eps_over_D: float) -> float:
+    a = eps_over_D / 3.7
+    A = -2.0 * log10(a + 12.0 / Re)
+    B = -2.0 * log10(a + 2.51 * A / Re)
+    C = -2.0 * log10(a + 2.51 * B / Re)
+    x = A - (B - A) ** 2 / (C - 2.0 * B + A)
+    return 1.0 / (x * x)
+
+def haaland(Re: float, eps_over_D: float) -> float:
+    x = -1.8 * log10((eps_over_D / 3.7) ** 1.11 + 6.9 / Re)
+    return 1.0 / (x * x)
+
+_TURB = {"serghides": serghides, "haaland": haaland, "colebrook": colebrook}
+
+def friction_factor(Re: float, eps_over_D: float, method: str = "serghides") -> float:
+    if Re < RE_LAM:
+        return 64.0 / max(Re, 1e-12)
+    turb = _TURB[method]
+    if Re >= RE_TURB:
+        return turb(Re, eps_over_D)
+    w = (Re - RE_LAM) / (RE_TURB - RE_LAM)
+    return (1.0 - w) * 64.0 / Re + w * turb(RE_TURB, eps_over_D)
+
+def _serghides_array(Re: np.ndarray, a: np.ndarray) -> np.ndarray:
+    A = -2.0 * np.log10(a + 12.0 / Re)
+    B = -2.0 * np.log10(a + 2.51 * A / Re)
+    C = -2.0 * np.log10(a + 2.51 * B / Re)
+    x = A - (B - A) ** 2 / (C - 2.0 * B + A)
+    return 1.0 / (x * x)
+
+def _haaland_array(Re: np.ndarray, a: np.ndarray) -> np.ndarray:
+    x = -1.8 * np.log10(a ** 1.11 + 6.9 / Re)
+    return 1.0 / (x * x)
+
+def _colebrook_array(Re: np.ndarray, a: np.ndarray, tol: float = 1e-12, max_iter: int = 50) -> np.ndarray:
+    x = -1.8 * np.log10(a ** 1.11 + 6.9 / Re)
+    for _ in range(max_iter):
+        x_new = -2.0 * np.log10(a + 2.51 * x / Re)
+        done = np.max(np.abs(x_new - x)) < tol
+        x = x_new
+        if done:
+            break
+    return 1.0 / (x * x)
+
+_TURB_ARRAY = {"serghides": _serghides_array, "haaland": _haaland_array, "colebrook": _colebrook_array}
+
+def friction_factor_array(Re, eps_over_D, method: str = "serghides") -> np.ndarray:
+    Re, rr = np.broadcast_arrays(np.asarray(Re, dtype=float), np.asarray(eps_over_D, dtype=float))
+    Re = np.maximum(Re, 1e-12)
+    a = rr / 3.7
+    turb = _TURB_ARRAY[method]
+    f_lam = 64.0 / Re
+    f_turb = turb(np.maximum(Re, RE_TURB), a)
+    w = np.clip((Re - RE_LAM) / (RE_TURB - RE_LAM), 0.0, 1.0)
+    f_blend = (1.0 - w) * f_lam + w * f_turb
+    return np.where(Re < RE_LAM, f_lam, np.where(Re >= RE_TURB, f_turb, f_blend))
+
+def accuracy_report(
+    Re: np.ndarray | None = None,
+    eps_over_D: np.ndarray | None = None,
+    methods: List[str] = ("serghides", "haaland"),
+) -> Dict[str, Dict[str, float]]:
+    Re = np.logspace(np.log10(RE_TURB), 8.0, 200) if Re is None else np.asarray(Re, dtype=float)
+    rr = np.array([0.0, 1e-6, 1e-5, 1e-4, 1e-3, 5e-3, 1e-2, 5e-2]) if eps_over_D is None else np.asarray(eps_over_D, dtype=float)
+    Re_g, rr_g = np.meshgrid(Re, rr, indexing="ij")
+    ref = np.vectorize(colebrook)(Re_g, rr_g)
+    out = {}
+    for m in methods:
+        rel = np.abs(friction_factor_array(Re_g, rr_g, m) / ref - 1.0)
+        k = np.unravel_index(np.argmax(rel), rel.shape)
+        out[m] = {
+            "max_rel_err": float(rel[k]),
+            "mean_rel_err": float(rel.mean()),
+            "worst_Re": float(Re_g[k]),
+            "worst_eps_over_D": float(rr_g[k]),
+        }
+    return out
+
+def main() -> int:
+    for m, r in accuracy_report().items():
+        print(
+            f"[INFO] {m:<10} vs Colebrook: max {r['max_rel_err']:.2e} (Re={r['worst_Re']:.3g}, e/D={r['worst_eps_over_D']:.0e}), "
+            f"mean {r['mean_rel_err']:.2e}"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
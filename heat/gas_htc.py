@@ -5,6 +5,8 @@ from common.units import Q_
 from common.models import GasStream
 from common.props import GasProps
 from combustion.mass_mole import to_mole
+from common.profiling import timed
+from common.stage_specs import StageSpec
 
 _gas = GasProps(mech_path="config/flue_cantera.yaml", phase="gas_mix")
 
@@ -19,14 +21,18 @@ def _gas_partials(g):
     xCO2 = X.get("CO2", 0.0)
     return xH2O * P, xCO2 * P
 
+def gas_step_props(g: GasStream) -> Dict[str, float]:
+    p = _gas.state(g.T, g.P, g.comp)
+    p["pH2O"], p["pCO2"] = _gas_partials(g)
+    return p
+
 _A = np.array([0.434, 0.313, 0.180, 0.073])
 _K = np.array([0.0, 2.3, 11.6, 30.4])
 
-def _mean_beam_length(spec: dict) -> Q_:
-    if "rad_Lb" in spec:
-        return spec["rad_Lb"].to("m")
-    Dh = spec["hot_Dh"].to("m")
-    return (0.9 * Dh).to("m")
+def _mean_beam_length(si: StageSpec) -> float:
+    if si.rad_Lb is not None:
+        return si.rad_Lb
+    return 0.9 * si.hot_Dh
 
 def emissivity(T_K: float, pH2O_Pa: float, pCO2_Pa: float, L_m: float, *, Texp: float = 0.65) -> float:
     T = float(np.clip(T_K, 300.0, 3000.0))
@@ -38,6 +44,16 @@ def emissivity(T_K: float, pH2O_Pa: float, pCO2_Pa: float, L_m: float, *, Texp:
     eps = 1.0 - float(np.sum(_A * np.exp(-tau)))
     return float(np.clip(eps, 0.0, 1.0))
 
+def emissivity_array(T_K: np.ndarray, pH2O_Pa: np.ndarray, pCO2_Pa: np.ndarray, L_m: np.ndarray | float, *, Texp: float = 0.65) -> np.ndarray:
+    T = np.clip(np.asarray(T_K, dtype=float), 300.0, 3000.0)
+    scale_T = (T / 1000.0) ** Texp
+
+    p_ratio = (np.asarray(pH2O_Pa, dtype=float) + np.asarray(pCO2_Pa, dtype=float)) / 101325.0
+    tau = (scale_T * p_ratio * np.asarray(L_m, dtype=float))[..., None] * _K
+
+    eps = 1.0 - np.sum(_A * np.exp(-tau), axis=-1)
+    return np.clip(eps, 0.0, 1.0)
+
 def h_rad(Tfilm_K: float, eps_g: float, F: float = 1.0) -> float:
     sigma = 5.670374419e-8
     return 4.0 * sigma * F * eps_g * Tfilm_K**3
@@ -47,38 +63,29 @@ def h_gas_rad_smith(T_K: float, pH2O_Pa: float, pCO2_Pa: float, L_m: float, Twal
     Tfilm = 0.5 * (T_K + Twall_K)
     return h_rad(Tfilm, eps, F)
 
-def _h_rad(g: GasStream, spec: Dict[str, Any], Tgw: Q_) -> Q_:
-    Tg = g.T
-    pH2O, pCO2 = _gas_partials(g)
-    Lb = _mean_beam_length(spec).to("m").magnitude
-    F = float(spec.get("rad_F", 1.0))
-    Texp = float(spec.get("rad_Texp", 0.65))
-    h_val = h_gas_rad_smith(Tg.to("K").magnitude, pH2O, pCO2, Lb, Tgw.to("K").magnitude, F, Texp=Texp)
-    return Q_(max(h_val, 0.0), "W/m^2/K")
-
-def _reynolds(rho: Q_, V: Q_, D: Q_, mu: Q_) -> float:
-    Re = (rho * V * D / mu).to("").magnitude
-    return max(Re, 1e-12)
-
-def _prandtl(cp: Q_, mu: Q_, k: Q_) -> float:
-    Pr = (cp * mu / k).to("").magnitude
-    return max(Pr, 1e-12)
-
-def _vel_internal(g: GasStream, A: Q_) -> Q_:
-    rho = _gas.rho(g.T, g.P, g.comp)
-    return (g.mass_flow / (rho * A)).to("m/s")
-
-def _vel_external(g: GasStream, A_bulk: Q_, umax_factor: Q_ | float | None) -> Q_:
-    rho = _gas.rho(g.T, g.P, g.comp)
-    V_bulk = (g.mass_flow / (rho * A_bulk)).to("m/s")
+def _h_rad(g: GasStream, si: StageSpec, Tgw: Q_, props: Dict[str, float]) -> float:
+    pH2O, pCO2 = props["pH2O"], props["pCO2"]
+    h_val = h_gas_rad_smith(g.T.to("K").magnitude, pH2O, pCO2, _mean_beam_length(si), Tgw.to("K").magnitude, si.rad_F, Texp=si.rad_Texp)
+    return max(h_val, 0.0)
+
+def _reynolds(rho: float, V: float, D: float, mu: float) -> float:
+    return max(rho * V * D / mu, 1e-12)
+
+def _prandtl(cp: float, mu: float, k: float) -> float:
+    return max(cp * mu / k, 1e-12)
+
+def _vel_internal(g: GasStream, A: float, rho: float) -> float:
+    return g.mass_flow.to("kg/s").magnitude / (rho * A)
+
+def _vel_external(g: GasStream, A_bulk: float, umax_factor: float | None, rho: float) -> float:
+    V_bulk = g.mass_flow.to("kg/s").magnitude / (rho * A_bulk)
     if umax_factor is None:
         return V_bulk
-    f = umax_factor if isinstance(umax_factor, (int, float)) else umax_factor.to("").magnitude
-    return (max(f, 1.0) * V_bulk).to("m/s")
+    return max(umax_factor, 1.0) * V_bulk
 
-def _nu_internal(Re: float, Pr: float, D: Q_, L: Q_) -> float:
+def _nu_internal(Re: float, Pr: float, D: float, L: float) -> float:
     if Re < 2300.0:
-        Gz = Re * Pr * (D.to("m").magnitude / max(L.to("m").magnitude, 1e-12))
+        Gz = Re * Pr * (D / max(L, 1e-12))
         return 3.66 + 0.0668 * Gz / (1.0 + 0.04 * (Gz ** (2.0/3.0)))
     f = (0.79 * np.log(Re) - 1.64) ** -2
     num = (f/8.0) * (Re - 1000.0) * Pr
@@ -109,59 +116,54 @@ def _nu_zukauskas(Re: float, Pr: float, arrangement: str) -> float | None:
     n = 0.36 if Pr <= 10.0 else 0.25
     return max(C * (Re**m) * (Pr**n), 1e-12)
 
-def _h_from_Nu(Nu: float, k: Q_, D: Q_) -> Q_:
-    return (Q_(Nu, "") * k / D).to("W/m^2/K")
+def _bulk(props: Dict[str, float]) -> Tuple[float, float, float, float]:
+    return props["rho"], props["mu"], props["k"], props["cp"]
 
-def _h_conv_internal(g: GasStream, spec: dict) -> Q_:
-    D = spec["inner_diameter"].to("m")
-    L = spec["inner_length"].to("m")
-    A = spec["hot_flow_A"].to("m^2")
+def _h_conv_internal(g: GasStream, si: StageSpec, props: Dict[str, float]) -> float:
+    D = si.inner_diameter
 
-    V   = _vel_internal(g, A)
-    rho = _gas.rho(g.T, g.P, g.comp)
-    mu  = _gas.mu(g.T, g.P, g.comp)
-    k   = _gas.k(g.T, g.P, g.comp)
-    cp  = _gas.cp(g.T, g.P, g.comp)
+    rho, mu, k, cp = _bulk(props)
+    V   = _vel_internal(g, si.hot_flow_A, rho)
 
     Re = _reynolds(rho, V, D, mu)
     Pr = _prandtl(cp, mu, k)
 
-    Nu = _nu_internal(Re, Pr, D, L)
-    return _h_from_Nu(Nu, k, D)
+    Nu = _nu_internal(Re, Pr, D, si.inner_length)
+    return Nu * k / D
 
-def _h_conv_economiser_external(g: GasStream, spec: dict) -> Q_:
-    D = spec["outer_diameter"].to("m")
-    A_bulk = spec["hot_flow_A"].to("m^2")
-    umax = spec.get("umax_factor", None)
+def _h_conv_economiser_external(g: GasStream, si: StageSpec, props: Dict[str, float]) -> float:
+    D = si.outer_diameter
 
-    V   = _vel_external(g, A_bulk, umax)
-    rho = _gas.rho(g.T, g.P, g.comp)
-    mu  = _gas.mu(g.T, g.P, g.comp)
-    k   = _gas.k(g.T, g.P, g.comp)
-    cp  = _gas.cp(g.T, g.P, g.comp)
+    rho, mu, k, cp = _bulk(props)
+    V   = _vel_external(g, si.hot_flow_A, si.umax_factor, rho)
 
     Re = _reynolds(rho, V, D, mu)
     Pr = _prandtl(cp, mu, k)
 
-    arrangement = spec.get("arrangement", "inline")
-    Nu_z = _nu_zukauskas(Re, Pr, arrangement)
+    Nu_z = _nu_zukauskas(Re, Pr, si.arrangement)
     if Nu_z is None:
         Nu_z = _nu_churchill_bernstein(Re, Pr)
-    return _h_from_Nu(Nu_z, k, D)
+    return Nu_z * k / D
 
-def gas_htc_parts(g: GasStream, spec: dict, Tgw: Q_, *, stage_kind: str | None = None) -> Tuple[Q_, Q_]:
-    kind = (stage_kind or spec.get("stage_kind") or "single_tube").lower()
+@timed()
+def gas_htc_parts(
+    g: GasStream, si: StageSpec, Tgw: Q_, *, stage_kind: str | None = None, props: Dict[str, float] | None = None,
+) -> Tuple[Q_, Q_]:
+    kind = (stage_kind or "single_tube").lower()
+    props = props if props is not None else gas_step_props(g)
 
     if kind in ("single_tube", "reversal_chamber", "tube_bank"):
-        h_conv = _h_conv_internal(g, spec)
+        h_conv = _h_conv_internal(g, si, props)
     elif kind == "economiser":
-        h_conv = _h_conv_economiser_external(g, spec)
+        h_conv = _h_conv_economiser_external(g, si, props)
     else:
-        h_conv = _h_conv_internal(g, spec)
+        h_conv = _h_conv_internal(g, si, props)
 
-    h_rad = _h_rad(g, spec, Tgw)
-    return h_conv.to("W/m^2/K"), h_rad.to("W/m^2/K")
+    return Q_(h_conv, "W/m^2/K"), Q_(_h_rad(g, si, Tgw, props), "W/m^2/K")
 
-def gas_htc(g: GasStream, spec: dict, Tgw: Q_, *, stage_kind: str | None = None) -> Q_:
-    h_conv, h_rad = gas_htc_parts(g, spec, Tgw, stage_kind=stage_kind)
+@timed()
+def gas_htc(
+    g: GasStream, si: StageSpec, Tgw: Q_, *, stage_kind: str | None = None, props: Dict[str, float] | None = None,
+) -> Q_:
+    h_conv, h_rad = gas_htc_parts(g, si, Tgw, stage_kind=stage_kind, props=props)
     return (h_conv + h_rad).to("W/m^2/K")
@@ -1,14 +1,55 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from math import pi
 from dataclasses import replace
-from typing import List
+from types import MappingProxyType
+from typing import List, Tuple
 from common.models import HXStage, Drum
+from common.run_cache import _canon
+from common.stage_specs import typed_spec
 from common.units import Q_
 
+_CACHE_MAX = 32
+_cache: "OrderedDict[str, Tuple[HXStage, ...]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def enrichment_key(stages: List[HXStage], drum: Drum) -> str:
+    doc = {
+        "stages": [{"name": s.name, "kind": s.kind, "spec": _canon(dict(s.spec))} for s in stages],
+        "drum": _canon(drum),
+    }
+    raw = json.dumps(doc, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def clear_enrichment_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
 class GeometryBuilder:
     def __init__(self, drum: Drum):
         self.drum = drum
 
     def enrich(self, stages: List[HXStage]) -> List[HXStage]:
+        key = enrichment_key(stages, self.drum)
+        with _cache_lock:
+            hit = _cache.get(key)
+            if hit is not None:
+                _cache.move_to_end(key)
+                return list(hit)
+
+        out = tuple(
+            replace(s, spec=MappingProxyType(s.spec), si=typed_spec(s.name, s.kind, s.spec))
+            for s in self._enrich(stages)
+        )
+        with _cache_lock:
+            _cache[key] = out
+            while len(_cache) > _CACHE_MAX:
+                _cache.popitem(last=False)
+        return list(out)
+
+    def _enrich(self, stages: List[HXStage]) -> List[HXStage]:
         out: List[HXStage] = []
         for stg in stages:
             if stg.kind == "single_tube":
@@ -1,29 +1,22 @@
 from math import pi, log
 from common.units import Q_
 
-def _nt(spec) -> float:
-    Nt = spec.get("tubes_number", None)
-    return (Nt.to("").magnitude if Nt is not None else 1.0)
+def _nt(si) -> float:
+    Nt = getattr(si, "tubes_number", None)
+    return Nt if Nt is not None else 1.0
 
-def fouling_resistances(spec: dict) -> tuple[Q_, Q_]:
-    di = spec["inner_diameter"].to("m")
-    do = spec["outer_diameter"].to("m")
-    tfi = spec["foul_t_in"].to("m")
-    kfi = spec["foul_k_in"].to("W/m/K")
-    tfo = spec["foul_t_out"].to("m")
-    kfo = spec["foul_k_out"].to("W/m/K")
-    Di_new = di - 2*tfi
-    Rfi = log(di/Di_new)/(2*pi*kfi)
-    do_new = do + 2*tfo
-    Rfo = log(do_new/do)/(2*pi*kfo)
+def fouling_resistances(si) -> tuple[Q_, Q_]:
+    di = si.inner_diameter
+    do = si.outer_diameter
+    Di_new = di - 2*si.foul_t_in
+    Rfi = log(di/Di_new)/(2*pi*si.foul_k_in)
+    do_new = do + 2*si.foul_t_out
+    Rfo = log(do_new/do)/(2*pi*si.foul_k_out)
 
-    Nt = _nt(spec)
-    return (Rfi / Nt).to("K*m/W"), (Rfo / Nt).to("K*m/W")
+    Nt = _nt(si)
+    return Q_(Rfi / Nt, "K*m/W"), Q_(Rfo / Nt, "K*m/W")
 
-def wall_resistance(spec: dict) -> Q_:
-    di = spec["inner_diameter"].to("m")
-    do = spec["outer_diameter"].to("m")
-    k  = spec["wall_k"].to("W/m/K")
-    R = log(do/di) / (2*pi*k)
-    Nt = _nt(spec)
-    return (R / Nt).to("K*m/W")
\ No newline at end of file
+def wall_resistance(si) -> Q_:
+    R = log(si.outer_diameter/si.inner_diameter) / (2*pi*si.wall_k)
+    Nt = _nt(si)
+    return Q_(R / Nt, "K*m/W")
\ No newline at end of file
@@ -1,9 +1,12 @@
 from __future__ import annotations
+from dataclasses import dataclass
+from typing import Sequence
+import numpy as np
 import pandas as pd
-from common.results import GlobalProfile, CombustionResult
+from common.results import GlobalProfile, CombustionResult, StageResult, StepState
 from common.props import WaterProps, GasProps
 from common.units import Q_
-from heat.gas_htc import emissivity 
+from heat.gas_htc import emissivity_array
 from combustion.mass_mole import to_mole
 import cantera as ct
 from common.units import Q_
@@ -11,175 +14,284 @@ from common.constants import T_ref, P_ref
 
 _gas = GasProps()
 
-def _mag_or_nan(q, unit):
-    return q.to(unit).magnitude if q is not None else float("nan")
+@dataclass(frozen=True)
+class OutputSpec:
+    profile: bool = True
+    steps: bool = True
+    summary: bool = True
+
+FULL_OUTPUT = OutputSpec()
+DUTIES_ONLY = OutputSpec(profile=False, steps=False, summary=False)
+
+def stage_duties(stage_results: Sequence[StageResult]) -> dict[str, Q_]:
+    return {sr.stage_name: sr.Q_stage.to("W") for sr in stage_results}
 
 def flue_sensible_to_ref(g) -> Q_:
     h_sens = _gas.h_sensible(g.T, g.P, g.comp).to("J/kg")
     return (g.mass_flow * h_sens).to("MW")
 
-def profile_to_dataframe(gp: "GlobalProfile", *, remap_water: bool = True) -> "pd.DataFrame":
-    stage_ranges: dict[int, tuple[int, int]] = {}
-    for i in range(len(gp.x)):
-        k = gp.stage_index[i]
-        if k not in stage_ranges:
-            stage_ranges[k] = [i, i]
-        else:
-            stage_ranges[k][1] = i
-    stage_ranges = {k: (v[0], v[1]) for k, v in stage_ranges.items()}
-
-    stage_offsets: dict[int, Q_] = {}
+def _col(qs, unit: str) -> np.ndarray:
+    n = len(qs)
+    if n == 0:
+        return np.empty(0)
+    u = qs[0]._units
+    if all(q._units == u for q in qs):
+        mags = np.fromiter((q.magnitude for q in qs), dtype=float, count=n)
+        return Q_(mags, qs[0].units).to(unit).magnitude
+    return np.array([q.to(unit).magnitude for q in qs], dtype=float)
+
+def _stage_attr(stage_results: Sequence[StageResult], attr: str, unit: str) -> np.ndarray:
+    vals = [getattr(sr, attr) for sr in stage_results]
+    return np.array([v.to(unit).magnitude if v is not None else np.nan for v in vals], dtype=float)
+
+def _fill_states(st: dict[str, np.ndarray], comps: Sequence, gas_T: np.ndarray, gas_P: np.ndarray, water_P: np.ndarray, water_h: np.ndarray) -> dict[str, np.ndarray]:
+    missing: dict[int, list[int]] = {}
+    for i in np.flatnonzero(np.isnan(st["gas_h"])):
+        missing.setdefault(id(comps[i]), []).append(int(i))
+    for idx in missing.values():
+        gs = _gas.evaluate_many(gas_T[idx], gas_P[idx], comps[idx[0]])
+        ws = WaterProps.state_Ph_many(water_P[idx], water_h[idx])
+        for f in ("h", "rho", "mu"):
+            st[f"gas_{f}"][idx] = gs[f]
+        for f in ("T", "x", "rho", "mu", "cp", "k"):
+            st[f"water_{f}"][idx] = ws[f]
+    return st
+
+def _comp_terms(comps: Sequence, gas_P: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    cache: dict[int, tuple[float, float, float]] = {}
+    n = len(comps)
+    h_ref = np.empty(n)
+    xH2O = np.empty(n)
+    xCO2 = np.empty(n)
+    for i, comp in enumerate(comps):
+        key = id(comp)
+        if key not in cache:
+            X = to_mole({sp: float(q.to("").magnitude) for sp, q in (comp or {}).items()})
+            href = _gas.h(T_ref, Q_(gas_P[i], "Pa"), comp).to("J/kg").magnitude
+            cache[key] = (href, X.get("H2O", 0.0), X.get("CO2", 0.0))
+        h_ref[i], xH2O[i], xCO2[i] = cache[key]
+    return h_ref, xH2O, xCO2
+
+def _stage_slices(k: np.ndarray) -> list[tuple[int, slice]]:
+    n = len(k)
+    cuts = [0, *(np.flatnonzero(np.diff(k)) + 1).tolist(), n] if n else [0]
+    return [(int(k[a]), slice(a, b)) for a, b in zip(cuts[:-1], cuts[1:])]
+
+@dataclass(frozen=True)
+class ProfileArrays:
+    stage_results: Sequence[StageResult]
+    stage_index: np.ndarray
+    stage_name: list[str]
+    stages: list[tuple[int, slice]]
+    x: np.ndarray
+    dx: np.ndarray
+    qprime: np.ndarray
+    UA_prime: np.ndarray
+    qprime_conv: np.ndarray
+    qprime_rad: np.ndarray
+    h_g: np.ndarray
+    h_c: np.ndarray
+    dP_fric: np.ndarray
+    dP_minor: np.ndarray
+    dP_total: np.ndarray
+    w_dP_fric: np.ndarray
+    w_dP_minor: np.ndarray
+    w_dP_tot: np.ndarray
+    gas_T: np.ndarray
+    gas_P: np.ndarray
+    gas_mdot: np.ndarray
+    gas_h: np.ndarray
+    gas_h_ref: np.ndarray
+    gas_rho: np.ndarray
+    gas_mu: np.ndarray
+    gas_xH2O: np.ndarray
+    gas_xCO2: np.ndarray
+    water_P: np.ndarray
+    water_h: np.ndarray
+    water_mdot: np.ndarray
+    water_T: np.ndarray
+    water_x: np.ndarray
+    water_rho: np.ndarray
+    water_mu: np.ndarray
+    water_cp: np.ndarray
+    water_k: np.ndarray
+
+def profile_arrays(gp: "GlobalProfile") -> ProfileArrays:
+    k = np.asarray(gp.stage_index, dtype=int)
+    states = list(gp.state) if len(gp.state) == len(gp.x) else [None] * len(gp.x)
+    st = {f: np.array([getattr(s, f) if s is not None else np.nan for s in states], dtype=float) for f in StepState.__dataclass_fields__}
+    steps = [s for sr in gp.stage_results for s in sr.steps]
+    comps = [g.comp for g in gp.gas]
+    gas_T = _col([g.T for g in gp.gas], "K")
+    gas_P = _col([g.P for g in gp.gas], "Pa")
+    water_P = _col([w.P for w in gp.water], "Pa")
+    water_h = _col([w.h for w in gp.water], "J/kg")
+    st = _fill_states(st, comps, gas_T, gas_P, water_P, water_h)
+    h_ref, xH2O, xCO2 = _comp_terms(comps, gas_P)
+
+    return ProfileArrays(
+        stage_results=gp.stage_results,
+        stage_index=k,
+        stage_name=list(gp.stage_name),
+        stages=_stage_slices(k),
+        x=_col(gp.x, "m"),
+        dx=_col(gp.dx, "m"),
+        qprime=_col(gp.qprime, "W/m"),
+        UA_prime=_col(gp.UA_prime, "W/K/m"),
+        qprime_conv=_col([s.qprime_conv for s in steps], "W/m"),
+        qprime_rad=_col([s.qprime_rad for s in steps], "W/m"),
+        h_g=_col(gp.h_g, "W/m^2/K"),
+        h_c=_col(gp.h_c, "W/m^2/K"),
+        dP_fric=_col(gp.dP_fric, "Pa"),
+        dP_minor=_col(gp.dP_minor, "Pa"),
+        dP_total=_col(gp.dP_total, "Pa"),
+        w_dP_fric=_col(gp.w_dP_fric, "Pa"),
+        w_dP_minor=_col(gp.w_dP_minor, "Pa"),
+        w_dP_tot=_col(gp.w_dP_tot, "Pa"),
+        gas_T=gas_T,
+        gas_P=gas_P,
+        gas_mdot=_col([g.mass_flow for g in gp.gas], "kg/s"),
+        gas_h=st["gas_h"],
+        gas_h_ref=h_ref,
+        gas_rho=st["gas_rho"],
+        gas_mu=st["gas_mu"],
+        gas_xH2O=xH2O,
+        gas_xCO2=xCO2,
+        water_P=water_P,
+        water_h=water_h,
+        water_mdot=_col([w.mass_flow for w in gp.water], "kg/s"),
+        water_T=st["water_T"],
+        water_x=st["water_x"],
+        water_rho=st["water_rho"],
+        water_mu=st["water_mu"],
+        water_cp=st["water_cp"],
+        water_k=st["water_k"],
+    )
+
+def trace_arrays(trace: pd.DataFrame, stage_results: Sequence[StageResult]) -> ProfileArrays:
+    trace = trace.sort_values(["stage_index", "i"], kind="stable")
+    k = trace["stage_index"].to_numpy(dtype=int)
+    c = {name: trace[name].to_numpy(dtype=float) for name in trace.columns if name not in ("stage_name", "boiling")}
+    st = {f: c[f].copy() for f in StepState.__dataclass_fields__}
+    comps = [stage_results[i].steps[0].gas.comp for i in k]
+    st = _fill_states(st, comps, c["gas_T[K]"], c["gas_P[Pa]"], c["water_P[Pa]"], c["water_h[J/kg]"])
+    h_ref, xH2O, xCO2 = _comp_terms(comps, c["gas_P[Pa]"])
+
+    return ProfileArrays(
+        stage_results=stage_results,
+        stage_index=k,
+        stage_name=trace["stage_name"].tolist(),
+        stages=_stage_slices(k),
+        x=c["x[m]"],
+        dx=c["dx[m]"],
+        qprime=c["qprime[W/m]"],
+        UA_prime=c["UA_prime[W/K/m]"],
+        qprime_conv=c["qprime_conv[W/m]"],
+        qprime_rad=c["qprime_rad[W/m]"],
+        h_g=c["h_g[W/m^2/K]"],
+        h_c=c["h_c[W/m^2/K]"],
+        dP_fric=c["dP_fric[Pa]"],
+        dP_minor=c["dP_minor[Pa]"],
+        dP_total=c["dP_total[Pa]"],
+        w_dP_fric=c["w_dP_fric[Pa]"],
+        w_dP_minor=c["w_dP_minor[Pa]"],
+        w_dP_tot=c["w_dP_tot[Pa]"],
+        gas_T=c["gas_T[K]"],
+        gas_P=c["gas_P[Pa]"],
+        gas_mdot=c["gas_mdot[kg/s]"],
+        gas_h=st["gas_h"],
+        gas_h_ref=h_ref,
+        gas_rho=st["gas_rho"],
+        gas_mu=st["gas_mu"],
+        gas_xH2O=xH2O,
+        gas_xCO2=xCO2,
+        water_P=c["water_P[Pa]"],
+        water_h=c["water_h[J/kg]"],
+        water_mdot=c["water_mdot[kg/s]"],
+        water_T=st["water_T"],
+        water_x=st["water_x"],
+        water_rho=st["water_rho"],
+        water_mu=st["water_mu"],
+        water_cp=st["water_cp"],
+        water_k=st["water_k"],
+    )
+
+def profile_to_dataframe(gp: "GlobalProfile | None" = None, *, remap_water: bool = True, arrays: ProfileArrays | None = None) -> "pd.DataFrame":
+    pa = arrays if arrays is not None else profile_arrays(gp)
+    stage_results = pa.stage_results
+    k = pa.stage_index
+    n = len(k)
+    idx = np.arange(n)
+
+    j = idx.copy()
+    if remap_water:
+        for k_s, s in pa.stages:
+            if not stage_results[k_s].water_counterflow:
+                j[s] = j[s][::-1]
+
+    offsets = np.zeros(len(stage_results))
     offset = Q_(0.0, "m")
-    for k, sr in enumerate(gp.stage_results):
-        stage_offsets[k] = offset
+    for i, sr in enumerate(stage_results):
+        offsets[i] = offset.magnitude
         if sr.steps:
             last = sr.steps[-1]
             offset = (offset + last.x + last.dx).to("m")
 
-    rows = []
-    for i in range(len(gp.x)):
-        g = gp.gas[i]
-
-        k_stage = gp.stage_index[i]
-        disable_water_hydraulics = (k_stage <= 4)
-        sr_stage = gp.stage_results[k_stage]
-        A_hot = sr_stage.hot_flow_A
-        A_cold = sr_stage.cold_flow_A
-        Dh_hot = sr_stage.hot_Dh
-        Dh_cold = sr_stage.cold_Dh
-
-        if remap_water:
-            i0, iN = stage_ranges[gp.stage_index[i]]
-            i_local = i - i0
-            j = iN - i_local
-        else:
-            j = i
-
-        w = gp.water[j]
-
-        xq = WaterProps.quality_from_Ph(w.P, w.h)
-        Two_phase = xq is not None
-
-        if Two_phase:
-            Tw = WaterProps.Tsat(w.P)
-            w_cp = w_mu = w_k = None
-            w_rho = WaterProps.rho_from_Px(w.P, xq) if xq is not None else None
-        else:
-            Tw   = WaterProps.T_from_Ph(w.P, w.h)
-            w_cp = WaterProps.cp_from_Ph(w.P, w.h)
-            w_mu = WaterProps.mu_from_Ph(w.P, w.h)
-            w_k  = WaterProps.k_from_Ph(w.P, w.h)
-            w_rho = WaterProps.rho_from_Ph(w.P, w.h)
-
-        g_h   = _gas.h_sensible(g.T, g.P, g.comp)
-        g_mu  = _gas.mu(g.T, g.P, g.comp)
-        g_rho = _gas.rho(g.T, g.P, g.comp)
-
-        gas_V = (g.mass_flow / (g_rho * A_hot)).to("m/s")
-        Re_gas = (g_rho * gas_V * Dh_hot / g_mu).to("").magnitude
-
-        if w_rho is not None and A_cold is not None:
-            water_V = (w.mass_flow / (w_rho * A_cold)).to("m/s")
-        else:
-            water_V = None
-
-        if w_rho is not None and w_mu is not None and water_V is not None:
-            Re_water = (w_rho * water_V * Dh_cold / w_mu).to("").magnitude
-        else:
-            Re_water = float("nan")
-
-        if disable_water_hydraulics:
-            water_V = None
-            Re_water = float("nan")
-            w_cp = w_mu = w_k = w_rho = None
-            w_dP_fric = w_dP_minor = w_dP_tot = float("nan")
-        else:
-            if Two_phase:
-                Tw = WaterProps.Tsat(w.P)
-                w_cp = w_mu = w_k = None
-                w_rho = WaterProps.rho_from_Px(w.P, xq) if xq is not None else None
-            else:
-                Tw   = WaterProps.T_from_Ph(w.P, w.h)
-                w_cp = WaterProps.cp_from_Ph(w.P, w.h)
-                w_mu = WaterProps.mu_from_Ph(w.P, w.h)
-                w_k  = WaterProps.k_from_Ph(w.P, w.h)
-                w_rho = WaterProps.rho_from_Ph(w.P, w.h)
-
-            if w_rho is not None and A_cold is not None:
-                water_V = (w.mass_flow / (w_rho * A_cold)).to("m/s")
-            else:
-                water_V = None
-
-            if w_rho is not None and w_mu is not None and water_V is not None:
-                Re_water = (w_rho * water_V * Dh_cold / w_mu).to("").magnitude
-            else:
-                Re_water = float("nan")
-
-            w_dP_fric = gp.w_dP_fric[i].to("Pa").magnitude
-            w_dP_minor = gp.w_dP_minor[i].to("Pa").magnitude
-            w_dP_tot = gp.w_dP_tot[i].to("Pa").magnitude
-
-        Y = {sp: float(q.to("").magnitude) for sp, q in (g.comp or {}).items()}
-        X = to_mole(Y)
-
-        xH2O = X.get("H2O", 0.0)
-        xCO2 = X.get("CO2", 0.0)
-
-        P_Pa = g.P.to("Pa").magnitude
-        pH2O = xH2O * P_Pa
-        pCO2 = xCO2 * P_Pa
-
-        Lb_m = (0.9 * Dh_hot).to("m").magnitude
-        gas_eps = emissivity(
-            g.T.to("K").magnitude,
-            pH2O,
-            pCO2,
-            Lb_m,
-        )
-
-        x_local = gp.x[i].to("m")
-        x_global = (stage_offsets[k_stage] + x_local).to("m")
-
-        row = {
-            "stage_name": gp.stage_name[i],
-            "i": i,
-            "x[m]": x_global.magnitude,
-            "dx[m]": gp.dx[i].to("m").magnitude,
-            "qprime[MW/m]": gp.qprime[i].to("MW/m").magnitude,
-            "UA_prime[MW/K/m]": gp.UA_prime[i].to("MW/K/m").magnitude,
-            "gas_P[kPa]": g.P.to("kPa").magnitude,
-            "gas_T[°C]": g.T.to("degC").magnitude,
-            "gas_h[kJ/kg]": g_h.to("kJ/kg").magnitude,
-            "water_P[kPa]": w.P.to("kPa").magnitude,
-            "water_T[°C]": Tw.to("degC").magnitude,
-            "water_h[kJ/kg]": w.h.to("kJ/kg").magnitude,
-            "gas_eps[-]": gas_eps,
-            "water_x[-]": _mag_or_nan(xq, ""),
-            "boiling": "true" if xq is not None else "false",
-            "gas_V[m/s]": gas_V.to("m/s").magnitude,
-            "Re_gas[-]": Re_gas,
-            "h_gas[W/m^2/K]": gp.h_g[i].to("W/m^2/K").magnitude,
-            "water_V[m/s]": (_mag_or_nan(water_V, "m/s") if isinstance(water_V, Q_) else float("nan")),
-            "Re_water[-]": Re_water,
-            "h_water[W/m^2/K]": gp.h_c[i].to("W/m^2/K").magnitude,
-            "dP_fric[kPa]": gp.dP_fric[i].to("kPa").magnitude,
-            "dP_minor[kPa]": gp.dP_minor[i].to("kPa").magnitude,
-            "dP_total[kPa]": gp.dP_total[i].to("kPa").magnitude,
-            "water_dP_fric[kPa]":  (w_dP_fric if disable_water_hydraulics else gp.w_dP_fric[i].to("kPa").magnitude),
-            "water_dP_minor[kPa]": (w_dP_minor if disable_water_hydraulics else gp.w_dP_minor[i].to("kPa").magnitude),
-            "water_dP_total[kPa]": (w_dP_tot if disable_water_hydraulics else gp.w_dP_tot[i].to("kPa").magnitude),
-            "water_cp[kJ/kg/K]": _mag_or_nan(w_cp, "kJ/kg/K"),
-            "water_mu[Pa*s]": _mag_or_nan(w_mu, "Pa*s"),
-            "water_k[W/m/K]": _mag_or_nan(w_k, "W/m/K"),
-            "water_rho[kg/m^3]": _mag_or_nan(w_rho, "kg/m^3"),
-        }
-
-        rows.append(row)
-
-    return pd.DataFrame(rows)
-
-
-def summary_from_profile(gp: "GlobalProfile", combustion: CombustionResult | None = None, drum_pressure: Q_ | None = None) -> tuple[list[dict], float, float]:
+    A_hot = _stage_attr(stage_results, "hot_flow_A", "m^2")[k]
+    Dh_hot = _stage_attr(stage_results, "hot_Dh", "m")[k]
+    A_cold = _stage_attr(stage_results, "cold_flow_A", "m^2")[k]
+    Dh_cold = _stage_attr(stage_results, "cold_Dh", "m")[k]
+
+    gas_V = pa.gas_mdot / (pa.gas_rho * A_hot)
+    Re_gas = pa.gas_rho * gas_V * Dh_hot / pa.gas_mu
+
+    water_rho = pa.water_rho[j]
+    water_mu = pa.water_mu[j]
+    water_x = pa.water_x[j]
+    water_V = pa.water_mdot[j] / (water_rho * A_cold)
+    Re_water = water_rho * water_V * Dh_cold / water_mu
+
+    gas_eps = emissivity_array(pa.gas_T, pa.gas_xH2O * pa.gas_P, pa.gas_xCO2 * pa.gas_P, 0.9 * Dh_hot)
+
+    pool = k <= 4
+    nan = np.nan
+
+    return pd.DataFrame({
+        "stage_name": pa.stage_name,
+        "i": idx,
+        "x[m]": offsets[k] + pa.x,
+        "dx[m]": pa.dx,
+        "qprime[MW/m]": pa.qprime / 1e6,
+        "UA_prime[MW/K/m]": pa.UA_prime / 1e6,
+        "gas_P[kPa]": pa.gas_P / 1e3,
+        "gas_T[°C]": pa.gas_T - 273.15,
+        "gas_h[kJ/kg]": (pa.gas_h - pa.gas_h_ref) / 1e3,
+        "water_P[kPa]": pa.water_P[j] / 1e3,
+        "water_T[°C]": pa.water_T[j] - 273.15,
+        "water_h[kJ/kg]": pa.water_h[j] / 1e3,
+        "gas_eps[-]": gas_eps,
+        "water_x[-]": water_x,
+        "boiling": np.where(np.isnan(water_x), "false", "true"),
+        "gas_V[m/s]": gas_V,
+        "Re_gas[-]": Re_gas,
+        "h_gas[W/m^2/K]": pa.h_g,
+        "water_V[m/s]": np.where(pool, nan, water_V),
+        "Re_water[-]": np.where(pool, nan, Re_water),
+        "h_water[W/m^2/K]": pa.h_c,
+        "dP_fric[kPa]": pa.dP_fric / 1e3,
+        "dP_minor[kPa]": pa.dP_minor / 1e3,
+        "dP_total[kPa]": pa.dP_total / 1e3,
+        "water_dP_fric[kPa]": np.where(pool, nan, pa.w_dP_fric / 1e3),
+        "water_dP_minor[kPa]": np.where(pool, nan, pa.w_dP_minor / 1e3),
+        "water_dP_total[kPa]": np.where(pool, nan, pa.w_dP_tot / 1e3),
+        "water_cp[kJ/kg/K]": np.where(pool, nan, pa.water_cp[j] / 1e3),
+        "water_mu[Pa*s]": np.where(pool, nan, water_mu),
+        "water_k[W/m/K]": np.where(pool, nan, pa.water_k[j]),
+        "water_rho[kg/m^3]": np.where(pool, nan, water_rho),
+    })
+
+
+def summary_from_profile(gp: "GlobalProfile | None" = None, combustion: CombustionResult | None = None, drum_pressure: Q_ | None = None, *, arrays: ProfileArrays | None = None) -> tuple[list[dict], float, float]:
     rows = []
     Q_total = 0.0
     UA_total = 0.0
@@ -203,105 +315,81 @@ def summary_from_profile(gp: "GlobalProfile", combustion: CombustionResult | Non
     feedwater_mdot_q = None
 
 
-    import itertools
-    for k, grp in itertools.groupby(range(len(gp.x)), key=lambda i: gp.stage_index[i]):
-        disable_water_hydraulics = (k <= 4) 
-        idxs = list(grp)
-        name = gp.stage_name[idxs[0]]
-        sr_stage = gp.stage_results[k]
+    pa = arrays if arrays is not None else profile_arrays(gp)
+    stage_results = pa.stage_results
+    A_hot_all = _stage_attr(stage_results, "hot_flow_A", "m^2")
+    A_cold_all = _stage_attr(stage_results, "cold_flow_A", "m^2")
 
-        A_hot = sr_stage.hot_flow_A
-        A_cold = sr_stage.cold_flow_A
-
-        gas_V_sum = 0.0
-        water_V_sum = 0.0
-        n_steps = len(idxs)
-
-        for i in idxs:
-            g = gp.gas[i]
-            w = gp.water[i]
-
-            g_rho = _gas.rho(g.T, g.P, g.comp)
-            gas_V = (g.mass_flow / (g_rho * A_hot)).to("m/s").magnitude
-            gas_V_sum += gas_V
-
-            if A_cold is not None:
-                w_rho = WaterProps.rho_from_Ph(w.P, w.h)
-                water_V = (w.mass_flow / (w_rho * A_cold)).to("m/s").magnitude
-                water_V_sum += water_V
+    for k, s in pa.stages:
+        disable_water_hydraulics = (k <= 4) 
+        i0, i1 = s.start, s.stop - 1
+        name = pa.stage_name[i0]
 
-        gas_V_avg = gas_V_sum / max(n_steps, 1)
-        if disable_water_hydraulics or A_cold is None:
+        gas_V_avg = float(np.mean(pa.gas_mdot[s] / (pa.gas_rho[s] * A_hot_all[k])))
+        if disable_water_hydraulics or np.isnan(A_cold_all[k]):
             water_V_avg = float("nan")
         else:
-            water_V_avg = water_V_sum / max(n_steps, 1)
+            water_V_avg = float(np.mean(pa.water_mdot[s] / (pa.water_rho[s] * A_cold_all[k])))
 
-        Q_stage = sum((gp.qprime[i] * gp.dx[i]).to("MW").magnitude for i in idxs)
-        UA_stage = sum((gp.UA_prime[i] * gp.dx[i]).to("MW/K").magnitude for i in idxs)
+        Q_stage = float(np.sum(pa.qprime[s] * pa.dx[s])) / 1e6
+        UA_stage = float(np.sum(pa.UA_prime[s] * pa.dx[s])) / 1e6
 
-        Q_stage_conv = sum((st.qprime_conv * st.dx).to("MW").magnitude for st in sr_stage.steps)
-        Q_stage_rad  = sum((st.qprime_rad  * st.dx).to("MW").magnitude for st in sr_stage.steps)
+        Q_stage_conv = float(np.sum(pa.qprime_conv[s] * pa.dx[s])) / 1e6
+        Q_stage_rad  = float(np.sum(pa.qprime_rad[s]  * pa.dx[s])) / 1e6
 
-        dP_fric = sum(gp.dP_fric[i].to("kPa").magnitude for i in idxs)
-        dP_minor = sum(gp.dP_minor[i].to("kPa").magnitude for i in idxs)
-        dP_total = sum(gp.dP_total[i].to("kPa").magnitude for i in idxs)
+        dP_fric = float(np.sum(pa.dP_fric[s])) / 1e3
+        dP_minor = float(np.sum(pa.dP_minor[s])) / 1e3
+        dP_total = float(np.sum(pa.dP_total[s])) / 1e3
     
-        w_dP_fric = sum(gp.w_dP_fric[i].to("kPa").magnitude for i in idxs)
-        w_dP_minor = sum(gp.w_dP_minor[i].to("kPa").magnitude for i in idxs)
-        w_dP_tot = sum(gp.w_dP_tot[i].to("kPa").magnitude for i in idxs) 
-
-        g_in  = gp.gas[idxs[0]]
-        g_out = gp.gas[idxs[-1]]
+        w_dP_fric = float(np.sum(pa.w_dP_fric[s])) / 1e3
+        w_dP_minor = float(np.sum(pa.w_dP_minor[s])) / 1e3
+        w_dP_tot = float(np.sum(pa.w_dP_tot[s])) / 1e3
 
-        gas_in_T  = g_in.T.to("degC").magnitude
-        gas_out_T = g_out.T.to("degC").magnitude
+        gas_in_T  = pa.gas_T[i0] - 273.15
+        gas_out_T = pa.gas_T[i1] - 273.15
 
-        gas_in_P  = g_in.P.to("kPa").magnitude
-        gas_out_P = g_out.P.to("kPa").magnitude
+        gas_in_P  = pa.gas_P[i0] / 1e3
+        gas_out_P = pa.gas_P[i1] / 1e3
 
-        gas_in_h  = _gas.h_sensible(g_in.T,  g_in.P,  g_in.comp).to("kJ/kg").magnitude
-        gas_out_h = _gas.h_sensible(g_out.T, g_out.P, g_out.comp).to("kJ/kg").magnitude
+        gas_in_h  = (pa.gas_h[i0] - pa.gas_h_ref[i0]) / 1e3
+        gas_out_h = (pa.gas_h[i1] - pa.gas_h_ref[i1]) / 1e3
 
-        w_in  = gp.water[idxs[0]]
-        w_out = gp.water[idxs[-1]]
+        w0, w1 = (i1, i0) if stage_results[k].water_counterflow else (i0, i1)
 
-        water_in_h  = w_in.h.to("kJ/kg").magnitude
-        water_out_h = w_out.h.to("kJ/kg").magnitude
+        water_in_h  = pa.water_h[w0] / 1e3
+        water_out_h = pa.water_h[w1] / 1e3
 
-        water_in_P  = w_in.P.to("kPa").magnitude
-        water_out_P = w_out.P.to("kPa").magnitude
+        water_in_P  = pa.water_P[w0] / 1e3
+        water_out_P = pa.water_P[w1] / 1e3
 
-        water_in_T  = WaterProps.T_from_Ph(w_in.P,  w_in.h).to("degC").magnitude
-        water_out_T = WaterProps.T_from_Ph(w_out.P, w_out.h).to("degC").magnitude
+        water_in_T  = pa.water_T[w0] - 273.15
+        water_out_T = pa.water_T[w1] - 273.15
 
         if flue_mdot_kg_s is None:
-            flue_mdot_kg_s = g_in.mass_flow.to("kg/s").magnitude
+            flue_mdot_kg_s = float(pa.gas_mdot[i0])
 
         if k == 0:
             boiler_water_out_T_C = water_out_T
 
-        if k == len(gp.stage_results) - 1:
+        if k == len(stage_results) - 1:
             boiler_water_in_T_C = water_in_T
             boiler_water_in_P_kPa = water_in_P
 
             try:
-                feedwater_mdot_q = gp.stage_results[k].steps[0].water.mass_flow.to("kg/s")
+                feedwater_mdot_q = stage_results[k].steps[0].water.mass_flow.to("kg/s")
                 feedwater_mdot_kg_s = feedwater_mdot_q.magnitude
             except Exception:
                 feedwater_mdot_q = None
                 feedwater_mdot_kg_s = None
 
-            try:
-                econ_out_h_Jkg = w_out.h.to("J/kg")
-            except Exception:
-                econ_out_h_Jkg = None
+            econ_out_h_Jkg = Q_(pa.water_h[w1], "J/kg")
 
 
 
         row = {
             "stage_index": k,
             "stage_name": name,
-            "stage_kind": gp.stage_results[k].stage_kind,
+            "stage_kind": stage_results[k].stage_kind,
             "Q_stage[MW]": Q_stage,
             "UA_stage[MW/K]": UA_stage,
             "gas_V_avg[m/s]": gas_V_avg,
@@ -429,6 +517,7 @@ def summary_from_profile(gp: "GlobalProfile", combustion: CombustionResult | Non
     eta_indirect = None
     Stack_loss_fraction = None
     Q_flue_out_MW = None
+    Q_balance_err_MW = None
 
     Q_useful = Q_useful_hx
 
@@ -446,7 +535,7 @@ def summary_from_profile(gp: "GlobalProfile", combustion: CombustionResult | Non
 
         # Stack sensible loss to reference
         try:
-            g_stack = gp.gas[-1]
+            g_stack = stage_results[-1].steps[-1].gas
             Q_flue_out_MW = flue_sensible_to_ref(g_stack).to("MW").magnitude
         except Exception:
             Q_flue_out_MW = None
@@ -5,9 +5,11 @@ from common.units import Q_
 from heat.geometry import GeometryBuilder
 from heat.solver import solve_exchanger
 from common.models import HXStage, WaterStream, GasStream, Drum
-from common.results import build_global_profile,CombustionResult
-from heat.postproc import profile_to_dataframe, summary_from_profile
+from common.results import build_global_profile, CombustionResult, StageResult
+from heat.postproc import FULL_OUTPUT, OutputSpec, profile_arrays, profile_to_dataframe, stage_duties, summary_from_profile, trace_arrays
 from common.props import WaterProps
+from common.step_sink import StageTraceSink
+from common.stage_cache import StageCache
 
 
 def _q_or_none(s: Optional[str]) -> Optional[Q_]:
@@ -29,11 +31,16 @@ def run_hx(
     max_passes: int = 20,
     tol_Q: str = "1e-3 W",
     tol_end: str = "1e-3 J/kg",
+    econ_solver: str = "shooting",
     write_csv: bool,
     outdir: str | Path = "results/runs",
     run_id: str | None = None,
     log_level: str = "INFO",
     combustion: CombustionResult | None = None,
+    seed_results: List[StageResult] | None = None,
+    outputs: OutputSpec = FULL_OUTPUT,
+    sink: StageTraceSink | None = None,
+    stage_cache: StageCache | None = None,
 ) -> Dict[str, Any]:
     
     outdir = Path(outdir)
@@ -72,17 +79,25 @@ def run_hx(
         max_passes=max_passes,
         tol_Q=tol_Q_q,
         tol_end=tol_end_q,
+        econ_solver=econ_solver,
         log_level=log_level,
+        seed_results=seed_results,
+        sink=sink,
+        stage_cache=stage_cache,
     )
 
-    global_profile = build_global_profile(stage_results)
-
-    if write_csv:
-        df_steps = profile_to_dataframe(global_profile)
-    else:
-        df_steps = None
-
-    rows, _, _ = summary_from_profile(global_profile, combustion=combustion, drum_pressure=drum_pressure)
+    global_profile = None
+    df_steps = None
+    rows = None
+    want_steps = write_csv and outputs.steps
+    if sink is None and (outputs.profile or want_steps or outputs.summary):
+        global_profile = build_global_profile(stage_results)
+    if want_steps or outputs.summary:
+        arrays = trace_arrays(sink.read(), stage_results) if sink is not None else profile_arrays(global_profile)
+        if want_steps:
+            df_steps = profile_to_dataframe(arrays=arrays)
+        if outputs.summary:
+            rows, _, _ = summary_from_profile(combustion=combustion, drum_pressure=drum_pressure, arrays=arrays)
 
     return {
         "gas_in": gas,
@@ -90,7 +105,9 @@ def run_hx(
         "gas_out": gas_out,
         "water_out": water_out,
         "stage_results": stage_results,
+        "stage_duties": stage_duties(stage_results),
         "global_profile": global_profile,
+        "trace_dir": str(sink.root) if sink is not None else None,
         "steps_df": df_steps,
         "summary_rows": rows,
         "steps_csv": None,
@@ -1,18 +1,32 @@
 from __future__ import annotations
-from typing import List, Tuple, Optional
-from math import ceil, log10
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional
+from math import ceil, isnan
 import logging
+import time
+
+import numpy as np
+from scipy.linalg import solve_banded
+from scipy.optimize import root_scalar
 
 from common.units import Q_
 from common.models import HXStage, GasStream, WaterStream
-from common.results import StepResult, StageResult
+from common.results import StepResult, StageResult, StepState
+from common.step_sink import StageTraceSink
+from common.stage_cache import StageCache
 from heat.step_solver import solve_step
+from heat.friction import friction_factor
+from heat.gas_htc import gas_step_props
 from common.props import GasProps, WaterProps
 from common.logging_utils import setup_logging
+from common import convergence, profiling
 
 _gasprops = GasProps()
 _gas = GasProps()
 
+SHOOT_MAX_BRACKET = 40
+SHOOT_MAX_BRENTQ = 100
+
 def _clamp(v: int, lo: int, hi: int) -> int:
     return max(lo, min(hi, v))
 
@@ -36,6 +50,7 @@ def _copy_step_with_stage(
     w_dP_fric: Q_ | None = None,
     w_dP_minor: Q_ | None = None,
     w_dP_tot: Q_ | None = None,
+    state: StepState | None = None,
 ) -> StepResult:
     return StepResult(
         i=sr.i, x=sr.x, dx=sr.dx,
@@ -53,62 +68,66 @@ def _copy_step_with_stage(
         w_dP_fric=w_dP_fric if w_dP_fric is not None else Q_(0.0, "Pa"),
         w_dP_minor=w_dP_minor if w_dP_minor is not None else Q_(0.0, "Pa"),
         w_dP_tot=w_dP_tot if w_dP_tot is not None else Q_(0.0, "Pa"),
+        state=state if state is not None else sr.state,
     )
 
 def initial_wall_guesses(g: GasStream, w: WaterStream, stage: HXStage) -> tuple[Q_, Q_, Q_]:
     Tg = g.T.to("K")
-    if stage.spec.get("pool_boiling", False):
+    if stage.si.pool_boiling:
         Tw = WaterProps.Tsat(w.P).to("K")
     else:
         Tw = WaterProps.T_from_Ph(w.P, w.h).to("K")
     qprime = Q_(1e4, "W/m")
     return Tg, Tw, qprime
 
-def _colebrook_white_f(Re: float, eps_over_D: float) -> float:
-    Re = max(Re, 1e-6)
-    if Re < 2300.0:
-        return 64.0 / max(Re, 1e-12)
-
-    f = 0.25 / (log10(eps_over_D/3.7 + 5.74/(Re**0.9)) ** 2)
-
-    for _ in range(30):
-        invsqrtf_old = 1.0 / (f ** 0.5)
-        rhs = -2.0 * log10(eps_over_D/3.7 + 2.51/(Re * (f ** 0.5)))
-        invsqrtf = rhs
-        if abs(invsqrtf - invsqrtf_old) < 1e-6:
-            break
-        f = 1.0 / (invsqrtf ** 2)
-    return float(f)
-
-def _friction_factor(Re: float, eps_over_D: float) -> float:
-    if Re < 2300.0:
-        return 64.0 / max(Re, 1e-12)
-    if Re >= 4000.0:
-        return _colebrook_white_f(Re, eps_over_D)
-    f_lam = 64.0 / max(Re, 1e-12)
-    f_turb = _colebrook_white_f(4000.0, eps_over_D)
-    w = (Re - 2300.0) / (4000.0 - 2300.0)
-    return float((1-w) * f_lam + w * f_turb)
-
-def _stage_minor_K_sum(stage: HXStage) -> Q_:
-    spec = stage.spec
+def _stage_minor_K_sum(stage: HXStage) -> float:
+    si = stage.si
     kind = stage.kind.lower()
 
-    K_hot_bend = spec.get("K_hot_bend", None)
-    if K_hot_bend is not None:
-        return K_hot_bend.to("")
+    if si.K_hot_bend is not None:
+        return si.K_hot_bend
 
     if kind == "reversal_chamber":
-        Rc = spec.get("curvature_radius", None)
-        Do = spec.get("outer_diameter", None)
-        if Rc is not None and Do is not None and Rc.to("m").magnitude > 0 and Do.to("m").magnitude > 0:
-            r = (Rc / Do).to("").magnitude
-            Kbend = max(0.2, min(2.0, 0.9 / max(r, 1e-6)))
-        else:
-            Kbend = 0.5
-        return Q_(Kbend, "")
+        Rc = si.curvature_radius
+        Do = si.outer_diameter
+        if Rc > 0 and Do > 0:
+            r = Rc / Do
+            return max(0.2, min(2.0, 0.9 / max(r, 1e-6)))
+        return 0.5
+
+    return 0.0
+
+@dataclass(frozen=True)
+class StageGrid:
+    L: Q_
+    n_steps: int
+    xs: Tuple[Q_, ...]
+    dx: Q_
+    K_bend_per_step: float
+
+def stage_grid(stage: HXStage, n_steps: int) -> StageGrid:
+    if stage.kind.lower() == "economiser":
+        L = Q_(stage.si.hot_flow_length, "m")
+    else:
+        L = Q_(stage.si.inner_length, "m")
+    xs, dx = _make_grid(L, n_steps)
+    return StageGrid(L=L, n_steps=n_steps, xs=tuple(xs), dx=dx, K_bend_per_step=_K_bend_per_step(stage, n_steps, None))
+
+def _K_bend_per_step(stage: HXStage, n_steps: int, grid: StageGrid | None) -> float:
+    if grid is not None:
+        return grid.K_bend_per_step
+    return _stage_minor_K_sum(stage) / max(n_steps, 1)
+
+def _K_minor(K_per_step: float, K_inlet: float, K_outlet: float, i_step: int, n_steps: int) -> float:
+    K = K_per_step
+    if i_step == 0:
+        K = K + K_inlet
+    if i_step == max(n_steps - 1, 0):
+        K = K + K_outlet
+    return K
 
-    return Q_(0.0, "")
+def _dp_result(dP_fric: float, dP_minor: float) -> tuple[Q_, Q_, Q_]:
+    return Q_(dP_fric, "Pa"), Q_(dP_minor, "Pa"), Q_(dP_fric + dP_minor, "Pa")
 
 def _gas_dp_economiser_crossflow(
     g: GasStream,
@@ -116,45 +135,27 @@ def _gas_dp_economiser_crossflow(
     dx: Q_,
     i_step: int,
     n_steps: int,
+    rho: float | None = None,
+    mu: float | None = None,
+    grid: StageGrid | None = None,
 ) -> tuple[Q_, Q_, Q_]:
-    spec = stage.spec
-
-    A_hot = spec["hot_flow_A"].to("m^2")
-    
-    Dh  = spec["hot_Dh"].to("m")
-    eps = spec.get("roughness_out", Q_(0.0, "m")).to("m")
-
-    rho = _gas.rho(g.T, g.P, g.comp)
-    mu  = _gas.mu(g.T, g.P, g.comp)
+    si = stage.si
+    Dh = si.hot_Dh
 
-    V_bulk = (g.mass_flow / (rho * A_hot)).to("m/s")
-    umax_factor_q = spec.get("umax_factor", Q_(1.0, ""))
-    umax_factor = umax_factor_q.to("").magnitude
-    V_char = (V_bulk * max(umax_factor, 1.0)).to("m/s")
+    rho = rho if rho is not None else _gas.rho(g.T, g.P, g.comp).to("kg/m^3").magnitude
+    mu  = mu if mu is not None else _gas.mu(g.T, g.P, g.comp).to("Pa*s").magnitude
 
-    Re = max((rho * V_char * Dh / mu).to("").magnitude, 1e-6)
-    eps_over_D = (eps / Dh).to("").magnitude
+    V_bulk = g.mass_flow.to("kg/s").magnitude / (rho * si.hot_flow_A)
+    umax_factor = si.umax_factor if si.umax_factor is not None else 1.0
+    V_char = V_bulk * max(umax_factor, 1.0)
 
-    f = _friction_factor(Re, eps_over_D)
+    Re = max(rho * V_char * Dh / mu, 1e-6)
+    f = friction_factor(Re, si.roughness_out / Dh)
+    q_dyn = rho * V_char**2 / 2.0
 
-    q_dyn = (rho * V_char**2 / 2.0).to("Pa")
-
-    dP_fric = (-Q_(f, "") * (dx / Dh) * q_dyn).to("Pa")
-
-    K_bend_per_step = spec.get("_K_bend_per_step", Q_(0.0, "")).to("")
-    K_inlet  = spec.get("K_hot_inlet",  Q_(0.0, "")).to("")
-    K_outlet = spec.get("K_hot_outlet", Q_(0.0, "")).to("")
-
-    K_minor = K_bend_per_step
-    if i_step == 0:
-        K_minor = (K_minor + K_inlet).to("")
-    if i_step == max(n_steps - 1, 0):
-        K_minor = (K_minor + K_outlet).to("")
-
-    dP_minor = (-K_minor * q_dyn).to("Pa")
-    dP_total = (dP_fric + dP_minor).to("Pa")
-
-    return dP_fric, dP_minor, dP_total
+    dP_fric = -f * (dx.to("m").magnitude / Dh) * q_dyn
+    K_minor = _K_minor(_K_bend_per_step(stage, n_steps, grid), si.K_hot_inlet, si.K_hot_outlet, i_step, n_steps)
+    return _dp_result(dP_fric, -K_minor * q_dyn)
 
 def _gas_dp_components(
     g: GasStream,
@@ -162,161 +163,161 @@ def _gas_dp_components(
     dx: Q_,
     i_step: int,
     n_steps: int,
+    rho: float | None = None,
+    mu: float | None = None,
+    grid: StageGrid | None = None,
 ) -> tuple[Q_, Q_, Q_]:
     kind = stage.kind.lower()
 
     if kind == "economiser":
-        return _gas_dp_economiser_crossflow(g, stage, dx, i_step, n_steps)
-
-    spec = stage.spec
-    A = spec["hot_flow_A"].to("m^2")
-    Dh = spec["hot_Dh"].to("m")
-    eps = spec.get("roughness_in", Q_(0.0, "m")).to("m")
-    rho = _gas.rho(g.T, g.P, g.comp)
-    mu  = _gas.mu(g.T, g.P, g.comp)
+        return _gas_dp_economiser_crossflow(g, stage, dx, i_step, n_steps, rho, mu, grid)
 
-    V = (g.mass_flow / (rho * A)).to("m/s")
-    Re = max((rho * V * Dh / mu).to("").magnitude, 1e-6)
-    eps_over_D = (eps / Dh).to("").magnitude
+    si = stage.si
+    Dh = si.hot_Dh
+    rho = rho if rho is not None else _gas.rho(g.T, g.P, g.comp).to("kg/m^3").magnitude
+    mu  = mu if mu is not None else _gas.mu(g.T, g.P, g.comp).to("Pa*s").magnitude
 
-    f = _friction_factor(Re, eps_over_D)
-    q = (rho * V**2 / 2.0).to("Pa")
-
-    dP_fric = (-f * (dx / Dh) * q).to("Pa")
-
-    K_bend_per_step = spec.get("_K_bend_per_step", Q_(0.0, "")).to("")
-
-    K_inlet = spec.get("K_hot_inlet", Q_(0.0, "")).to("")
-    K_outlet = spec.get("K_hot_outlet", Q_(0.0, "")).to("")
-
-    K_minor = K_bend_per_step
-
-    if i_step == 0:
-        K_minor = (K_minor + K_inlet).to("")
-
-    if i_step == max(n_steps - 1, 0):
-        K_minor = (K_minor + K_outlet).to("")
+    V = g.mass_flow.to("kg/s").magnitude / (rho * si.hot_flow_A)
+    Re = max(rho * V * Dh / mu, 1e-6)
+    f = friction_factor(Re, si.roughness_in / Dh)
+    q = rho * V**2 / 2.0
 
-    dP_minor = (-K_minor * q).to("Pa")
-    dP_total = (dP_fric + dP_minor).to("Pa")
-    return dP_fric, dP_minor, dP_total
+    dP_fric = -f * (dx.to("m").magnitude / Dh) * q
+    K_minor = _K_minor(_K_bend_per_step(stage, n_steps, grid), si.K_hot_inlet, si.K_hot_outlet, i_step, n_steps)
+    return _dp_result(dP_fric, -K_minor * q)
 
 def pressure_drop_gas(g: GasStream, stage: HXStage, i: int, dx: Q_, n_steps: int) -> Q_:
     _, _, dP_total = _gas_dp_components(g, stage, dx, i, n_steps)
     return dP_total
 
-def _solve_T_for_h(P, X, h_target, T0, maxit=30):
-    T = T0.to("K"); h_target = h_target.to("J/kg")
-    for _ in range(maxit):
-        h  = _gasprops.h(T, P, X)
-        dh = (h_target - h).to("J/kg")
-        if abs(dh).magnitude < 1e-3:
-            return T
-        cp = _gasprops.cp(T, P, X)
-        dT = (dh / cp).to("K")
-        T  = (T + 0.8*dT).to("K")
-    return T
-
-def update_gas_after_step(g, qprime, dx, stage, i: int, n_steps: int) -> GasStream:
+def update_gas_after_step(g, qprime, dx, stage, i: int, n_steps: int, *, h_old: Q_ | None = None, dP: Q_ | None = None) -> GasStream:
     Q_step = (qprime * dx).to("W")
     dh     = (-Q_step / g.mass_flow).to("J/kg")
-    h_old  = _gasprops.h(g.T, g.P, g.comp)
+    if h_old is None:
+        h_old = _gasprops.h(g.T, g.P, g.comp)
     h_new  = (h_old + dh).to("J/kg")
-    T_new  = _solve_T_for_h(g.P, g.comp, h_new, g.T)
-    P_new  = (g.P + pressure_drop_gas(g, stage, i=i, dx=dx, n_steps=n_steps)).to("Pa")
+    T_new  = _gasprops.T_from_h(h_new, g.P, g.comp, g.T)
+    if dP is None:
+        dP = pressure_drop_gas(g, stage, i=i, dx=dx, n_steps=n_steps)
+    P_new  = (g.P + dP).to("Pa")
     return GasStream(mass_flow=g.mass_flow, T=T_new, P=P_new, comp=g.comp)
 
-def _water_dp_components(w: WaterStream, stage: HXStage, dx: Q_, i_step: int, n_steps: int) -> tuple[Q_, Q_, Q_]:
-    spec = stage.spec
+def _water_dp_components(
+    w: WaterStream,
+    stage: HXStage,
+    dx: Q_,
+    i_step: int,
+    n_steps: int,
+    state: Dict[str, float] | None = None,
+) -> tuple[Q_, Q_, Q_]:
+    si = stage.si
     kind = stage.kind.lower()
 
-    if spec.get("pool_boiling", False):
-        z = Q_(0.0, "Pa")
-        return z, z, z
-
-    xq = WaterProps.quality_from_Ph(w.P, w.h)
-    if xq is not None:
-        z = Q_(0.0, "Pa")
-        return z, z, z
-
-
-    dP_fric = Q_(0.0, "Pa")
-    dP_minor = Q_(0.0, "Pa")
+    if si.pool_boiling:
+        return _dp_result(0.0, 0.0)
 
-    if kind == "economiser":
-        A = spec["cold_flow_A"].to("m^2")
-        Dh = spec["cold_Dh"].to("m")
-        eps = spec.get("roughness_cold_surface", Q_(0.0, "m")).to("m")
-
-        rho = WaterProps.rho_from_Ph(w.P, w.h)
-        mu  = WaterProps.mu_from_Ph(w.P, w.h)
-
-        V = (w.mass_flow / (rho * A)).to("m/s")
-        Re = max((rho * V * Dh / mu).to("").magnitude, 1e-6)
-        eps_over_D = (eps / Dh).to("").magnitude
-
-        f = _friction_factor(Re, eps_over_D)
-        q = (rho * V**2 / 2.0).to("Pa")
-
-        f_dx = spec.get("water_dx_factor", Q_(1.0, "")).to("").magnitude
-        dx_w = (dx * Q_(f_dx, "")).to("m")
-
-        dP_fric = (-f * (dx_w / Dh) * q).to("Pa")
+    if state is not None:
+        two_phase = not isnan(state["x"])
     else:
-        A = spec.get("cold_flow_A", None)
-        if A is not None:
-            A = A.to("m^2")
-            rho = WaterProps.rho_from_Ph(w.P, w.h)
-            V = (w.mass_flow / (rho * A)).to("m/s")
-            q = (rho * V**2 / 2.0).to("Pa")
-        else:
-            rho = WaterProps.rho_from_Ph(w.P, w.h)
-            q = Q_(0.0, "Pa")
-
-    K_cold_bend_total = spec.get("K_cold_bend", Q_(0.0, "")).to("")
-    K_cold_bend_per_step = (K_cold_bend_total / max(n_steps, 1)).to("")
+        two_phase = WaterProps.quality_from_Ph(w.P, w.h) is not None
+    if two_phase:
+        return _dp_result(0.0, 0.0)
 
-    K_cold_inlet = spec.get("K_cold_inlet", Q_(0.0, "")).to("")
-    K_cold_outlet = spec.get("K_cold_outlet", Q_(0.0, "")).to("")
+    rho = state["rho"] if state is not None else WaterProps.rho_from_Ph(w.P, w.h).to("kg/m^3").magnitude
+    V = w.mass_flow.to("kg/s").magnitude / (rho * si.cold_flow_A)
+    q = rho * V**2 / 2.0
 
-    K_minor = K_cold_bend_per_step
-
-    if i_step == 0:
-        K_minor = (K_minor + K_cold_inlet).to("")
-
-    if i_step == max(n_steps - 1, 0):
-        K_minor = (K_minor + K_cold_outlet).to("")
-
-    if "q" not in locals():
-        A = spec.get("cold_flow_A", None)
-        if A is not None:
-            A = A.to("m^2")
-            rho = WaterProps.rho_from_Ph(w.P, w.h)
-            V = (w.mass_flow / (rho * A)).to("m/s")
-            q = (rho * V**2 / 2.0).to("Pa")
-        else:
-            q = Q_(0.0, "Pa")
-
-    dP_minor = (-K_minor * q).to("Pa")
+    dP_fric = 0.0
+    if kind == "economiser":
+        Dh = si.cold_Dh
+        mu = state["mu"] if state is not None else WaterProps.mu_from_Ph(w.P, w.h).to("Pa*s").magnitude
+        Re = max(rho * V * Dh / mu, 1e-6)
+        f = friction_factor(Re, si.roughness_cold_surface / Dh)
+        dx_w = dx.to("m").magnitude * si.water_dx_factor
+        dP_fric = -f * (dx_w / Dh) * q
 
-    dP_total = (dP_fric + dP_minor).to("Pa")
-    return dP_fric, dP_minor, dP_total
+    K_minor = _K_minor(si.K_cold_bend / max(n_steps, 1), si.K_cold_inlet, si.K_cold_outlet, i_step, n_steps)
+    return _dp_result(dP_fric, -K_minor * q)
 
-def update_water_after_step(w: WaterStream, qprime: Q_, dx: Q_, stage: HXStage, i: int, n_steps: int) -> WaterStream:
+def update_water_after_step(w: WaterStream, qprime: Q_, dx: Q_, stage: HXStage, i: int, n_steps: int, *, dP: Q_ | None = None, counterflow: bool = False) -> WaterStream:
     Q_step = (qprime * dx).to("W")
     dh = (Q_step / w.mass_flow).to("J/kg")
-    h_new = (w.h + dh).to("J/kg")
+    h_new = (w.h - dh if counterflow else w.h + dh).to("J/kg")
 
-    if stage.spec.get("pool_boiling", False):
+    if stage.si.pool_boiling:
         hf = WaterProps.h_f(w.P).to("J/kg")
         return WaterStream(mass_flow=w.mass_flow, h=hf, P=w.P)
 
-    dP_fric, dP_minor, dP_tot = _water_dp_components(w, stage, dx, i, n_steps)
-    P_new = (w.P + dP_tot).to("Pa")
+    if dP is None:
+        _, _, dP = _water_dp_components(w, stage, dx, i, n_steps)
+    P_new = (w.P - dP if counterflow else w.P + dP).to("Pa")
     return WaterStream(mass_flow=w.mass_flow, h=h_new, P=P_new)
 
 
 
+def _step_state(g: GasStream, w: WaterStream) -> tuple[Dict[str, float], Dict[str, float], StepState]:
+    gs = gas_step_props(g)
+    ws = WaterProps.state_Ph(w.P, w.h)
+    return gs, ws, StepState(
+        gas_h=gs["h"], gas_rho=gs["rho"], gas_mu=gs["mu"],
+        water_T=ws["T"], water_x=ws["x"], water_rho=ws["rho"],
+        water_mu=ws["mu"], water_cp=ws["cp"], water_k=ws["k"],
+    )
+
+def _step_core(
+    g: GasStream,
+    w: WaterStream,
+    stage: HXStage,
+    guesses: tuple[Q_, Q_, Q_],
+    i: int,
+    x: Q_,
+    dx: Q_,
+    grid: StageGrid,
+    *,
+    stage_index: int,
+) -> tuple[StepResult, Dict[str, float], Dict[str, float]]:
+    n_steps = grid.n_steps
+    gs, ws, state = _step_state(g, w)
+    dP_fric, dP_minor, dP_tot = _gas_dp_components(
+        g, stage, dx, i, n_steps,
+        rho=gs["rho"], mu=gs["mu"], grid=grid,
+    )
+    w_dP_fric, w_dP_minor, w_dP_tot = _water_dp_components(w, stage, dx, i, n_steps, state=ws)
+    sr = solve_step(
+        g=g, w=w, stage=stage,
+        Tgw_guess=guesses[0], Tww_guess=guesses[1], qprime_guess=guesses[2],
+        i=i, x=x, dx=dx,
+        Tw=Q_(ws["T"], "K") if not (stage.si.pool_boiling and isnan(ws["x"])) else None,
+        gas_props=gs, water_state=ws,
+    )
+    sr = _copy_step_with_stage(
+        sr, stage.name, stage_index,
+        dP_fric=dP_fric, dP_minor=dP_minor, dP_total=dP_tot,
+        w_dP_fric=w_dP_fric, w_dP_minor=w_dP_minor, w_dP_tot=w_dP_tot,
+        state=state,
+    )
+    return sr, gs, ws
+
+def step_kernel(
+    g: GasStream,
+    w: WaterStream,
+    stage: HXStage,
+    guesses: tuple[Q_, Q_, Q_],
+    i: int,
+    x: Q_,
+    dx: Q_,
+    grid: StageGrid,
+    *,
+    stage_index: int,
+    water_counterflow: bool = False,
+) -> tuple[StepResult, GasStream, WaterStream]:
+    sr, gs, _ = _step_core(g, w, stage, guesses, i, x, dx, grid, stage_index=stage_index)
+    n_steps = grid.n_steps
+    g_next = update_gas_after_step(g, sr.qprime, dx, stage, i, n_steps, h_old=Q_(gs["h"], "J/kg"), dP=sr.dP_total)
+    w_next = update_water_after_step(w, sr.qprime, dx, stage, i, n_steps, dP=sr.w_dP_tot, counterflow=water_counterflow)
+    return sr, g_next, w_next
+
+@profiling.timed()
 def solve_stage(
     g_in: GasStream,
     w_in: WaterStream,
@@ -325,68 +326,56 @@ def solve_stage(
     *,
     stage_index: int,
     logger_name: str = "solver",
+    seed: StageResult | None = None,
+    sink: StageTraceSink | None = None,
+    water_counterflow: bool = False,
+    cache: StageCache | None = None,
 ) -> tuple[GasStream, WaterStream, StageResult]:
     log = logging.getLogger(logger_name)
-    if stage.kind.lower() == "economiser":
-        L = stage.spec["hot_flow_length"].to("m")
-    else:
-        L = stage.spec["inner_length"].to("m")
-    xs, dx = _make_grid(L, n_steps)
-
-    K_sum = _stage_minor_K_sum(stage).to("")
-    K_per_step = (K_sum / max(n_steps, 1)).to("")
-    stage.spec["_K_bend_per_step"] = K_per_step
+    t0 = time.perf_counter()
+    if cache is not None:
+        cache_key = cache.key(stage, n_steps, g_in, w_in, stage_index=stage_index, water_counterflow=water_counterflow)
+        hit = cache.get(cache_key, w_in)
+        if hit is not None:
+            if sink is None:
+                return hit
+            return hit[0], hit[1], sink.flush(hit[2], stage_index)
+    grid = stage_grid(stage, n_steps)
+    L, xs, dx = grid.L, grid.xs, grid.dx
 
     steps: List[StepResult] = []
 
     g = g_in
     w = w_in
-    Tgw_guess, Tww_guess, qprime_guess = initial_wall_guesses(g, w, stage)
+    if seed is not None and len(seed.steps) > 1:
+        Tgw_guess, Tww_guess, qprime_guess = seed.steps[0].Tgw, seed.steps[0].Tww, seed.steps[0].qprime
+    else:
+        Tgw_guess, Tww_guess, qprime_guess = initial_wall_guesses(g, w, stage)
 
-    Q_sum = Q_(0.0, "W")
-    UA_sum = Q_(0.0, "W/K")
-    dP_fric_sum = Q_(0.0, "Pa")
-    dP_minor_sum = Q_(0.0, "Pa")
-    dP_total_sum = Q_(0.0, "Pa")
-    w_dP_fric_sum  = Q_(0.0, "Pa")
-    w_dP_minor_sum  = Q_(0.0, "Pa")
-    w_dP_tot_sum  = Q_(0.0, "Pa")
+    dx_m = dx.to("m").magnitude
+    Q_sum = UA_sum = 0.0
+    dP_fric_sum = dP_minor_sum = dP_total_sum = 0.0
+    w_dP_fric_sum = w_dP_minor_sum = w_dP_tot_sum = 0.0
 
     for i, x in enumerate(xs):
-        dP_fric_step, dP_minor_step, dP_tot_step = _gas_dp_components(g, stage, dx, i, n_steps)
-        w_dP_fric_step, w_dP_minor_step, w_dP_tot_step = _water_dp_components(w, stage, dx, i, n_steps)
-
-        sr = solve_step(
-            g=g, w=w, stage=stage,
-            Tgw_guess=Tgw_guess, Tww_guess=Tww_guess, qprime_guess=qprime_guess,
-            i=i, x=x, dx=dx
-        )
-
-        sr = _copy_step_with_stage(
-            sr, stage.name, stage_index,
-            dP_fric=dP_fric_step,
-            dP_minor=dP_minor_step,
-            dP_total=dP_tot_step,
-            w_dP_fric=w_dP_fric_step,
-            w_dP_minor=w_dP_minor_step,
-            w_dP_tot=w_dP_tot_step,
+        sr, g, w = step_kernel(
+            g, w, stage, (Tgw_guess, Tww_guess, qprime_guess), i, x, dx, grid,
+            stage_index=stage_index, water_counterflow=water_counterflow,
         )
         steps.append(sr)
 
-        Q_sum = (Q_sum + (sr.qprime * dx)).to("W")
-        UA_sum = (UA_sum + (sr.UA_prime * dx)).to("W/K")
+        Q_sum += sr.qprime.to("W/m").magnitude * dx_m
+        UA_sum += sr.UA_prime.to("W/K/m").magnitude * dx_m
 
-        dP_fric_sum  = (dP_fric_sum  + dP_fric_step).to("Pa")
-        dP_minor_sum = (dP_minor_sum + dP_minor_step).to("Pa")
-        dP_total_sum = (dP_total_sum + dP_tot_step).to("Pa")
+        dP_fric_sum  += sr.dP_fric.magnitude
+        dP_minor_sum += sr.dP_minor.magnitude
+        dP_total_sum += sr.dP_total.magnitude
 
-        w_dP_fric_sum  = (w_dP_fric_sum  + w_dP_fric_step).to("Pa")
-        w_dP_minor_sum = (w_dP_minor_sum + w_dP_minor_step).to("Pa")
-        w_dP_tot_sum   = (w_dP_tot_sum   + w_dP_tot_step).to("Pa")
+        w_dP_fric_sum  += sr.w_dP_fric.magnitude
+        w_dP_minor_sum += sr.w_dP_minor.magnitude
+        w_dP_tot_sum   += sr.w_dP_tot.magnitude
 
         Tgw_guess, Tww_guess, qprime_guess = sr.Tgw, sr.Tww, sr.qprime
-        g = update_gas_after_step(g, sr.qprime, dx, stage, i, n_steps)
-        w = update_water_after_step(w, sr.qprime, dx, stage, i, n_steps)
 
         log.debug(
             "step",
@@ -422,6 +411,7 @@ def solve_stage(
                 w_dP_tot=Q_(0.0, "Pa"),
                 qprime_conv=Q_(0.0, "W/m"),
                 qprime_rad=Q_(0.0, "W/m"),
+                state=_step_state(g_out, w_out)[2],
             )
         )
 
@@ -430,23 +420,32 @@ def solve_stage(
         stage_name=stage.name,
         stage_kind=stage.kind,  
         steps=steps,
-        Q_stage=Q_sum,
-        UA_stage=UA_sum,
-        dP_stage_fric=dP_fric_sum,
-        dP_stage_minor=dP_minor_sum,
-        dP_stage_total=dP_total_sum,
-        dP_water_stage_fric=w_dP_fric_sum,
-        dP_water_stage_minor=w_dP_minor_sum,
-        dP_water_stage_total=w_dP_tot_sum,
+        Q_stage=Q_(Q_sum, "W"),
+        UA_stage=Q_(UA_sum, "W/K"),
+        dP_stage_fric=Q_(dP_fric_sum, "Pa"),
+        dP_stage_minor=Q_(dP_minor_sum, "Pa"),
+        dP_stage_total=Q_(dP_total_sum, "Pa"),
+        dP_water_stage_fric=Q_(w_dP_fric_sum, "Pa"),
+        dP_water_stage_minor=Q_(w_dP_minor_sum, "Pa"),
+        dP_water_stage_total=Q_(w_dP_tot_sum, "Pa"),
         hot_flow_A=stage.spec["hot_flow_A"],
         cold_flow_A=stage.spec["cold_flow_A"],
         hot_Dh=stage.spec["hot_Dh"],
         cold_Dh=stage.spec["cold_Dh"],
+        water_counterflow=water_counterflow,
     )
 
-    recon = sum([(s.qprime * s.dx).to("W") for s in steps if s.dx.to("m").magnitude > 0], Q_(0.0, "W"))
-    if abs((stage_res.Q_stage - recon) / (stage_res.Q_stage + Q_(1e-12, "W"))) > 0.005:
+    recon = sum(s.qprime.to("W/m").magnitude * s.dx.to("m").magnitude for s in steps if s.dx.to("m").magnitude > 0)
+    recon_err = abs((Q_sum - recon) / (Q_sum + 1e-12))
+    if recon_err > 0.005:
+        convergence.record("solve_stage", n_steps, "energy_mismatch", residual=recon_err, wall_s=time.perf_counter() - t0)
         raise RuntimeError(f"Stage energy accumulation mismatch >0.5% in {stage.name}")
+    convergence.record("solve_stage", n_steps, "completed", residual=recon_err, wall_s=time.perf_counter() - t0)
+
+    if cache is not None:
+        cache.put(cache_key, (g_out, w_out, stage_res))
+    if sink is not None:
+        stage_res = sink.flush(stage_res, stage_index)
 
     log.debug(
         f"{stage.name}: dP_fric={stage_res.dP_stage_fric:~P}, "
@@ -464,6 +463,205 @@ def solve_stage(
 
     return g_out, w_out, stage_res
 
+def _shoot_economiser(
+    g_in: GasStream,
+    water_in: WaterStream,
+    stage: HXStage,
+    n_steps: int,
+    *,
+    stage_index: int,
+    seed: StageResult | None,
+    tol_h: Q_,
+    tol_P: Q_,
+    max_iter: int,
+    cache: StageCache | None = None,
+) -> tuple[GasStream, WaterStream, StageResult, List[float]]:
+    m_w = water_in.mass_flow.to("kg/s").magnitude
+    h_feed = water_in.h.to("J/kg").magnitude
+    P_feed = water_in.P.to("Pa").magnitude
+    xtol = tol_h.to("J/kg").magnitude
+    shots: Dict[float, tuple[GasStream, WaterStream, StageResult]] = {}
+    hist: List[float] = []
+
+    if seed is not None and seed.water_counterflow and seed.steps:
+        h_out = seed.steps[0].water.h.to("J/kg").magnitude
+        P_out = seed.steps[0].water.P.to("Pa").magnitude
+    else:
+        T_feed = WaterProps.T_from_Ph(water_in.P, water_in.h)
+        dh_gas = _gasprops.h(g_in.T, g_in.P, g_in.comp) - _gasprops.h(T_feed, g_in.P, g_in.comp)
+        Q_max = (g_in.mass_flow * dh_gas).to("W").magnitude
+        h_out = h_feed + 0.5 * Q_max / m_w
+        P_out = P_feed
+
+    def _march(h: float) -> tuple[GasStream, WaterStream, StageResult]:
+        if h not in shots:
+            w_out = WaterStream(mass_flow=water_in.mass_flow, h=Q_(h, "J/kg"), P=Q_(P_out, "Pa"))
+            shots[h] = solve_stage(g_in, w_out, stage, n_steps, stage_index=stage_index, seed=seed, water_counterflow=True, cache=cache)
+            hist.append(abs(shots[h][1].h.to("J/kg").magnitude - h_feed))
+            profiling.count("solve_exchanger.econ_shots")
+        return shots[h]
+
+    def _resid(h: float) -> float:
+        return _march(h)[1].h.to("J/kg").magnitude - h_feed
+
+    for _ in range(max_iter):
+        r0 = _resid(h_out)
+        if abs(r0) > xtol:
+            step = -r0
+            for _ in range(SHOOT_MAX_BRACKET):
+                if _resid(h_out + step) * r0 <= 0:
+                    break
+                step *= 2.0
+            else:
+                raise RuntimeError(f"{stage.name}: economiser shooting could not bracket the outlet enthalpy (last step {step:.3g} J/kg)")
+            lo, hi = sorted((h_out, h_out + step))
+            h_out = root_scalar(_resid, bracket=(lo, hi), method="brentq", xtol=xtol, maxiter=SHOOT_MAX_BRENTQ).root
+
+        g_end, w_end, sr = _march(h_out)
+        dP_end = P_feed - w_end.P.to("Pa").magnitude
+        if abs(dP_end) <= tol_P.to("Pa").magnitude:
+            return g_end, sr.steps[0].water, sr, hist
+        P_out += dP_end
+        shots.clear()
+    raise RuntimeError(f"{stage.name}: economiser shooting did not match the feed pressure in {max_iter} correction(s)")
+
+def _newton_economiser(
+    g_in: GasStream,
+    water_in: WaterStream,
+    stage: HXStage,
+    n_steps: int,
+    *,
+    stage_index: int,
+    seed: StageResult | None,
+    tol_h: Q_,
+    tol_P: Q_,
+    max_iter: int,
+    cache: StageCache | None = None,
+) -> tuple[GasStream, WaterStream, StageResult, List[float]]:
+    grid = stage_grid(stage, n_steps)
+    xs, dx = grid.xs, grid.dx
+    N = n_steps
+    dx_m = dx.to("m").magnitude
+    X = g_in.comp
+    m_g = g_in.mass_flow.to("kg/s").magnitude
+    m_w = water_in.mass_flow.to("kg/s").magnitude
+    tol_h_m = tol_h.to("J/kg").magnitude
+    tol_P_m = tol_P.to("Pa").magnitude
+
+    hg = np.full(N + 1, _gasprops.h(g_in.T, g_in.P, X).to("J/kg").magnitude, dtype=float)
+    hw = np.full(N + 1, water_in.h.to("J/kg").magnitude, dtype=float)
+    Pg = np.full(N + 1, g_in.P.to("Pa").magnitude, dtype=float)
+    Pw = np.full(N + 1, water_in.P.to("Pa").magnitude, dtype=float)
+    Tg = [g_in.T.to("K")] * (N + 1)
+    if seed is not None and seed.water_counterflow and len(seed.steps) == N + 1:
+        for i, st in enumerate(seed.steps):
+            hw[i] = st.water.h.to("J/kg").magnitude
+            Pw[i] = st.water.P.to("Pa").magnitude
+            if i > 0:
+                Tg[i] = st.gas.T.to("K")
+                Pg[i] = st.gas.P.to("Pa").magnitude
+                hg[i] = _gasprops.h(Tg[i], Q_(Pg[i], "Pa"), X).to("J/kg").magnitude
+        hw[N] = water_in.h.to("J/kg").magnitude
+        Pw[N] = water_in.P.to("Pa").magnitude
+
+    q = np.empty(N)
+    dq_dhg = np.empty(N)
+    dq_dhw = np.empty(N)
+    dPg = np.empty(N)
+    dPw = np.empty(N)
+    hist: List[float] = []
+
+    for it in range(max_iter):
+        profiling.count("solve_exchanger.econ_newton_sweeps")
+        Pw_out = Pw[0]
+        guesses = None
+        for i in range(N):
+            if i > 0:
+                Tg[i] = _gasprops.T_from_h(Q_(hg[i], "J/kg"), Q_(Pg[i], "Pa"), X, Tg[i])
+            g = GasStream(mass_flow=g_in.mass_flow, T=Tg[i], P=Q_(Pg[i], "Pa"), comp=X)
+            w = WaterStream(mass_flow=water_in.mass_flow, h=Q_(hw[i], "J/kg"), P=Q_(Pw[i], "Pa"))
+            if guesses is None:
+                guesses = initial_wall_guesses(g, w, stage) if seed is None else (seed.steps[0].Tgw, seed.steps[0].Tww, seed.steps[0].qprime)
+            sr, gs, ws = _step_core(g, w, stage, guesses, i, xs[i], dx, grid, stage_index=stage_index)
+            guesses = (sr.Tgw, sr.Tww, sr.qprime)
+
+            UA = sr.UA_prime.to("W/K/m").magnitude
+            q[i] = sr.qprime.to("W/m").magnitude
+            dq_dhg[i] = UA / gs["cp"]
+            dq_dhw[i] = 0.0 if not isnan(ws["x"]) else -UA / ws["cp"]
+            dPg[i] = sr.dP_total.to("Pa").magnitude
+            dPw[i] = sr.w_dP_tot.to("Pa").magnitude
+
+        Pg[1:] = Pg[0] + np.cumsum(dPg)
+        Pw[:N] = Pw[N] + np.cumsum(dPw[::-1])[::-1]
+
+        Rw = hw[:N] - hw[1:] - q * dx_m / m_w
+        Rg = hg[1:] - hg[:N] + q * dx_m / m_g
+        R = np.empty(2 * N)
+        R[0::2], R[1::2] = Rw, Rg
+        hist.append(float(np.max(np.abs(R))))
+
+        ab = np.zeros((5, 2 * N))
+        for i in range(N):
+            r_w, r_g = 2 * i, 2 * i + 1
+            ab[2, r_w] = 1.0 - dq_dhw[i] * dx_m / m_w
+            ab[2 + r_g - r_w, r_w] = dq_dhw[i] * dx_m / m_g
+            ab[2, r_g] = 1.0
+            if i + 1 < N:
+                ab[2 + r_w - (r_w + 2), r_w + 2] = -1.0
+            if i > 0:
+                ab[2 + r_w - (r_w - 1), r_w - 1] = -dq_dhg[i] * dx_m / m_w
+                ab[2 + r_g - (r_g - 2), r_g - 2] = -1.0 + dq_dhg[i] * dx_m / m_g
+        delta = solve_banded((2, 2), ab, -R)
+        hw[:N] += delta[0::2]
+        hg[1:] += delta[1::2]
+
+        if np.max(np.abs(delta)) <= tol_h_m and abs(Pw[0] - Pw_out) <= tol_P_m:
+            break
+    else:
+        raise RuntimeError(f"{stage.name}: economiser Newton solve did not converge in {max_iter} iterations (max|R|={hist[-1]:.3g} J/kg)")
+
+    w_out = WaterStream(mass_flow=water_in.mass_flow, h=Q_(hw[0], "J/kg"), P=Q_(Pw[0], "Pa"))
+    g_end, w_end, sr = solve_stage(g_in, w_out, stage, N, stage_index=stage_index, seed=seed, water_counterflow=True, cache=cache)
+    hist.append(abs(w_end.h.to("J/kg").magnitude - water_in.h.to("J/kg").magnitude))
+    return g_end, sr.steps[0].water, sr, hist
+
+def _check_exchanger_energy(
+    gas_in: GasStream,
+    h_g_in: Q_,
+    g_out: GasStream,
+    results: List[StageResult],
+    log: logging.Logger,
+    *,
+    step: str,
+    iterations: int,
+    residuals: List[float],
+    t0: float,
+) -> None:
+    Q_total = sum((sr.Q_stage.to("W") for sr in results), Q_(0.0, "W"))
+    h_g_out = _gasprops.h(g_out.T, g_out.P, g_out.comp)
+    Q_gas = (gas_in.mass_flow * (h_g_in - h_g_out)).to("W")
+    mismatch = abs(Q_gas - Q_total) / (abs(Q_total) + Q_(1e-12, "W"))
+    log.info(
+        f"FINAL {step.replace('_', ' ')}: Q_total={Q_total:~P} "
+        f"Q_gas={Q_gas:~P} rel_err={mismatch:~P}",
+        extra={"stage": "ALL", "step": step},
+    )
+
+    reason = "converged" if mismatch.magnitude <= 0.005 else "energy_mismatch"
+    convergence.record("solve_exchanger", iterations, reason, residuals=residuals, wall_s=time.perf_counter() - t0)
+    if mismatch.magnitude > 0.005:
+        raise RuntimeError(
+            f"Energy mismatch >0.5% on final sweep. "
+            f"Q_gas={Q_gas:~P}, rel_err={mismatch:~P}"
+        )
+
+_ECON_SOLVERS = {
+    "shooting": _shoot_economiser,
+    "newton": _newton_economiser,
+}
+
+@profiling.timed()
 def solve_exchanger(
     stages: List[HXStage],
     gas_in: GasStream,
@@ -477,13 +675,27 @@ def solve_exchanger(
     max_passes: int = 20,
     tol_Q: Q_ = Q_(1e-3, "W"),
     tol_end: Q_ = Q_(1e-3, "J/kg"),
+    tol_P: Q_ = Q_(1.0, "Pa"),
+    econ_solver: str = "shooting",
     log_level: str = "INFO",
+    seed_results: List[StageResult] | None = None,
+    sink: StageTraceSink | None = None,
+    stage_cache: StageCache | None = None,
 ) -> tuple[List[StageResult], GasStream, WaterStream]:
     setup_logging(level=log_level)
     log = logging.getLogger("solver")
+    t0 = time.perf_counter()
+    dQ_hist: List[float] = []
 
     if len(stages) != 6:
         raise ValueError(f"Expected 6 stages. Got {len(stages)}.")
+    if econ_solver not in _ECON_SOLVERS:
+        raise ValueError(f"Unknown econ_solver {econ_solver!r}; expected one of {sorted(_ECON_SOLVERS)}")
+
+    if seed_results is not None and len(seed_results) != len(stages):
+        log.warning(f"Ignoring seed_results: {len(seed_results)} stages for {len(stages)}-stage exchanger")
+        seed_results = None
+    seeds = list(seed_results) if seed_results is not None else [None] * len(stages)
 
     if target_dx is None:
         dx_target = (_median_length(stages) / 100).to("m")
@@ -518,13 +730,55 @@ def solve_exchanger(
     h_g_in = _gasprops.h(gas_in.T, gas_in.P, gas_in.comp)
     h_w_in = water_in.h
 
+    k_econ = len(stages) - 1
+    if drum_pool is not None and drum_pool_stage_count == k_econ and stages[k_econ].kind.lower() == "economiser":
+        results: List[StageResult] = []
+        g = gas_in
+        for i, st in enumerate(stages[:k_econ]):
+            g, _, st_res = solve_stage(g, drum_pool, st, n_steps_by_stage[i], stage_index=i, seed=seeds[i], sink=sink, cache=stage_cache)
+            results.append(st_res)
+
+        g_out, w_out, st_res, r_hist = _ECON_SOLVERS[econ_solver](
+            g, water_in, stages[k_econ], n_steps_by_stage[k_econ],
+            stage_index=k_econ, seed=seeds[k_econ], tol_h=tol_end, tol_P=tol_P, max_iter=max_passes, cache=stage_cache,
+        )
+        if sink is not None:
+            st_res = sink.flush(st_res, k_econ)
+        results.append(st_res)
+
+        log.info(
+            f"economiser {econ_solver}: {len(r_hist)} iteration(s), water_out(h={w_out.h:~P}, P={w_out.P:~P})",
+            extra={"stage": stages[k_econ].name, "step": econ_solver},
+        )
+        _check_exchanger_energy(
+            gas_in, h_g_in, g_out, results, log,
+            step="pool_economiser", iterations=len(r_hist), residuals=r_hist, t0=t0,
+        )
+        return results, g_out, w_out
+
+    econ = stages[k_econ].kind.lower() == "economiser"
+    n_cocurrent = k_econ if econ else len(stages)
+    econ_seed = seeds[k_econ]
+
+    def _solve_econ(g: GasStream) -> tuple[GasStream, WaterStream, StageResult]:
+        g_out, w_out, st_res, r_hist = _ECON_SOLVERS[econ_solver](
+            g, water_in, stages[k_econ], n_steps_by_stage[k_econ],
+            stage_index=k_econ, seed=econ_seed, tol_h=tol_end, tol_P=tol_P, max_iter=max_passes, cache=stage_cache,
+        )
+        log.debug(
+            f"economiser {econ_solver}: {len(r_hist)} iteration(s), water_out(h={w_out.h:~P}, P={w_out.P:~P})",
+            extra={"stage": stages[k_econ].name, "step": econ_solver},
+        )
+        return g_out, w_out, st_res
+
     for p in range(max_passes + 1):
+        profiling.count("solve_exchanger.passes")
         gas_stage_results: List[StageResult] = []
         gas_at_stage_in: List[GasStream] = []
         water_for_stage_boundary: List[WaterStream] = []
 
         g = gas_in
-        for i, st in enumerate(stages):
+        for i, st in enumerate(stages[:n_cocurrent]):
             if drum_pool is not None and i < drum_pool_stage_count:
                 w_boundary = drum_pool
             else:
@@ -536,9 +790,15 @@ def solve_exchanger(
             gas_at_stage_in.append(g)
             water_for_stage_boundary.append(w_boundary)
 
-            g, w_tmp, st_res = solve_stage(g, w_boundary, st, n_steps_by_stage[i], stage_index=i)
+            g, w_tmp, st_res = solve_stage(g, w_boundary, st, n_steps_by_stage[i], stage_index=i, seed=seeds[i], cache=stage_cache)
             gas_stage_results.append(st_res)
 
+        if econ:
+            gas_at_stage_in.append(g)
+            _, w_econ, econ_res = _solve_econ(g)
+            econ_seed = econ_res
+            gas_stage_results.append(econ_res)
+
         water_stage_results: List[StageResult] = []
         g_fields_for_water: List[GasStream] = [gs for gs in gas_at_stage_in]
 
@@ -548,13 +808,18 @@ def solve_exchanger(
             idx = 5 - i_rev
             g_for_stage = g_fields_for_water[idx]
 
-            if drum_pool is not None and idx < drum_pool_stage_count:
-                g_new, _w_dummy, st_res = solve_stage(g_for_stage, drum_pool, st, n_steps_by_stage[idx], stage_index=idx)
+            if econ and idx == k_econ:
+                st_res = econ_res
+                w = w_econ
+                w_econ_out = w
+            elif drum_pool is not None and idx < drum_pool_stage_count:
+                g_new, _w_dummy, st_res = solve_stage(g_for_stage, drum_pool, st, n_steps_by_stage[idx], stage_index=idx, seed=seeds[idx], cache=stage_cache)
+                g_fields_for_water[idx] = g_new
             else:
-                g_new, w, st_res = solve_stage(g_for_stage, w, st, n_steps_by_stage[idx], stage_index=idx)
+                g_new, w, st_res = solve_stage(g_for_stage, w, st, n_steps_by_stage[idx], stage_index=idx, seed=seeds[idx], cache=stage_cache)
+                g_fields_for_water[idx] = g_new
                 w_econ_out = w
 
-            g_fields_for_water[idx] = g_new
             water_stage_results.append(st_res)
 
         water_stage_results = list(reversed(water_stage_results))
@@ -568,6 +833,8 @@ def solve_exchanger(
         h_w_out = w_out.h
 
         end_tuple = (h_g_in, h_g_out, h_w_in, h_w_out)
+        if prev_Q_total is not None:
+            dQ_hist.append(abs(Q_total - prev_Q_total).to("W").magnitude)
 
         duty_ok = prev_Q_total is not None and abs(Q_total - prev_Q_total) < tol_Q
         end_ok = prev_end_h is not None and max(
@@ -590,37 +857,29 @@ def solve_exchanger(
             g = gas_in
             final_forward_results: List[StageResult] = []
 
-            for i, st in enumerate(stages):
+            for i, st in enumerate(stages[:n_cocurrent]):
                 w_boundary = water_boundaries[i]
-                g, w_tmp, st_res = solve_stage(g, w_boundary, st, n_steps_by_stage[i], stage_index=i)
+                g, w_out_sync, st_res = solve_stage(g, w_boundary, st, n_steps_by_stage[i], stage_index=i, seed=seeds[i], sink=sink, cache=stage_cache)
+                final_forward_results.append(st_res)
+            if econ:
+                g, w_out_sync, st_res = _solve_econ(g)
+                if sink is not None:
+                    st_res = sink.flush(st_res, k_econ)
                 final_forward_results.append(st_res)
-                if i == (len(stages) - 1):
-                    w_out_sync = w_tmp
 
             g_out_sync = g
-
-            h_g_out = _gasprops.h(g_out_sync.T, g_out_sync.P, g_out_sync.comp)
-            h_w_out = w_out_sync.h
-            Q_gas = (gas_in.mass_flow * (h_g_in - h_g_out)).to("W")
-            mismatch = abs(Q_gas - Q_total) / (abs(Q_total) + Q_(1e-12, "W"))
-            log.info(
-                f"FINAL forward: Q_total={sum((sr.Q_stage for sr in final_forward_results), Q_(0,'W')):~P} "
-                f"Q_gas={Q_gas:~P} rel_err={mismatch:~P}",
-                extra={"stage": "ALL", "step": "final_forward"},
+            _check_exchanger_energy(
+                gas_in, h_g_in, g_out_sync, final_forward_results, log,
+                step="final_forward", iterations=p + 1, residuals=dQ_hist, t0=t0,
             )
 
-            if mismatch.magnitude > 0.005:
-                raise RuntimeError(
-                    f"Energy mismatch >0.5% on final sweep. "
-                    f"Q_gas={Q_gas:~P}, rel_err={mismatch:~P}"
-                )
-
             return final_forward_results, g_out_sync, w_out_sync
 
         prev_Q_total = Q_total
         prev_end_h = end_tuple
         final_stage_results = water_stage_results
 
+    convergence.record("solve_exchanger", max_passes + 1, "max_passes", residuals=dQ_hist, wall_s=time.perf_counter() - t0)
     worst_idx = max(range(6), key=lambda k: abs(final_stage_results[k].Q_stage).to("W").magnitude if final_stage_results else 0)
     raise RuntimeError(
         f"Did not converge in {max_passes} passes. "
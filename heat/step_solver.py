@@ -1,32 +1,41 @@
+import time
+from typing import Dict
 from common.results import StepResult
 from common.units import Q_
 from common.models import HXStage, GasStream, WaterStream
 from heat.physics import wall_resistance, fouling_resistances
 from heat.water_htc import water_htc
 from common.props import WaterProps
-from heat.gas_htc import gas_htc, gas_htc_parts
+from heat.gas_htc import gas_htc, gas_htc_parts, gas_step_props
+from common.profiling import timed
+from common import convergence
 
-def solve_step(g: GasStream, w: WaterStream, stage: HXStage, Tgw_guess: Q_, Tww_guess: Q_, qprime_guess: Q_, i: int, x: Q_, dx: Q_) -> StepResult:
-    spec = stage.spec
-    Pg = spec["hot_wet_P"]
-    Pw = spec["cold_wet_P"]
+@timed()
+def solve_step(
+    g: GasStream, w: WaterStream, stage: HXStage, Tgw_guess: Q_, Tww_guess: Q_, qprime_guess: Q_, i: int, x: Q_, dx: Q_,
+    Tw: Q_ | None = None, *, gas_props: Dict[str, float] | None = None, water_state: Dict[str, float] | None = None,
+) -> StepResult:
+    si = stage.si
+    Pg = Q_(si.hot_wet_P, "m")
+    Pw = Q_(si.cold_wet_P, "m")
     Tg = g.T
-    if stage.spec["pool_boiling"]:
-        Tw = WaterProps.Tsat(w.P)
-    else:
-        Tw = WaterProps.T_from_Ph(w.P, w.h)
+    if Tw is None:
+        Tw = WaterProps.Tsat(w.P) if si.pool_boiling else WaterProps.T_from_Ph(w.P, w.h)
     Tgw = Tgw_guess
     Tww = Tww_guess
     qprime = qprime_guess
     alpha = 0.25
     tolT = Q_(1e-3,"K"); tolq = Q_(1e-3,"W/m"); maxit = 10
+    t0 = time.perf_counter()
+    reason = "max_iter"
+    Rfg, Rfc = fouling_resistances(si)
+    Rw = wall_resistance(si)
+    gp = gas_props if gas_props is not None else gas_step_props(g)
 
-    for _ in range(maxit):
-        h_g = gas_htc(g, spec, Tgw, stage_kind=stage.kind)
+    for it in range(maxit):
+        h_g = gas_htc(g, si, Tgw, stage_kind=stage.kind, props=gp)
         qpp_cold = (qprime / Pw).to("W/m^2")
-        h_c, boiling = water_htc(w, stage, Tww, qpp_cold)
-        Rfg, Rfc = fouling_resistances(spec)
-        Rw = wall_resistance(spec)
+        h_c, boiling = water_htc(w, stage, Tww, qpp_cold, water_state)
         Rg = (1/(h_g*Pg)).to("K*m/W")
         Rc = (1/(h_c*Pw)).to("K*m/W")
 
@@ -43,12 +52,14 @@ def solve_step(g: GasStream, w: WaterStream, stage: HXStage, Tgw_guess: Q_, Tww_
         dTgw = abs(Tgw_new - Tgw); dTww = abs(Tww_new - Tww); dq = abs(qprime_new - qprime)
         if dTgw < tolT and dTww < tolT and dq < tolq:
             Tgw, Tww, qprime = Tgw_new, Tww_new, qprime_new
+            reason = "converged"
             break
 
         Tgw = (alpha*Tgw_new + (1-alpha)*Tgw).to("K")
         Tww = (alpha*Tww_new + (1-alpha)*Tww).to("K")
         qprime = (alpha*qprime_new + (1-alpha)*qprime).to("W/m")
-    h_conv, h_rad = gas_htc_parts(g, spec, Tgw, stage_kind=stage.kind)
+    convergence.record("solve_step", it + 1, reason, residual=dq.to("W/m").magnitude, wall_s=time.perf_counter() - t0)
+    h_conv, h_rad = gas_htc_parts(g, si, Tgw, stage_kind=stage.kind, props=gp)
     h_g = (h_conv + h_rad).to("W/m^2/K")
 
     h_tot_mag = h_g.to("W/m^2/K").magnitude
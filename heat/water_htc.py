@@ -1,25 +1,30 @@
-from math import log, sqrt, exp
+from math import log, sqrt, exp, isnan
+from typing import Dict
 from common.units import Q_
 from common.models import WaterStream, HXStage
 from common.props import WaterProps
+from common.profiling import timed
 
 P_CRIT_WATER = Q_(22.064, "MPa")
 MW_WATER = 18.01528
 
-def velocity(w: WaterStream, Aflow, umax_factor=None) -> Q_:
-    rho = WaterProps.rho_from_Ph(w.P, w.h)
-    u = (w.mass_flow / (rho * Aflow)).to("m/s")
+def velocity(w: WaterStream, Aflow: float, umax_factor: float | None = None, rho: float | None = None) -> float:
+    rho = rho if rho is not None else WaterProps.rho_from_Ph(w.P, w.h).to("kg/m^3").magnitude
+    u = w.mass_flow.to("kg/s").magnitude / (rho * Aflow)
     if umax_factor is not None:
-        return (umax_factor * u).to("m/s")
+        return umax_factor * u
     return u
 
-def reynolds_number(w:WaterStream, Aflow, char_len, umax_factor=None):
-    rho = WaterProps.rho_from_Ph(w.P, w.h)
-    v = velocity(w, Aflow, umax_factor)
-    mu = WaterProps.mu_from_Ph(w.P, w.h)
+def reynolds_number(w: WaterStream, Aflow: float, char_len: float, umax_factor: float | None = None, state: Dict[str, float] | None = None) -> float:
+    if state is not None:
+        rho, mu = state["rho"], state["mu"]
+    else:
+        rho = WaterProps.rho_from_Ph(w.P, w.h).to("kg/m^3").magnitude
+        mu = WaterProps.mu_from_Ph(w.P, w.h).to("Pa*s").magnitude
+    v = velocity(w, Aflow, umax_factor, rho)
     return (rho * v * char_len) / mu
 
-def prandtl_number(cp: Q_, mu: Q_, k: Q_) -> Q_:
+def prandtl_number(cp: float, mu: float, k: float) -> float:
     return cp * mu / k
 
 def film_temp(T_bulk: Q_, T_wall: Q_) -> Q_:
@@ -34,23 +39,25 @@ def _is_boiling(P, h, T_wall: Q_ | None = None) -> bool:
         return T_wall > WaterProps.Tsat(P) + Q_(3, "K")
     return False
 
-def pr(w:WaterStream) -> Q_:
-    cp = WaterProps.cp_from_Ph(w.P, w.h)
-    mu = WaterProps.mu_from_Ph(w.P, w.h)
-    k = WaterProps.k_from_Ph(w.P, w.h)
+def _transport_PT(P: Q_, T: Q_) -> tuple[float, float, float]:
+    return (
+        WaterProps.cp_from_PT(P, T).to("J/kg/K").magnitude,
+        WaterProps.mu_from_PT(P, T).to("Pa*s").magnitude,
+        WaterProps.k_from_PT(P, T).to("W/m/K").magnitude,
+    )
+
+def pr(w: WaterStream, state: Dict[str, float] | None = None) -> float:
+    if state is not None:
+        return prandtl_number(state["cp"], state["mu"], state["k"])
+    cp = WaterProps.cp_from_Ph(w.P, w.h).to("J/kg/K").magnitude
+    mu = WaterProps.mu_from_Ph(w.P, w.h).to("Pa*s").magnitude
+    k = WaterProps.k_from_Ph(w.P, w.h).to("W/m/K").magnitude
     return prandtl_number(cp, mu, k)
 
-def pr_s(w: WaterStream, T_wall: Q_) -> Q_:
-    cp_s = WaterProps.cp_from_PT(w.P, T_wall)
-    mu_s = WaterProps.mu_from_PT(w.P, T_wall)
-    k_s = WaterProps.k_from_PT(w.P, T_wall)
-    return prandtl_number(cp_s, mu_s, k_s)
-
-def nu_zukauskas_bank(Re: Q_, Pr: Q_, Pr_s: Q_, arrangement: str) -> tuple[Q_, Q_]:
-    Re = Re.to("").magnitude
-    Pr = Pr.to("").magnitude
-    Pr_s = Pr_s.to("").magnitude
+def pr_s(w: WaterStream, T_wall: Q_) -> float:
+    return prandtl_number(*_transport_PT(w.P, T_wall))
 
+def nu_zukauskas_bank(Re: float, Pr: float, Pr_s: float, arrangement: str) -> tuple[float, float]:
     bands = [
         (1e3, 2e3, {"inline": (0.90, 0.40), "staggered": (1.04, 0.40)}),
         (2e3, 4e3, {"inline": (0.52, 0.50), "staggered": (0.71, 0.50)}),
@@ -67,99 +74,67 @@ def nu_zukauskas_bank(Re: Q_, Pr: Q_, Pr_s: Q_, arrangement: str) -> tuple[Q_, Q
     n = 0.36 if Pr <= 10.0 else 0.25
     s = 0.25
     nu = C * (Re**m) * (Pr**n) * ((Pr / max(Pr_s, 1e-12))**s)
-    return Q_(nu, ""),Q_(m, "")
+    return nu, m
 
-def nu_churchill_bernstein(Re: Q_, Pr: Q_) -> Q_:
-    Re = Re.to("").magnitude
-    Pr = Pr.to("").magnitude
+def nu_churchill_bernstein(Re: float, Pr: float) -> float:
     a = 0.3
     b = (0.62 * Re**0.5 * Pr**(1/3)) / (1 + (0.4/Pr)**(2/3))**0.25
     c = (1 + (Re/282000.0)**(5/8))**(4/5)
-    return Q_(a + b * c, "")
+    return a + b * c
 
-def nu_gnielinski(Re: Q_, Pr: Q_, mu_ratio: Q_, L: Q_, D: Q_) -> Q_:
-    Re = Re.to("").magnitude
-    Pr = Pr.to("").magnitude
-    L = L.to("meter").magnitude
-    D = D.to("meter").magnitude
+def nu_gnielinski(Re: float, Pr: float, mu_ratio: float, L: float, D: float) -> float:
     if Re < 2300.0:
         Gz = Re * Pr * (D / max(L, 1e-12))
-        return Q_(3.66 + (0.0668 * Gz) / (1 + 0.04 * Gz**(2/3)), "")
+        return 3.66 + (0.0668 * Gz) / (1 + 0.04 * Gz**(2/3))
     f = (0.79 * log(Re) - 1.64) ** -2
     num = (f/8) * (Re - 1000.0) * Pr
     den = 1 + 12.7 * (f/8)**0.5 * (Pr**(2/3) - 1)
     Nu = num / max(den, 1e-12)
-    mu_ratio = mu_ratio.to("").magnitude
-    return Q_(Nu * (mu_ratio ** 0.11), "")
+    return Nu * (mu_ratio ** 0.11)
 
 
-def compute_nusselt(w:WaterStream, stage: HXStage, T_wall: Q_) -> Q_:
+def compute_nusselt(w: WaterStream, stage: HXStage, T_wall: Q_, state: Dict[str, float] | None = None) -> float:
+    si = stage.si
 
     if stage.kind == "single_tube":
-        L = stage.spec["outer_diameter"]
-        Aflow = stage.spec["cold_flow_A"]
-        umax = stage.spec.get("umax_factor")
-        Re = reynolds_number(w, Aflow, L, umax)
-        Pr = pr(w)
-        return nu_churchill_bernstein(Re, Pr)
+        Re = reynolds_number(w, si.cold_flow_A, si.outer_diameter, si.umax_factor, state)
+        return nu_churchill_bernstein(Re, pr(w, state))
 
     if stage.kind == "tube_bank":
-        L = stage.spec["outer_diameter"]
-        Aflow = stage.spec["cold_flow_A"]
-        umax = stage.spec.get("umax_factor")
-        Re = reynolds_number(w, Aflow, L, umax)
-        Pr = pr(w)
-        Pr_s = pr_s(w, T_wall)
-        N_rows = stage.spec["N_rows"]
-        ST = stage.spec["ST"]
-        SL = stage.spec["SL"]
-        arrangement = stage.spec["arrangement"]
-        Nu, m = nu_zukauskas_bank(Re, Pr, Pr_s, arrangement)
-        Nu *= bank_row_factor(N_rows)
-        Nu *= spacing_factor(L, ST, SL, arrangement, m)
+        D = si.outer_diameter
+        Re = reynolds_number(w, si.cold_flow_A, D, si.umax_factor, state)
+        Nu, m = nu_zukauskas_bank(Re, pr(w, state), pr_s(w, T_wall), si.arrangement)
+        Nu *= bank_row_factor(si.N_rows)
+        Nu *= spacing_factor(D, si.ST, si.SL, si.arrangement, m)
         return Nu
 
     if stage.kind == "reversal_chamber":
-        L = stage.spec["outer_diameter"]
-        Aflow = stage.spec["cold_flow_A"]
-        umax = stage.spec.get("umax_factor")
-        Re = reynolds_number(w, Aflow, L, umax)
-        Pr = pr(w)
-        Rc = stage.spec["curvature_radius"]
-        Nu = nu_churchill_bernstein(Re, Pr)
-        return Nu * bend_factor_external(L, Rc)
+        D = si.outer_diameter
+        Re = reynolds_number(w, si.cold_flow_A, D, si.umax_factor, state)
+        Nu = nu_churchill_bernstein(Re, pr(w, state))
+        return Nu * bend_factor_external(D, si.curvature_radius)
 
     if stage.kind == "economiser":
-        D = stage.spec["inner_diameter"]
-        if "tube_length" in stage.spec:
-            L = stage.spec["tube_length"]
-        elif "inner_length" in stage.spec:
-            L = stage.spec["inner_length"]
-        else:
-            raise KeyError(f"{stage.name}: economiser missing both 'tube_length' and 'inner_length'")
-        Aflow = stage.spec["cold_flow_A"]
-        T_bulk = WaterProps.T_from_Ph(w.P, w.h)
-        umax = stage.spec.get("umax_factor")
-        Re = reynolds_number(w, Aflow, D, umax)
-        Pr = pr(w)
+        D = si.inner_diameter
+        T_bulk = Q_(state["T"], "K") if state is not None else WaterProps.T_from_Ph(w.P, w.h)
+        Re = reynolds_number(w, si.cold_flow_A, D, si.umax_factor, state)
         mu_ratio = _mu_ratio(w, T_bulk, T_wall)
-        return nu_gnielinski(Re, Pr, mu_ratio, L, D)
+        return nu_gnielinski(Re, pr(w, state), mu_ratio, si.tube_length, D)
 
     raise ValueError(f"unknown stage kind: {stage.kind}")
 
-def _mu_ratio(w: WaterStream, T_bulk: Q_, T_wall: Q_) -> Q_:
-    mu_b = WaterProps.mu_from_PT(w.P, T_bulk)
-    mu_w = WaterProps.mu_from_PT(w.P, T_wall)
+def _mu_ratio(w: WaterStream, T_bulk: Q_, T_wall: Q_) -> float:
+    mu_b = WaterProps.mu_from_PT(w.P, T_bulk).to("Pa*s").magnitude
+    mu_w = WaterProps.mu_from_PT(w.P, T_wall).to("Pa*s").magnitude
     return mu_b / mu_w
 
-def bend_factor_external(D: Q_, Rc: Q_) -> Q_:
+def bend_factor_external(D: float, Rc: float) -> float:
 
     if Rc <= 0 or D <= 0:
         return 1.0
-    phi = 1.0 + 0.10 * sqrt(D / Rc)
-    return Q_(phi, "")
+    return 1.0 + 0.10 * sqrt(D / Rc)
 
-def spacing_factor(D: Q_, ST: Q_, SL: Q_, arrangement: str, m_exp: Q_) -> Q_:
+def spacing_factor(D: float, ST: float, SL: float, arrangement: str, m_exp: float) -> float:
     if arrangement == "staggered":
         denom_T = ST - D
         denom_L = SL - (0.5 * D)
@@ -167,92 +142,80 @@ def spacing_factor(D: Q_, ST: Q_, SL: Q_, arrangement: str, m_exp: Q_) -> Q_:
         vmax_ratio = vmax_ratio**0.5
     else:
         vmax_ratio = ST / (ST - D)
-    m_exp = m_exp.to("").magnitude
-    phi = vmax_ratio ** m_exp
-    return phi
-
-def bank_row_factor(N_rows: Q_) -> Q_:
-    n = N_rows.to("").magnitude
-    f = 1.0 - 0.30 * exp(-0.30 * n)
-    return Q_(f, "")
-
-def _h_water_singlephase(w: WaterStream, stage: HXStage, T_wall) -> Q_:
-    Nu = compute_nusselt(w, stage, T_wall)
-    k = WaterProps.k_from_Ph(w.P, w.h)
+    return vmax_ratio ** m_exp
+
+def bank_row_factor(N_rows: float) -> float:
+    return 1.0 - 0.30 * exp(-0.30 * N_rows)
+
+def _h_water_singlephase(w: WaterStream, stage: HXStage, T_wall, state: Dict[str, float] | None = None) -> float:
+    Nu = compute_nusselt(w, stage, T_wall, state)
+    k = state["k"] if state is not None else WaterProps.k_from_Ph(w.P, w.h).to("W/m/K").magnitude
     if stage.kind in ("single_tube", "tube_bank", "reversal_chamber"):
-        Dh = stage.spec["outer_diameter"]
+        Dh = stage.si.outer_diameter
     else:
-        Dh = stage.spec["inner_diameter"]
-    return (Nu * k / Dh).to("W/m^2/K")
+        Dh = stage.si.inner_diameter
+    return Nu * k / Dh
 
-def _h_water_boil_cooper(P: Q_, qpp: Q_, Rp: Q_) -> Q_:
+def _h_water_boil_cooper(P: Q_, qpp: Q_, Rp_m: float) -> float:
     p_r = (P.to("MPa") / P_CRIT_WATER).magnitude
-    Rp_um = Rp.to("micrometer").magnitude
+    Rp_um = Rp_m * 1e6
     q_kWm2 = qpp.to("kW/m^2").magnitude
     h_kWm2K = 55.0 * (p_r**0.12) * (((Rp_um))**-0.55) * (MW_WATER**-0.5) * (q_kWm2**0.67)
-    return Q_(h_kWm2K, "kW/m^2/K").to("W/m^2/K")
+    return h_kWm2K * 1e3
 
-def water_htc(w: WaterStream, stage: HXStage, T_wall: Q_, qpp: Q_) -> tuple[Q_, bool]:
-    if stage.spec["pool_boiling"]:
-        Rp = stage.spec["roughness_cold_surface"]
+@timed()
+def water_htc(w: WaterStream, stage: HXStage, T_wall: Q_, qpp: Q_, state: Dict[str, float] | None = None) -> tuple[Q_, bool]:
+    si = stage.si
+    Rp = si.roughness_cold_surface
+    if si.pool_boiling:
         h_nb = _h_water_boil_cooper(w.P, qpp, Rp)
-        return h_nb, True
+        return Q_(h_nb, "W/m^2/K"), True
 
     boiling = _is_boiling(w.P, w.h, T_wall)
     if boiling:
         h_lo = _h_liquid_only(w, stage, T_wall)
-        h_nb = _h_water_boil_cooper(w.P, qpp, stage.spec["roughness_cold_surface"])
+        h_nb = _h_water_boil_cooper(w.P, qpp, Rp)
         T_sat = WaterProps.Tsat(w.P)
-        mu_l  = WaterProps.mu_from_PT(w.P, T_sat)
-        A = stage.spec["cold_flow_A"]
-        Dh = stage.spec["cold_Dh"]
-        G = _mass_flux(w, A)
-        h_lv = WaterProps.h_g(w.P) - WaterProps.h_f(w.P)
+        mu_l  = WaterProps.mu_from_PT(w.P, T_sat).to("Pa*s").magnitude
+        G = _mass_flux(w, si.cold_flow_A)
         x = WaterProps.quality_from_Ph(w.P, w.h)
-        Re_lo = (G * Dh / mu_l).to("")
-        S = _chen_S_factor(qpp, G, h_lv, Re_lo)
+        Re_lo = G * si.cold_Dh / mu_l
+        S = _chen_S_factor(Re_lo)
         if x is not None:
             F = _chen_F_factor(w.P, x)
         else:
             F = 1
         h_c = F * h_lo + S * h_nb
     else:
-        h_c = _h_water_singlephase(w, stage, T_wall)
-    return h_c, boiling
+        bulk = state if state is not None and not isnan(state["mu"]) else None
+        h_c = _h_water_singlephase(w, stage, T_wall, bulk)
+    return Q_(h_c, "W/m^2/K"), boiling
 
-def _mass_flux(w: WaterStream, Aflow: Q_) -> Q_:
-    return (w.mass_flow / Aflow).to("kg/m^2/s")
+def _mass_flux(w: WaterStream, Aflow: float) -> float:
+    return w.mass_flow.to("kg/s").magnitude / Aflow
 
-def _h_liquid_only(w: WaterStream, stage: HXStage, T_wall: Q_) -> Q_:
-    D_h = stage.spec["cold_Dh"]
-    if stage.kind == "economiser":
-        if "tube_length" in stage.spec:
-            L = stage.spec["tube_length"]
-        else:
-            raise KeyError(f"{stage.name}: missing 'tube_length' or 'inner_length' for liquid-only boiling model")
-    else:
-        L = stage.spec["inner_length"]
-    A   = stage.spec["cold_flow_A"]
+def _h_liquid_only(w: WaterStream, stage: HXStage, T_wall: Q_) -> float:
+    si = stage.si
+    D_h = si.cold_Dh
+    L = si.tube_length if stage.kind == "economiser" else si.inner_length
     T_sat = WaterProps.Tsat(w.P)
-    mu_l  = WaterProps.mu_from_PT(w.P, T_sat)
-    k_l   = WaterProps.k_from_PT(w.P, T_sat)
-    cp_l  = WaterProps.cp_from_PT(w.P, T_sat)
-    G   = _mass_flux(w, A)
-    Re_lo  = (G * D_h / mu_l).to("")
-    Pr  = prandtl_number(cp_l, mu_l, k_l).to("")
-    mu_ratio = (mu_l / WaterProps.mu_from_PT(w.P, T_wall)).to("")
+    cp_l, mu_l, k_l = _transport_PT(w.P, T_sat)
+    G   = _mass_flux(w, si.cold_flow_A)
+    Re_lo  = G * D_h / mu_l
+    Pr  = prandtl_number(cp_l, mu_l, k_l)
+    mu_ratio = mu_l / WaterProps.mu_from_PT(w.P, T_wall).to("Pa*s").magnitude
 
     if stage.kind == "economiser":
         Nu = nu_gnielinski(Re_lo, Pr, mu_ratio, L, D_h)
     elif stage.kind == "tube_bank":
-        Pr_s = prandtl_number(cp_l, WaterProps.mu_from_PT(w.P, T_wall), WaterProps.k_from_PT(w.P, T_wall))
-        Nu, m = nu_zukauskas_bank(Re_lo, Pr, Pr_s, stage.spec["arrangement"])
-        Nu *= bank_row_factor(stage.spec["N_rows"])
-        Nu *= spacing_factor(D_h, stage.spec["ST"], stage.spec["SL"], stage.spec["arrangement"], m)
+        Pr_s = prandtl_number(cp_l, WaterProps.mu_from_PT(w.P, T_wall).to("Pa*s").magnitude, WaterProps.k_from_PT(w.P, T_wall).to("W/m/K").magnitude)
+        Nu, m = nu_zukauskas_bank(Re_lo, Pr, Pr_s, si.arrangement)
+        Nu *= bank_row_factor(si.N_rows)
+        Nu *= spacing_factor(D_h, si.ST, si.SL, si.arrangement, m)
     else:
         Nu = nu_churchill_bernstein(Re_lo, Pr)
 
-    return (Nu * k_l / D_h).to("W/m^2/K")
+    return Nu * k_l / D_h
 
 def _martinelli_Xtt(P: Q_, x: float) -> float:
     T_sat = WaterProps.Tsat(P)
@@ -264,12 +227,12 @@ def _martinelli_Xtt(P: Q_, x: float) -> float:
     rho_ratio = (rho_g / rho_l).to("").magnitude
     return ((1 - x) / x) ** 0.9 * (mu_ratio ** 0.1) * (rho_ratio ** 0.5)
 
-def _chen_S_factor(qpp: Q_, G: Q_, h_lv: Q_, Re_lo: Q_) -> Q_:
-    Re = max(1.0, Re_lo.to("").magnitude)
+def _chen_S_factor(Re_lo: float) -> float:
+    Re = max(1.0, Re_lo)
     S = 1.0 / (1.0 + 2.53e-6 * (Re ** 1.17))
-    return Q_(max(0.1, min(S, 1.0)), "")
+    return max(0.1, min(S, 1.0))
 
-def _chen_F_factor(P: Q_, x: float) -> Q_:
+def _chen_F_factor(P: Q_, x: float) -> float:
     Xtt = _martinelli_Xtt(P, x)
     F = 1.0 + 0.12 * (max(1e-6, 1.0 / Xtt) ** 0.8)
-    return Q_(min(5.0, max(1.0, F)), "")
+    return min(5.0, max(1.0, F))
@@ -1,68 +1,114 @@
+import functools
 import logging
 from common.logging_utils import setup_logging
 from common.units import Q_
 from common.boiler_loop import run_boiler_case
+from common.sweep import SweepCase, run_sweep, sweep_run_id
+from common.doe import run_campaign
+from common.continuation import run_continuation
+from common.run_cache import RunCache
+from common.run_store import RunStore
 
 log = logging.getLogger(__name__)
 
-def run_default_case() -> None:
-    run_boiler_case(run_id="default_case")
+SWEEP_KWARGS = dict(
+    tol_m=Q_(1e-3, "kg/s"),
+    max_iter=20,
+    write_csv=True,
+)
+
+def _run_options(cache: bool = False, store: bool = False, campaign: str = "sensitivity") -> dict:
+    opts = {}
+    if cache:
+        opts["cache"] = RunCache("results/cache")
+    if store:
+        opts["store"] = RunStore("results/store", campaign=campaign)
+    return opts
+
+def run_default_case(cache: bool = False, store: bool = False) -> None:
+    run_boiler_case(run_id="default_case", **_run_options(cache=cache, store=store, campaign="default"))
+
+def _excess_air_case(ea: float, **opts) -> SweepCase:
+    return SweepCase(
+        run_id=sweep_run_id("excess_air", ea),
+        kwargs=dict(
+            SWEEP_KWARGS,
+            **opts,
+            operation_overrides={"excess_air_ratio": Q_(ea, "")},
+            param_group="excess_air",
+            param_value=ea,
+        ),
+    )
+
+def _drum_pressure_case(P_bar: float, **opts) -> SweepCase:
+    return SweepCase(
+        run_id=sweep_run_id("drum_pressure", P_bar, "bar"),
+        kwargs=dict(
+            SWEEP_KWARGS,
+            **opts,
+            operation_overrides={"drum_pressure": Q_(P_bar, "bar")},
+            param_group="drum_pressure",
+            param_value=P_bar,
+        ),
+    )
 
-def run_excess_air_sensitivity() -> None:
+def run_excess_air_sensitivity(max_workers: int | None = None, continuation: bool = False, cache: bool = False, store: bool = False) -> None:
     ea_values = [1.00, 1.05, 1.10, 1.15, 1.20, 1.30]
+    opts = _run_options(cache=cache, store=store)
 
-    for ea in ea_values:
-        logging.getLogger(__name__).info(f"Running case with excess_air_ratio={ea}")
-
-        run_boiler_case(
-            operation_overrides={"excess_air_ratio": Q_(ea, "")},
-            tol_m=Q_(1e-3, "kg/s"),
-            max_iter=20,
-            write_csv=True,
-            run_id=f"excess_air_{ea}",
-        )
+    log.info(f"Running excess_air_ratio sweep over {ea_values}")
+    if continuation:
+        run_continuation(ea_values, functools.partial(_excess_air_case, **opts))
+    else:
+        run_sweep([_excess_air_case(ea, **opts) for ea in ea_values], max_workers=max_workers)
 
-def run_water_pressure_sensitivity() -> None:
+def run_water_pressure_sensitivity(max_workers: int | None = None, continuation: bool = False, cache: bool = False, store: bool = False) -> None:
     Pbar_values = [4.0, 10.0, 16.0]
+    opts = _run_options(cache=cache, store=store)
 
-    for P_bar in Pbar_values:
-        logging.getLogger(__name__).info(f"Running case with drum pressure={P_bar} bar")
-
-        run_boiler_case(
-            operation_overrides={"drum_pressure": Q_(P_bar, "bar")},
-            tol_m=Q_(1e-3, "kg/s"),
-            max_iter=20,
-            write_csv=True,
-            run_id=f"drum_pressure_{P_bar}bar",
-        )
+    log.info(f"Running drum pressure sweep over {Pbar_values} bar")
+    if continuation:
+        run_continuation(Pbar_values, functools.partial(_drum_pressure_case, **opts))
+    else:
+        run_sweep([_drum_pressure_case(P_bar, **opts) for P_bar in Pbar_values], max_workers=max_workers)
 
 
-def run_fuel_flow_sensitivity() -> None:
+def run_fuel_flow_sensitivity(max_workers: int | None = None, cache: bool = False, store: bool = False) -> None:
     mdot_values = [0.025, 0.050, 0.075, 0.10, 0.125]  # kg/s
-
-    for mdot in mdot_values:
-        logging.getLogger(__name__).info(f"Running case with fuel mass_flow={mdot} kg/s")
-
-        run_boiler_case(
-            fuel_overrides={"mass_flow": Q_(mdot, "kg/s")},
-            tol_m=Q_(1e-3, "kg/s"),
-            max_iter=20,
-            write_csv=True,
-            run_id=f"fuel_flow_{mdot}kgs",
+    opts = _run_options(cache=cache, store=store)
+
+    log.info(f"Running fuel mass_flow sweep over {mdot_values} kg/s")
+    cases = [
+        SweepCase(
+            run_id=sweep_run_id("fuel_flow", mdot, "kgs"),
+            kwargs=dict(
+                SWEEP_KWARGS,
+                **opts,
+                fuel_overrides={"mass_flow": Q_(mdot, "kg/s")},
+                param_group="fuel_flow",
+                param_value=mdot,
+            ),
         )
+        for mdot in mdot_values
+    ]
+    run_sweep(cases, max_workers=max_workers)
 
-def run_fouling_sensitivity() -> None:
+def run_fouling_sensitivity(max_workers: int | None = None, cache: bool = False, store: bool = False) -> None:
     factors = [1, 5, 10]
-    for f in factors:
-        logging.getLogger(__name__).info(f"Running case with fouling_factor={f}")
-
-        run_boiler_case(
-            fouling_factor=f,
-            tol_m=Q_(1e-3, "kg/s"),
-            max_iter=20,
-            write_csv=True,
-            run_id=f"fouling_{f}",
+    opts = _run_options(cache=cache, store=store)
+
+    log.info(f"Running fouling_factor sweep over {factors}")
+    cases = [
+        SweepCase(
+            run_id=sweep_run_id("fouling", f),
+            kwargs=dict(SWEEP_KWARGS, **opts, fouling_factor=f, param_group="fouling", param_value=f),
         )
+        for f in factors
+    ]
+    run_sweep(cases, max_workers=max_workers)
+
+def run_doe_campaign(spec_path: str = "config/doe.yaml", max_workers: int | None = None) -> None:
+    run_campaign(spec_path, max_workers=max_workers)
 
 def main() -> None:
     setup_logging("INFO")
@@ -74,6 +120,7 @@ def main() -> None:
     # run_water_pressure_sensitivity()
     # run_fuel_flow_sensitivity() 
     # run_fouling_sensitivity()
+    # run_doe_campaign()
     log.info("end")
 
 